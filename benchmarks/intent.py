@@ -0,0 +1,71 @@
+"""
+Accuracy and latency of the local intent classifier on a prompt corpus built
+from the test prompts, and how often app.main would still ask the LLM.
+
+    python -m benchmarks.intent
+    python -m benchmarks.intent --threshold 0.5 --llm   # also time the LLM on the same prompts
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+from scrape_gpt.intent import CONFIDENCE_THRESHOLD, CORPUS, classify, label_of, load_corpus
+from scrape_gpt.models import Search
+
+
+async def time_llm(corpus):
+    from scrape_gpt.llm import create_chat
+
+    chat = create_chat().with_structured_output(Search)
+    correct, timings = 0, []
+    for item in corpus:
+        start = time.perf_counter()
+        search = await chat.ainvoke(item["prompt"])
+        timings.append(time.perf_counter() - start)
+        correct += label_of(search) == item["label"]
+    print(f"LLM: {correct}/{len(corpus)} correct, {statistics.median(timings) * 1000:.0f}ms p50 per prompt")
+
+
+def run(corpus_path: str, threshold: float, repeat: int, llm: bool):
+    corpus = load_corpus(corpus_path)
+    correct = confident = confident_correct = 0
+    confusion = Counter()
+    timings = []
+    for item in corpus:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            intent = classify(item["prompt"])
+            timings.append((time.perf_counter() - start) * 1e6)
+        predicted = label_of(intent.search)
+        confusion[(item["label"], predicted)] += 1
+        correct += predicted == item["label"]
+        if intent.confidence >= threshold:
+            confident += 1
+            confident_correct += predicted == item["label"]
+        else:
+            print(f"  fallback ({intent.confidence:.2f}, {predicted} vs {item['label']}): {item['prompt'][:90]}")
+
+    timings.sort()
+    print(f"Accuracy: {correct}/{len(corpus)} ({correct / len(corpus):.0%})")
+    print(
+        f"Confident (>= {threshold}): {confident}/{len(corpus)}, {confident_correct} correct; "
+        f"LLM fallback rate {(len(corpus) - confident) / len(corpus):.0%}"
+    )
+    print(f"Latency: {statistics.median(timings):.1f}µs p50 / {timings[int(len(timings) * 0.99)]:.1f}µs p99")
+    for (expected, predicted), count in sorted(confusion.items()):
+        if expected != predicted:
+            print(f"  {expected} -> {predicted}: {count}")
+    if llm:
+        asyncio.run(time_llm(corpus))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local search intent classifier.")
+    parser.add_argument("--corpus", type=str, default=str(CORPUS))
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=100, help="Timed classifications per prompt")
+    parser.add_argument("--llm", action="store_true", help="Also time the structured-output LLM call")
+    args = parser.parse_args()
+    run(args.corpus, args.threshold, args.repeat, args.llm)
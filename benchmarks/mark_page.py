@@ -0,0 +1,119 @@
+"""
+Time markPage() per agent step on local synthetic pages of 1k, 10k and 100k nodes,
+and check that clickables without a queryable selector are still marked.
+
+    python -m benchmarks.mark_page
+
+To compare against another version of the marking script, e.g. the previous one:
+
+    git show HEAD~1:scrape_gpt/mark_page.js > /tmp/mark_page_old.js
+    python -m benchmarks.mark_page --script /tmp/mark_page_old.js
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from pathlib import Path
+
+MARK_PAGE_JS = Path(__file__).resolve().parent.parent / "scrape_gpt" / "mark_page.js"
+
+STYLE = """
+<style>
+  body { font-family: sans-serif; }
+  .card { padding: 4px; margin: 2px; border: 1px solid #ddd; }
+  .clickable { cursor: pointer; }
+  .clickable:hover { background: #eee; }
+</style>
+"""
+
+
+def synthetic_page(nodes: int, seed: int = 0) -> str:
+    """
+    A page of roughly `nodes` elements: nested cards holding text, links,
+    buttons, inputs and CSS-clickable spans, most of them below the fold.
+    """
+    rng = random.Random(seed)
+    parts = ["<html><head>", STYLE, "</head><body>"]
+    count = 0
+    while count < nodes:
+        depth = rng.randint(1, 6)
+        parts.append('<div class="card">' * depth)
+        for _ in range(rng.randint(2, 8)):
+            kind = rng.random()
+            if kind < 0.15:
+                parts.append(f'<a href="/item/{count}">Item {count}</a>')
+            elif kind < 0.2:
+                parts.append(f"<button>Action {count}</button>")
+            elif kind < 0.23:
+                parts.append(f'<input name="field{count}" placeholder="Field {count}">')
+            elif kind < 0.3:
+                parts.append(f'<span class="clickable">Toggle {count}</span>')
+            else:
+                parts.append(f"<p>Some text for node {count} <b>with</b> <i>inline</i> markup.</p>")
+                count += 2
+            count += 1
+        parts.append("</div>" * depth)
+        count += depth
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+# Clickables only found by the onclick / computed cursor checks, by the text they are marked with
+COVERAGE_PAGE = """
+<html><head><style>.row { cursor: pointer; } .row span { display: block; padding: 8px; }</style></head><body>
+  <div id="js-handler" style="padding: 8px">JS handler</div>
+  <span style="display: inline-block; padding: 8px; cursor: pointer">Inline cursor</span>
+  <div style="cursor: pointer"><div style="padding: 8px">Inherited cursor</div></div>
+  <div tabindex="0" style="cursor: pointer; padding: 8px">Tab stop</div>
+  <div class="row"><span>Stylesheet cursor</span></div>
+  <script>document.getElementById("js-handler").onclick = () => {};</script>
+</body></html>
+"""
+COVERAGE_EXPECTED = ["JS handler", "Inline cursor", "Inherited cursor", "Tab stop", "Stylesheet cursor"]
+
+
+async def check_coverage(page, script: str) -> None:
+    await page.set_content(COVERAGE_PAGE)
+    await page.evaluate(script)
+    texts = {bbox["text"] for bbox in await page.evaluate("markPage()")}
+    await page.evaluate("unmarkPage()")
+    missing = [text for text in COVERAGE_EXPECTED if text not in texts]
+    marked = len(COVERAGE_EXPECTED) - len(missing)
+    print(f"Coverage: {marked}/{len(COVERAGE_EXPECTED)} clickables marked" + (f", missing {missing}" if missing else ""))
+
+
+async def run(script_path: str, sizes, steps: int, headless: bool):
+    from playwright.async_api import async_playwright
+
+    script = Path(script_path).read_text()
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless)
+        page = await browser.new_page(viewport={"width": 1280, "height": 800})
+        await check_coverage(page, script)
+        for size in sizes:
+            await page.set_content(synthetic_page(size))
+            await page.evaluate(script)
+            elements = await page.evaluate("document.getElementsByTagName('*').length")
+            timings = []
+            marked = 0
+            for _ in range(steps):
+                start = time.perf_counter()
+                marked = len(await page.evaluate("markPage()"))
+                timings.append((time.perf_counter() - start) * 1000)
+                await page.evaluate("unmarkPage()")
+            print(
+                f"{elements} nodes: {marked} marked, "
+                f"{statistics.median(timings):.1f}ms p50 / {max(timings):.1f}ms max per step ({steps} steps)"
+            )
+        await browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark element marking on synthetic pages.")
+    parser.add_argument("--script", type=str, default=str(MARK_PAGE_JS), help="Marking script to benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--headful", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.script, args.sizes, args.steps, not args.headful))
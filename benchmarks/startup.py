@@ -0,0 +1,67 @@
+"""
+Time CLI startup in fresh interpreters: `--help` and the import of each entry
+module, with the slowest imports from `python -X importtime`.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --top 20
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "chat --help": ["-m", "scrape_gpt.chat", "--help"],
+    "app --help": ["-m", "scrape_gpt.app", "--help"],
+    "import scrape_gpt.chat": ["-c", "import scrape_gpt.chat"],
+    "import scrape_gpt.app_langgraph": ["-c", "import scrape_gpt.app_langgraph"],
+    # What a follow-up prompt (no link) imports before it reads the session
+    "follow-up imports": ["-c", "import scrape_gpt.history, scrape_gpt.query_plan, scrape_gpt.session_store"],
+}
+
+
+def time_command(args, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def slowest_imports(args, top: int):
+    """
+    (cumulative seconds, module) of the slowest imports made by the entry
+    module itself, i.e. at most one level below the top of the import tree.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        module = module[1:]
+        if len(module) - len(module.lstrip()) <= 2:
+            imports.append((int(cumulative) / 1e6, module.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def run(runs: int, top: int):
+    for name, args in COMMANDS.items():
+        try:
+            timings = time_command(args, runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{name}: failed ({e.stderr.decode().strip().splitlines()[-1]})")
+            continue
+        print(f"{name}: {statistics.median(timings):.2f}s p50 / {max(timings):.2f}s max ({runs} runs)")
+        for seconds, module in slowest_imports(args, top):
+            print(f"    {seconds:6.2f}s  {module}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup and import times.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports to list per command")
+    args = parser.parse_args()
+    run(args.runs, args.top)
@@ -1,279 +1,240 @@
 import asyncio
-import os
 import argparse
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
 
-from browser_use import Agent, Browser, ChatGoogle, ChatOpenAI
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI as LangchainChatGoogle
-from langchain_openai import ChatOpenAI as LangchainChatOpenAI
 from pydantic import BaseModel
 
-load_dotenv()
-
-
-class Search(BaseModel):
-    search_ranch: bool = False
-    search_epd: bool = False
-    search_animal: bool = False
-
-
-class RanchProfile(BaseModel):
-    type: str
-    member: str
-    prefix: str
-    member_name: str
-    dba: str
-    city: str
-    state_or_province: str
-
-
-class Cell(BaseModel):
-    epd: float
-    change: float
-    acc: float
-    rank: str
-
-
-class EPDAnimal(BaseModel):
-    registration: str
-    tattoo: str
-    name: str
-    ce_direct: Cell
-    birth_weight: Cell
-    weaning_weight: Cell
-    yearling_weight: Cell
-    milk: Cell
-    tm: Cell
-    ce_maternal: Cell
-    stayability: Cell
-    yield_grade: Cell
-    carcass_weight: Cell
-    ribeye_area: Cell
-    fat_thickness: Cell
-    marbling: Cell
-    cez_dollar_index: Cell
-    bmi_dollar_index: Cell
-    cpi_dollar_index: Cell
-    f_dollar_index: Cell
-
-
-class Animal(BaseModel):
-    registration: str
-    prefix_or_tattoo: str
-    name: str
-    birth_date: str
-
-
-def create_chat():
-    open_ai_key = os.getenv("OPENAI_API_KEY")
-    if open_ai_key:
-        return LangchainChatOpenAI(model="gpt-4.1-mini")
-    else:
-        return LangchainChatGoogle(model="gemini-2.5-flash")
-
-
-def create_llm():
-    open_ai_key = os.getenv("OPENAI_API_KEY")
-    if open_ai_key:
-        return ChatOpenAI(model="gpt-4.1-mini")
-    else:
-        return ChatGoogle(model="gemini-2.5-flash")
+from scrape_gpt.extract_rows import BATCH_SIZE, CONCURRENCY, iter_extract_rows
+from scrape_gpt.intent import classify_search
+from scrape_gpt.llm import create_chat, create_llm, get_chat, load_model
+from scrape_gpt.llm_cache import get_llm_cache
+from scrape_gpt.models import ANIMAL_SEARCH_REFERENCE, RANCH_EXTRA_PROMPT, Animal, EPDAnimal, RanchProfile, Search
+from scrape_gpt.parse_rows import iter_rows, result_headers
+from scrape_gpt.partitions import (
+    ANIMAL_SEARCH_PREFIXES,
+    RANCH_STATE_OPTIONS_JS,
+    RESULT_ROW_SELECTOR,
+    SETTLE_HINT,
+    SHORTHORN_URL,
+    dropdown_options,
+    epd_ce_direct_ranges,
+    iter_crawl_partitions,
+)
+from scrape_gpt.phases import PhaseTimer
+from scrape_gpt.sinks import RowWriter
+from scrape_gpt.tracing import agent_step_hooks, start_trace, trace_llm
+
+# browser_use and the browser pool are imported by the functions that drive a
+# browser, so --help and row extraction don't pay for them.
 
+load_dotenv()
 
-async def main(task: str):
-    chat = create_chat()
-    chat_task = chat.with_structured_output(Search)
-    search_task = chat_task.invoke(task)
 
-    browser = Browser(keep_alive=True)
-    await browser.start()
+async def run_search_agent(task: str, timer: Optional[PhaseTimer] = None) -> Tuple[Search, Any, Optional[str], Any]:
+    """
+    Classify the task, run the browser agent on a pooled browser and return the
+    classification, the agent history, for table searches the result page HTML,
+    and the chat model to extract rows with.
+
+    Classification, the browser launch and building both LLM clients run
+    concurrently; only the agent itself waits for all of them.
+    """
+    from browser_use import Agent
+
+    from scrape_gpt.browser_pool import get_browser_pool
+    from scrape_gpt.cdp import get_page_html
+    from scrape_gpt.settle import settle_session
+    from scrape_gpt.tools.wait import create_search_tools
+
+    timer = timer or PhaseTimer()
+    pool = get_browser_pool()
+    search_task, _, llm, chat = await asyncio.gather(
+        timer.run("classify", classify_search(task)),
+        timer.run("browser", pool.warm()),
+        timer.run("agent_llm", load_model("llm", create_llm)),
+        timer.run("extract_llm", load_model("chat", create_chat)),
+    )
 
     if search_task.search_animal:
-        task += " Reference for Animal search: Radio button index 105 is bulls (index 100 is bulls for EPD search), index 106 is both (bulls & females), index 107 is females, index 108 is Registration #, index 109 is Tattoo, index 110 is Name, and index 111 is EID. Use search field box to enter search value"
-
-    agent = Agent(
-        task=task + " Use extract_structured_data tool to data as JSON list of dictionaries",
-        llm=create_llm(),
-        browser_session=browser,
-    )
-    history = await agent.run()
-    if not search_task.search_ranch and not search_task.search_epd and not search_task.search_animal:
-        return history.final_result()
-    else:
-        browser_session = agent.browser_session
-        cdp_session = await browser_session.get_or_create_cdp_session()
-        try:
-            body_id = await cdp_session.cdp_client.send.DOM.getDocument(
-                session_id=cdp_session.session_id
+        task += ANIMAL_SEARCH_REFERENCE
+
+    async with pool.lease() as browser:
+        with timer.phase("agent_setup"):
+            agent = Agent(
+                task=task + " Use extract_structured_data tool to data as JSON list of dictionaries",
+                llm=trace_llm(llm),
+                browser_session=browser,
+                tools=create_search_tools(),
             )
-            page_html_result = await cdp_session.cdp_client.send.DOM.getOuterHTML(
-                params={"backendNodeId": body_id["root"]["backendNodeId"]},
-                session_id=cdp_session.session_id,
-            )
-            page_html = page_html_result["outerHTML"]
-            _ = await browser_session.get_current_page_url()
-        except Exception as e:
-            raise RuntimeError(f"Couldn't extract page content: {e}")
-
-        llm = create_chat()
-        if search_task.search_ranch:
-            structured_llm = llm.with_structured_output(RanchProfile)
-            extra_prompt = "(from start to end: type, member, prefix, member_name, dba, city, state_or_province)"
-        elif search_task.search_epd:
-            structured_llm = llm.with_structured_output(EPDAnimal)
-            extra_prompt = ""
-        elif search_task.search_animal:
-            structured_llm = llm.with_structured_output(Animal)
-            extra_prompt = ""
-        if search_task.search_epd:
-            rows = page_html.split("onmouseover")[2:]
+        history = await timer.run("agent", agent.run(**agent_step_hooks()))
+        if not search_task.search_ranch and not search_task.search_epd and not search_task.search_animal:
+            return search_task, history, None, chat
+        await timer.run("settle", settle_session(agent.browser_session, RESULT_ROW_SELECTOR, timeout=5))
+        page_html = await timer.run("page_html", get_page_html(agent.browser_session))
+    print(f"Agent complete, released browser. Browser pool: {pool.stats()}")
+    return search_task, history, page_html, chat
+
+
+async def stream_rows(
+    search_task: Search,
+    page_html: str,
+    batch_size: int = BATCH_SIZE,
+    concurrency: int = CONCURRENCY,
+    chat=None,
+) -> AsyncIterator[BaseModel]:
+    if search_task.search_ranch:
+        model = RanchProfile
+        extra_prompt = RANCH_EXTRA_PROMPT
+    elif search_task.search_epd:
+        model = EPDAnimal
+        extra_prompt = ""
+    elif search_task.search_animal:
+        model = Animal
+        extra_prompt = ""
+    skip = 1 if search_task.search_epd else 0
+    rows = iter_rows(page_html, skip=skip)
+    async for response in iter_extract_rows(
+        chat or get_chat(), rows, model, extra_prompt, batch_size=batch_size, concurrency=concurrency,
+        headers=result_headers(page_html, skip),
+    ):
+        print(response.model_dump_json())
+        yield response
+
+    if get_llm_cache() is not None:
+        print(f"LLM cache: {get_llm_cache().stats()}")
+
+
+async def stream_main(
+    task: str, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY
+) -> AsyncIterator[BaseModel]:
+    """
+    Like main, but yield each validated row as soon as it is extracted. Tasks
+    that aren't table searches yield nothing and print the agent's final result.
+    """
+    with start_trace("app", "app.main", task=task):
+        timer = PhaseTimer()
+        search_task, history, page_html, chat = await run_search_agent(task, timer)
+        if page_html is None:
+            print(history.final_result())
+            print(timer.report())
+            return
+        with timer.phase("extract"):
+            async for row in stream_rows(search_task, page_html, batch_size, concurrency, chat):
+                yield row
+        print(timer.report())
+
+
+async def main(task: str, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY):
+    with start_trace("app", "app.main", task=task):
+        timer = PhaseTimer()
+        search_task, history, page_html, chat = await run_search_agent(task, timer)
+        if page_html is None:
+            result = history.final_result()
         else:
-            rows = page_html.split("onmouseover")[1:]
-        results = []
-        for row in rows:
-            response = structured_llm.invoke(
-                f"extract the data from this html table row {extra_prompt} and convert to json:\n\n{row}"
-            )
-            results.append(response)
-            print(response.model_dump_json())
-
-        print("Agent complete, stopping browser")
-        await browser.kill()
-
-        return results
-
-
-async def ranch_search_all(debug: bool = True):
-    browser = Browser(keep_alive=True)
-    await browser.start()
-
-    agent = Agent(
-        task="Navigate https://shorthorn.digitalbeef.com/ and find all ranch(es), prioritize using each dropdown instead of text box in form. Skip dropdown value of 'United States - All'. Use extract_clean_markdown tool to get all data and processed by another agent",
-        llm=create_llm(),
-        browser_session=browser,
-        # output_model_schema=RanchProfile
-    )
+            with timer.phase("extract"):
+                result = [row async for row in stream_rows(search_task, page_html, batch_size, concurrency, chat)]
+        print(timer.report())
+    return result
+
+
+# Result model, dedup key, rows to skip, extra extraction prompt and partition task of each full crawl
+SEARCH_ALL: Dict[str, Tuple[Type[BaseModel], str, int, str, Callable[[str], str]]] = {
+    "ranch": (
+        RanchProfile,
+        "member",
+        0,
+        RANCH_EXTRA_PROMPT,
+        lambda state: f"navigate {SHORTHORN_URL} do Ranch search with state dropdown set to '{state}'. Stop once the result table is shown." + SETTLE_HINT,
+    ),
+    "epd": (
+        EPDAnimal,
+        "registration",
+        1,
+        "",
+        lambda ce_range: f"navigate {SHORTHORN_URL} do EPD search with CE direct {ce_range}, leaving any other CE direct bound blank. Stop once the result table is shown." + SETTLE_HINT,
+    ),
+    "animal": (
+        Animal,
+        "registration",
+        0,
+        "",
+        lambda prefix: f"navigate {SHORTHORN_URL} do Animal Search, search for both bulls & females with search field '{prefix}' on Tattoo. Stop once the result table is shown."
+        + SETTLE_HINT
+        + ANIMAL_SEARCH_REFERENCE,
+    ),
+}
+
+
+async def search_all_partitions(kind: str) -> List[str]:
+    if kind == "ranch":
+        return await dropdown_options(SHORTHORN_URL, RANCH_STATE_OPTIONS_JS)
+    if kind == "epd":
+        return epd_ce_direct_ranges()
+    return ANIMAL_SEARCH_PREFIXES
+
+
+async def stream_search_all(
+    kind: str, debug: bool = True, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY
+) -> AsyncIterator[BaseModel]:
+    """
+    Crawl every ranch, EPD or animal partition in parallel and yield unique rows
+    as they are extracted. With `debug` only one partition per pooled browser runs.
+    """
+    from scrape_gpt.browser_pool import get_browser_pool
+
+    values = await search_all_partitions(kind)
     if debug:
-        await agent.run(max_steps=4)
-    else:
-        await agent.run()
-
-    browser_session = agent.browser_session
-    cdp_session = await browser_session.get_or_create_cdp_session()
-    try:
-        body_id = await cdp_session.cdp_client.send.DOM.getDocument(
-            session_id=cdp_session.session_id
-        )
-        page_html_result = await cdp_session.cdp_client.send.DOM.getOuterHTML(
-            params={"backendNodeId": body_id["root"]["backendNodeId"]},
-            session_id=cdp_session.session_id,
-        )
-        page_html = page_html_result["outerHTML"]
-        _ = await browser_session.get_current_page_url()
-    except Exception as e:
-        raise RuntimeError(f"Couldn't extract page content: {e}")
-
-    llm = create_chat()
-    structured_llm = llm.with_structured_output(RanchProfile)
-    rows = page_html.split("onmouseover")[1:]
-    results = []
-    for row in rows:
-        response = structured_llm.invoke(
-            f"extract the data from this html table row (from start to end: type, member, prefix, member_name, dba, city, state_or_province) and convert to json:\n\n{row}"
-        )
-        results.append(response)
+        values = values[:get_browser_pool().size]
+
+    model, key, skip, extra_prompt, build_task = SEARCH_ALL[kind]
+    async for response in iter_crawl_partitions(
+        values,
+        build_task,
+        model,
+        key=key,
+        extra_prompt=extra_prompt,
+        skip=skip,
+        batch_size=batch_size,
+        extract_concurrency=concurrency,
+    ):
         print(response.model_dump_json())
+        yield response
 
-    print("Ranch Agent complete, stopping browser")
-    await browser.kill()
+    print(f"{kind} crawl complete. Browser pool: {get_browser_pool().stats()}")
 
 
-async def epd_search_all(debug: bool = True):
-    browser = Browser(keep_alive=True)
-    await browser.start()
+async def ranch_search_all(
+    debug: bool = True, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY
+):
+    return [row async for row in stream_search_all("ranch", debug, batch_size, concurrency)]
 
-    agent = Agent(
-        task="Navigate https://shorthorn.digitalbeef.com/ and find all epd(s), iterate over each CE Direct attribute using min max gap of 1. CE Direct min 0 max 0, CE Direct min 1 max 1, and so on. Use wait tool for 15 seconds due to long time of filtering. Use extract_clean_markdown tool to get all data and processed by another agent",
-        llm=create_llm(),
-        browser_session=browser,
-    )
-    if debug:
-        await agent.run(max_steps=4)
-    else:
-        await agent.run()
-
-    browser_session = agent.browser_session
-    cdp_session = await browser_session.get_or_create_cdp_session()
-    try:
-        body_id = await cdp_session.cdp_client.send.DOM.getDocument(
-            session_id=cdp_session.session_id
-        )
-        page_html_result = await cdp_session.cdp_client.send.DOM.getOuterHTML(
-            params={"backendNodeId": body_id["root"]["backendNodeId"]},
-            session_id=cdp_session.session_id,
-        )
-        page_html = page_html_result["outerHTML"]
-        _ = await browser_session.get_current_page_url()
-    except Exception as e:
-        raise RuntimeError(f"Couldn't extract page content: {e}")
-
-    llm = create_chat()
-    structured_llm = llm.with_structured_output(EPDAnimal)
-    rows = page_html.split("onmouseover")[2:]
-    results = []
-    for row in rows:
-        response = structured_llm.invoke(
-            f"extract the data from this html table row and convert to json:\n\n{row}"
-        )
-        results.append(response)
-        print(response.model_dump_json())
 
-    print("EPD Agent complete, stopping browser")
-    await browser.kill()
+async def epd_search_all(
+    debug: bool = True, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY
+):
+    return [row async for row in stream_search_all("epd", debug, batch_size, concurrency)]
 
 
-async def animal_search_all(debug: bool = True):
-    browser = Browser(keep_alive=True)
-    await browser.start()
+async def animal_search_all(
+    debug: bool = True, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY
+):
+    return [row async for row in stream_search_all("animal", debug, batch_size, concurrency)]
 
-    agent = Agent(
-        task="Navigate https://shorthorn.digitalbeef.com/ and find all animal(s), iterate by clicking Tattoo radio button first then using search value of A-Z and 0-9. Use extract_clean_markdown tool to get all data so other agent can process it. Radio button reference: Reg is index 108 and Tattoo is index 109. Use extract_clean_markdown tool to get all data and processed by another agent",
-        llm=create_llm(),
-        browser_session=browser,
-    )
-    if debug:
-        await agent.run(max_steps=5)
-    else:
-        await agent.run()
-
-    browser_session = agent.browser_session
-    cdp_session = await browser_session.get_or_create_cdp_session()
-    try:
-        body_id = await cdp_session.cdp_client.send.DOM.getDocument(
-            session_id=cdp_session.session_id
-        )
-        page_html_result = await cdp_session.cdp_client.send.DOM.getOuterHTML(
-            params={"backendNodeId": body_id["root"]["backendNodeId"]},
-            session_id=cdp_session.session_id,
-        )
-        page_html = page_html_result["outerHTML"]
-        _ = await browser_session.get_current_page_url()
-    except Exception as e:
-        raise RuntimeError(f"Couldn't extract page content: {e}")
-
-    llm = create_chat()
-    structured_llm = llm.with_structured_output(Animal)
-    rows = page_html.split("onmouseover")[1:]
-    results = []
-    for row in rows:
-        response = structured_llm.invoke(
-            f"extract the data from this html table row and convert to json:\n\n{row}"
-        )
-        results.append(response)
-        print(response.model_dump_json())
 
-    print("Animal Agent complete, stopping browser")
-    await browser.kill()
+async def run_cli(args):
+    if args.search_all:
+        stream = stream_search_all(args.search_all, not args.full, args.batch_size, args.concurrency)
+    else:
+        stream = stream_main(args.prompt, args.batch_size, args.concurrency)
+    if args.output:
+        with RowWriter(args.output, args.format) as writer:
+            async for row in stream:
+                writer.write(row)
+        print(f"Wrote {writer.count} rows to {args.output}")
+    else:
+        async for _ in stream:
+            pass
 
 
 if __name__ == "__main__":
@@ -281,8 +242,44 @@ if __name__ == "__main__":
     parser.add_argument(
         "--prompt",
         type=str,
-        required=True,
         help="Specify description to run",
     )
+    parser.add_argument(
+        "--search_all",
+        choices=list(SEARCH_ALL),
+        help="Crawl every ranch, EPD or animal partition instead of running a prompt",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Crawl all partitions with --search_all (default is a short debug crawl)",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Number of table rows packed into one extraction call",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=CONCURRENCY,
+        help="Maximum number of extraction calls running at once",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Write rows to this file as they are extracted",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "csv"],
+        help="Output format (default: from the --output extension, else ndjson)",
+    )
     args = parser.parse_args()
-    asyncio.run(main(args.prompt))
+    if not args.prompt and not args.search_all:
+        parser.error("one of --prompt or --search_all is required")
+
+    from scrape_gpt.browser_pool import run_with_pools
+
+    asyncio.run(run_with_pools(run_cli(args)))
@@ -4,28 +4,45 @@ import os
 import platform
 import random
 import re
+from functools import lru_cache
 from io import BytesIO
-from typing import List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 
 import nest_asyncio
 from dotenv import load_dotenv
-from langchain import hub
 from langchain_core.messages import BaseMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 from langchain_core.runnables import chain as chain_decorator
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from PIL import Image
-from playwright.async_api import Page, async_playwright
+from playwright.async_api import Page
 from typing_extensions import TypedDict
 
+from scrape_gpt.browser_pool import get_playwright_pool, run_with_pools
+from scrape_gpt.screenshots import (ScreenshotConfig, encode_screenshot, rewrite_screenshot_messages,
+                                    vision_tokens)
+from scrape_gpt.settle import settle_page
+from scrape_gpt.tracing import span, start_trace, traced
+from scrape_gpt.trajectory import TrajectoryRun
+
 load_dotenv()
 
 # Apply nest_asyncio for async playwright in script
 nest_asyncio.apply()
 
+# "fast" fills a field in one operation, "human" types key by key with random delays
+TYPING_PROFILE = os.getenv("TYPING_PROFILE", "fast")
+CLICK_SETTLE_TIMEOUT = 5
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+MARK_PAGE_JS = PACKAGE_DIR / "mark_page.js"
+# Local copy of the "wfh/web-voyager" LangChain Hub prompt, so importing needs no network
+WEB_VOYAGER_PROMPT = PACKAGE_DIR / "prompt" / "web_voyager.md"
+LLM_MODEL = "GOOGLE"
+
 
 # Define TypedDict classes
 class BBox(TypedDict):
@@ -45,10 +62,12 @@ class AgentState(TypedDict):
     page: Page
     input: str
     img: str
+    img_hash: Optional[int]
     bboxes: List[BBox]
     prediction: Prediction
     scratchpad: List[BaseMessage]
     observation: str
+    trajectory: Optional[TrajectoryRun]
 
 
 # Define tools
@@ -66,6 +85,7 @@ async def click(state: AgentState):
         return f"Error: no bbox for : {bbox_id}"
     x, y = bbox["x"], bbox["y"]
     await page.mouse.click(x, y)
+    await settle_page(page, timeout=CLICK_SETTLE_TIMEOUT)
     # TODO: In the paper, they automatically parse any downloaded PDFs
     # We could add something similar here as well and generally
     # improve response format.
@@ -87,11 +107,15 @@ async def type_text(state: AgentState):
     select_all = "Meta+A" if platform.system() == "Darwin" else "Control+A"
     await page.keyboard.press(select_all)
     await page.keyboard.press("Backspace")
-    # Type each character with a random delay between 80 and 150 ms.
-    for char in text_content:
-        await page.keyboard.press(char)
-        await asyncio.sleep(random.uniform(0.08, 0.15))
+    if TYPING_PROFILE == "human":
+        # Type each character with a random delay between 80 and 150 ms.
+        for char in text_content:
+            await page.keyboard.press(char)
+            await asyncio.sleep(random.uniform(0.08, 0.15))
+    else:
+        await page.keyboard.insert_text(text_content)
     await page.keyboard.press("Enter")
+    await settle_page(page, timeout=CLICK_SETTLE_TIMEOUT)
     return f"Typed {text_content} and submitted"
 
 
@@ -126,9 +150,8 @@ async def scroll(state: AgentState):
 
 
 async def wait(state: AgentState):
-    sleep_time = 5
-    await asyncio.sleep(sleep_time)
-    return f"Waited for {sleep_time}s."
+    result = await settle_page(state["page"])
+    return result.describe()
 
 
 async def go_back(state: AgentState):
@@ -144,32 +167,48 @@ async def to_google(state: AgentState):
 
 
 # Mark page function
-with open("./mark_page.js") as f:
-    mark_page_script = f.read()
+@lru_cache(maxsize=None)
+def mark_page_script() -> str:
+    return MARK_PAGE_JS.read_text()
 
 
 @chain_decorator
 async def mark_page(page):
-    await page.evaluate(mark_page_script)
-    for _ in range(10):
-        try:
-            bboxes = await page.evaluate("markPage()")
-            break
-        except Exception:
-            # May be loading...
-            asyncio.sleep(3)
-    screenshot = await page.screenshot()
+    with span("mark_page", "browser") as current:
+        await page.evaluate(mark_page_script())
+        for _ in range(10):
+            try:
+                bboxes = await page.evaluate("markPage()")
+                break
+            except Exception:
+                # May be loading...
+                await settle_page(page, timeout=3)
+        if current is not None:
+            current.attrs["bboxes"] = len(bboxes)
+    with span("screenshot", "browser"):
+        # CSS pixels, so HiDPI screens don't double the image size
+        screenshot = await page.screenshot(scale="css")
     # Ensure the bboxes don't follow us around
     await page.evaluate("unmarkPage()")
     return {
-        "img": base64.b64encode(screenshot).decode(),
+        "screenshot": screenshot,
         "bboxes": bboxes,
     }
 
 
-async def annotate(state):
-    marked_page = await mark_page.with_retry().ainvoke(state["page"])
-    return {**state, **marked_page}
+screenshot_config = ScreenshotConfig.from_env()
+
+
+def attach_screenshot(state, png: bytes):
+    # Every prompt is built from scratch, so the screenshot is always attached;
+    # the hash only tells whether the page changed since the last LLM step
+    screenshot = encode_screenshot(png, screenshot_config, state.get("img_hash"))
+    print(
+        f"Screenshot {screenshot.width}x{screenshot.height} {screenshot.mime}"
+        f"{'' if screenshot.changed else ' (unchanged)'}: "
+        f"{screenshot.size / 1024:.0f}KB, ~{vision_tokens(screenshot.width, screenshot.height)} vision tokens"
+    )
+    return {**state, "img": screenshot.data, "img_hash": screenshot.hash}
 
 
 # Helper functions
@@ -217,18 +256,66 @@ def update_scratchpad(state: AgentState):
     return {**state, "scratchpad": [SystemMessage(content=txt)]}
 
 
-prompt = hub.pull("wfh/web-voyager")
+@lru_cache(maxsize=None)
+def web_voyager_prompt() -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", WEB_VOYAGER_PROMPT.read_text()),
+            MessagesPlaceholder("scratchpad", optional=True),
+            (
+                "human",
+                [
+                    {"type": "image_url", "image_url": {"url": "data:image/png;base64,{img}"}},
+                    {"type": "text", "text": "{bbox_descriptions}"},
+                    {"type": "text", "text": "{input}"},
+                ],
+            ),
+        ]
+    )
+
+
+def create_agent_llm():
+    # Provider SDKs are slow to import; only load the one in use
+    if LLM_MODEL == "OPENAI":
+        from langchain_openai import ChatOpenAI
 
-# Main graph setup
-LLM_MODEL = "GOOGLE"
-if LLM_MODEL == "OPENAI":
-    llm = ChatOpenAI(model="gpt-4-turbo", max_tokens=4096)
-else:
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+        return ChatOpenAI(model="gpt-4-turbo", max_tokens=4096)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+
+
+@lru_cache(maxsize=None)
+def get_predict():
+    return (
+        format_descriptions
+        | web_voyager_prompt()
+        | rewrite_screenshot_messages
+        | create_agent_llm()
+        | StrOutputParser()
+        | parse
+    )
+
+
+async def agent(state: AgentState):
+    # Replay the recorded step when the page still matches it, else ask the LLM
+    with span("agent_step", "step", url=state["page"].url) as current:
+        marked_page = await mark_page.with_retry().ainvoke(state["page"])
+        state = {**state, "bboxes": marked_page["bboxes"]}
+        trajectory = state.get("trajectory")
+        prediction = await trajectory.next_prediction(state["page"], state["bboxes"]) if trajectory else None
+        replayed = prediction is not None
+        if prediction is None:
+            state = attach_screenshot(state, marked_page["screenshot"])
+            prediction = await get_predict().ainvoke(state)
+        else:
+            state = {**state, "img": ""}
+        if trajectory:
+            await trajectory.record(state["page"], state["bboxes"], prediction)
+        if current is not None:
+            current.attrs.update(action=prediction.get("action"), replayed=replayed)
+    return {**state, "prediction": prediction}
 
-agent = annotate | RunnablePassthrough.assign(
-    prediction=format_descriptions | prompt | llm | StrOutputParser() | parse
-)
 
 # Build and compile graph
 graph_builder = StateGraph(AgentState)
@@ -251,7 +338,7 @@ for node_name, tool in tools.items():
         node_name,
         # The lambda ensures the function's string output is mapped to the "observation"
         # key in the AgentState
-        RunnableLambda(tool) | (lambda observation: {"observation": observation}),
+        RunnableLambda(traced("browser", node_name)(tool)) | (lambda observation: {"observation": observation}),
     )
     # Always return to the agent (by means of the update-scratchpad node)
     graph_builder.add_edge(node_name, "update_scratchpad")
@@ -275,54 +362,73 @@ graph = graph_builder.compile()
 
 
 # Main execution
-async def call_agent(question: str, page, max_steps: int = 150):
-    event_stream = graph.astream(
-        {
-            "page": page,
-            "input": question,
-            "scratchpad": [],
-        },
-        {
-            "recursion_limit": max_steps,
-        },
-    )
-    final_answer = None
-    steps = []
+async def call_agent(
+    question: str,
+    page,
+    max_steps: int = 150,
+    show_images: bool = False,
+    trajectory: Optional[TrajectoryRun] = None,
+):
+    with start_trace("langgraph", "call_agent", question=question):
+        event_stream = graph.astream(
+            {
+                "page": page,
+                "input": question,
+                "scratchpad": [],
+                "trajectory": trajectory,
+            },
+            {
+                "recursion_limit": max_steps,
+            },
+        )
+        final_answer = None
+        steps = []
 
-    def clear_console():
-        os.system("cls" if os.name == "nt" else "clear")
+        def clear_console():
+            os.system("cls" if os.name == "nt" else "clear")
 
-    def show_image(image_data):
-        img = Image.open(BytesIO(base64.b64decode(image_data)))
-        img.show()
+        def show_image(image_data):
+            img = Image.open(BytesIO(base64.b64decode(image_data)))
+            img.show()
 
-    async for event in event_stream:
-        if "agent" not in event:
-            continue
-        pred = event["agent"].get("prediction") or {}
-        action = pred.get("action")
-        action_input = pred.get("args")
+        async for event in event_stream:
+            if "agent" not in event:
+                continue
+            pred = event["agent"].get("prediction") or {}
+            action = pred.get("action")
+            action_input = pred.get("args")
 
-        clear_console()
-        steps.append(f"{len(steps) + 1}. {action}: {action_input}")
-        print("\n".join(steps))
+            clear_console()
+            steps.append(f"{len(steps) + 1}. {action}: {action_input}")
+            print("\n".join(steps))
 
-        if "img" in event["agent"]:
-            show_image(event["agent"]["img"])
+            if show_images and event["agent"].get("img"):
+                show_image(event["agent"]["img"])
 
-        if "ANSWER" in action:
-            final_answer = action_input[0]
-            break
+            if "ANSWER" in action:
+                final_answer = action_input[0]
+                if trajectory:
+                    trajectory.save()
+                break
 
     return final_answer
 
 
+async def call_agent_template(template: str, params: Dict[str, str], page, **kwargs):
+    """
+    Run a parameterized task, replaying the actions recorded by an earlier run
+    of the same template and asking the LLM only where the page diverges.
+    """
+    trajectory = TrajectoryRun.load(template, params)
+    answer = await call_agent(template.format(**params), page, trajectory=trajectory, **kwargs)
+    print(f"Replayed {trajectory.replayed} of {len(trajectory.steps)} steps without the LLM")
+    return answer
+
+
 async def main_amgr():
-    browser = await async_playwright().start()
-    browser = await browser.chromium.launch(headless=False, args=None)
-    page = await browser.new_page()
-    await page.goto("https://www.amgr.org/frm_directorySearch.cfm")
-    await call_agent("Find the contact details of all members", page)
+    async with get_playwright_pool().lease() as page:
+        await page.goto("https://www.amgr.org/frm_directorySearch.cfm")
+        await call_agent("Find the contact details of all members", page)
 
 
 async def main_amgr_parameter(
@@ -330,23 +436,20 @@ async def main_amgr_parameter(
     member: str = "Dwight Elmore",
     breed: str = "(AR) – American Red",
 ):
-    browser = await async_playwright().start()
-    browser = await browser.chromium.launch(headless=False, args=None)
-    page = await browser.new_page()
-    await page.goto("https://www.amgr.org/frm_directorySearch.cfm")
-    await call_agent(
-        f"Find breeder with this information: State: {state}, Member: {member}, Breed: {breed}",
-        page,
-    )
+    async with get_playwright_pool().lease() as page:
+        await page.goto("https://www.amgr.org/frm_directorySearch.cfm")
+        await call_agent_template(
+            "Find breeder with this information: State: {state}, Member: {member}, Breed: {breed}",
+            {"state": state, "member": member, "breed": breed},
+            page,
+        )
 
 
 async def main_shorthorn():
-    browser = await async_playwright().start()
-    browser = await browser.chromium.launch(headless=False, args=None)
-    page = await browser.new_page()
-    await page.goto("https://shorthorn.digitalbeef.com/")
-    await call_agent(f"Find all ranch", page)
+    async with get_playwright_pool().lease() as page:
+        await page.goto("https://shorthorn.digitalbeef.com/")
+        await call_agent(f"Find all ranch", page)
 
 
 if __name__ == "__main__":
-    asyncio.run(main_amgr())
+    asyncio.run(run_with_pools(main_amgr()))
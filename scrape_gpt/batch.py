@@ -0,0 +1,158 @@
+"""
+Run queued scrape jobs from a JSONL file, one job per line:
+
+    {"id": "club-1", "session_id": "club", "link": "https://...", "prompt": "..."}   -> chat.main
+    {"id": "ranch-al", "prompt": "navigate https://shorthorn.digitalbeef.com/ do Ranch search ..."}   -> app.main
+
+    python -m scrape_gpt.batch jobs.jsonl --output results.jsonl --workers 4 --per-domain 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+from scrape_gpt.server import ScrapeServer
+
+load_dotenv()
+
+WORKERS = 4
+PER_DOMAIN = 2
+
+URL_PATTERN = re.compile(r"https?://[^\s'\"]+")
+
+
+def job_domain(job: Dict[str, Any]) -> str:
+    """
+    Host the job browses: its link, else the first URL in its prompt; "" for
+    jobs that don't browse (e.g. follow-up prompts on a session).
+    """
+    url = job.get("link") or next(iter(URL_PATTERN.findall(job.get("prompt") or "")), "")
+    return urlsplit(url).netloc.lower()
+
+
+def load_jobs(path: str) -> List[Dict[str, Any]]:
+    jobs = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                job = json.loads(line)
+                job.setdefault("id", str(number))
+                jobs.append(job)
+    return jobs
+
+
+def finished_ids(path: str) -> Set[str]:
+    """
+    Ids of jobs that already succeeded in an earlier run writing to `path`.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return {record["id"] for record in records if record.get("status") == "ok"}
+
+
+def _percentile(values: List[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def run_batch(
+    jobs_path: str,
+    output_path: str,
+    workers: Optional[int] = None,
+    per_domain: Optional[int] = None,
+    server: Optional[ScrapeServer] = None,
+) -> Dict[str, Any]:
+    """
+    Run every job not yet finished in `output_path`, at most `workers` at a
+    time and at most `per_domain` per host, and append one result record per
+    job to `output_path` as soon as it finishes. Jobs of the same session run
+    in file order, one at a time. Returns the throughput summary.
+    """
+    workers = workers or int(os.getenv("BATCH_WORKERS") or WORKERS)
+    per_domain = per_domain or int(os.getenv("BATCH_PER_DOMAIN") or PER_DOMAIN)
+    server = server or ScrapeServer()
+    done = finished_ids(output_path)
+    jobs = [job for job in load_jobs(jobs_path) if job["id"] not in done]
+    if done:
+        print(f"Skipping {len(done)} jobs already finished in {output_path}")
+
+    worker_slots = asyncio.Semaphore(workers)
+    domain_slots: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_domain))
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    domains: Counter = Counter()
+
+    async def run(job: Dict[str, Any], output) -> None:
+        domain = job_domain(job)
+        record = {"id": job["id"], "domain": domain}
+        # Wait for the domain first, so jobs held back by their domain don't occupy a worker.
+        # Jobs without a host don't browse, so only the worker limit applies to them.
+        async with domain_slots[domain] if domain else nullcontext(), worker_slots:
+            start = time.perf_counter()
+            try:
+                handler = server.chat if job.get("session_id") else server.app
+                record.update(status="ok", **await handler(job))
+            except Exception as e:
+                record.update(status="failed", error=f"{type(e).__name__}: {e}")
+            record["seconds"] = round(time.perf_counter() - start, 3)
+        latencies.append(record["seconds"])
+        statuses[record["status"]] += 1
+        domains[domain] += 1
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+        print(f"Job {job['id']} {record['status']} in {record['seconds']:.1f}s ({sum(statuses.values())}/{len(jobs)})")
+
+    async def run_chain(chain: List[Dict[str, Any]], output) -> None:
+        for job in chain:
+            await run(job, output)
+
+    # Jobs of one session run as a single chain, each taking its slots in turn,
+    # so a later job can't overtake an earlier one held back by its domain
+    chains: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    for job in jobs:
+        chains[("session", job["session_id"]) if job.get("session_id") else ("job", job["id"])].append(job)
+
+    start = time.perf_counter()
+    with open(output_path, "a") as output:
+        await asyncio.gather(*(run_chain(chain, output) for chain in chains.values()))
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "jobs": len(jobs),
+        "ok": statuses["ok"],
+        "failed": statuses["failed"],
+        "seconds": round(elapsed, 3),
+        "jobs_per_minute": round(len(jobs) / elapsed * 60, 2) if elapsed else 0.0,
+        "p50_seconds": round(_percentile(latencies, 50), 3),
+        "p95_seconds": round(_percentile(latencies, 95), 3),
+        "domains": dict(domains),
+    }
+    print(
+        f"Ran {summary['jobs']} jobs in {elapsed:.1f}s ({summary['ok']} ok, {summary['failed']} failed): "
+        f"{summary['jobs_per_minute']} jobs/min, latency p50 {summary['p50_seconds']}s / p95 {summary['p95_seconds']}s"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    from scrape_gpt.browser_pool import run_with_pools
+
+    parser = argparse.ArgumentParser(description="Run scrape jobs from a JSONL file.")
+    parser.add_argument("jobs", type=str, help="JSONL file of jobs")
+    parser.add_argument("--output", type=str, default="results.jsonl", help="JSONL file to append job results to")
+    parser.add_argument("--workers", type=int, default=None, help=f"Concurrent jobs (default {WORKERS})")
+    parser.add_argument("--per-domain", type=int, default=None, help=f"Concurrent jobs per host (default {PER_DOMAIN})")
+    args = parser.parse_args()
+    asyncio.run(run_with_pools(run_batch(args.jobs, args.output, args.workers, args.per_domain)))
@@ -0,0 +1,339 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import psutil
+from browser_use import Browser
+from dotenv import load_dotenv
+
+load_dotenv()
+
+POOL_SIZE = 2
+MAX_USES = 20
+
+
+def _rss_mb(pids: List[int]) -> float:
+    total = 0
+    for pid in pids:
+        try:
+            total += psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+def _origin(url: str) -> Optional[str]:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ("http", "https") and parts.netloc else None
+
+
+class _Pooled:
+    def __init__(self, resource: Any, launch_seconds: float, user_data_dir: Optional[str] = None):
+        self.resource = resource
+        self.launch_seconds = launch_seconds
+        self.user_data_dir = user_data_dir
+        self.uses = 0
+
+
+class _Pool:
+    """
+    Keeps up to `size` launched browsers, leases them one at a time and recycles a
+    browser after `max_uses` leases or once its processes use more than
+    `max_memory_mb`. Subclasses implement launching, resetting and closing.
+    """
+
+    name = "browser"
+
+    def __init__(self, size: int = POOL_SIZE, max_uses: int = MAX_USES, max_memory_mb: Optional[float] = None):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+        self._closed = False
+        self.launch_seconds: List[float] = []
+        self.wait_seconds: List[float] = []
+        self.leases = 0
+        self.recycled = 0
+
+    async def _launch(self) -> _Pooled:
+        raise NotImplementedError
+
+    async def _reset(self, item: _Pooled) -> None:
+        raise NotImplementedError
+
+    async def _close(self, item: _Pooled) -> None:
+        raise NotImplementedError
+
+    async def _memory_mb(self, item: _Pooled) -> Optional[float]:
+        return None
+
+    async def _new(self) -> _Pooled:
+        self._created += 1
+        try:
+            item = await self._launch()
+        except Exception:
+            self._created -= 1
+            raise
+        self.launch_seconds.append(item.launch_seconds)
+        return item
+
+    async def start(self) -> None:
+        """
+        Pre-launch every browser of the pool.
+        """
+        missing = self.size - self._created
+        items = await asyncio.gather(*(self._new() for _ in range(missing)))
+        for item in items:
+            self._idle.put_nowait(item)
+
+    async def warm(self) -> None:
+        """
+        Launch one browser ahead of the next lease, unless one is idle already
+        or the pool is full.
+        """
+        if self._idle.empty() and self._created < self.size:
+            self._idle.put_nowait(await self._new())
+
+    @asynccontextmanager
+    async def _lease(self) -> AsyncIterator[_Pooled]:
+        if self._closed:
+            raise RuntimeError(f"{self.name} pool is closed")
+        start = time.perf_counter()
+        if self._idle.empty() and self._created < self.size:
+            item = await self._new()
+            waited = time.perf_counter() - start - item.launch_seconds
+        else:
+            item = await self._idle.get()
+            waited = time.perf_counter() - start
+        self.wait_seconds.append(max(0.0, waited))
+        self.leases += 1
+        healthy = False
+        try:
+            yield item
+            healthy = True
+        finally:
+            item.uses += 1
+            await self._release(item, healthy)
+
+    async def _release(self, item: _Pooled, healthy: bool) -> None:
+        recycle = not healthy or self._closed or item.uses >= self.max_uses
+        if not recycle and self.max_memory_mb is not None:
+            memory = await self._memory_mb(item)
+            recycle = memory is not None and memory > self.max_memory_mb
+        if not recycle:
+            try:
+                await self._reset(item)
+            except Exception:
+                recycle = True
+        if recycle:
+            self.recycled += 1
+            self._created -= 1
+            await self._close(item)
+        else:
+            self._idle.put_nowait(item)
+
+    async def close(self) -> None:
+        self._closed = True
+        while not self._idle.empty():
+            item = self._idle.get_nowait()
+            self._created -= 1
+            await self._close(item)
+
+    def stats(self) -> Dict[str, Any]:
+        def summary(values: List[float]) -> Dict[str, float]:
+            if not values:
+                return {"count": 0, "mean": 0.0, "max": 0.0}
+            return {"count": len(values), "mean": round(sum(values) / len(values), 3), "max": round(max(values), 3)}
+
+        return {
+            "size": self.size,
+            "leases": self.leases,
+            "recycled": self.recycled,
+            "launch_seconds": summary(self.launch_seconds),
+            "wait_seconds": summary(self.wait_seconds),
+        }
+
+
+class BrowserPool(_Pool):
+    """
+    Pool of browser_use browsers, each with its own profile directory.
+    """
+
+    name = "browser_use"
+
+    async def _launch(self) -> _Pooled:
+        start = time.perf_counter()
+        user_data_dir = tempfile.mkdtemp(prefix="scrape_gpt_browser_")
+        browser = Browser(keep_alive=True, user_data_dir=user_data_dir)
+        await browser.start()
+        return _Pooled(browser, time.perf_counter() - start, user_data_dir)
+
+    async def _reset(self, item: _Pooled) -> None:
+        """
+        Leave one blank tab and wipe the cookies, cache and storage (local
+        storage, IndexedDB, service workers, ...) of every origin left open.
+        """
+        browser = item.resource
+        send = browser.cdp_client.send
+        targets = (await send.Target.getTargets())["targetInfos"]
+        pages = [target for target in targets if target["type"] == "page"]
+        focus = browser.agent_focus.target_id if browser.agent_focus else None
+        keep = next((page for page in pages if page["targetId"] == focus), pages[0] if pages else None)
+        origins = {origin for origin in (_origin(page["url"]) for page in pages) if origin}
+        for page in pages:
+            if page is not keep:
+                await send.Target.closeTarget(params={"targetId": page["targetId"]})
+        if keep is None:
+            keep = await send.Target.createTarget(params={"url": "about:blank"})
+        cdp_session = await browser.get_or_create_cdp_session(target_id=keep["targetId"])
+        history = await cdp_session.cdp_client.send.Page.getNavigationHistory(session_id=cdp_session.session_id)
+        origins.update(origin for origin in (_origin(entry["url"]) for entry in history["entries"]) if origin)
+        for origin in sorted(origins):
+            await send.Storage.clearDataForOrigin(params={"origin": origin, "storageTypes": "all"})
+        await cdp_session.cdp_client.send.Network.clearBrowserCookies(session_id=cdp_session.session_id)
+        await cdp_session.cdp_client.send.Network.clearBrowserCache(session_id=cdp_session.session_id)
+        await cdp_session.cdp_client.send.Page.navigate(params={"url": "about:blank"}, session_id=cdp_session.session_id)
+        await cdp_session.cdp_client.send.Page.resetNavigationHistory(session_id=cdp_session.session_id)
+
+    async def _close(self, item: _Pooled) -> None:
+        try:
+            await item.resource.kill()
+        finally:
+            if item.user_data_dir:
+                shutil.rmtree(item.user_data_dir, ignore_errors=True)
+
+    async def _memory_mb(self, item: _Pooled) -> Optional[float]:
+        try:
+            info = await item.resource.cdp_client.send.SystemInfo.getProcessInfo()
+        except Exception:
+            return None
+        return _rss_mb([process["id"] for process in info["processInfo"]])
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Browser]:
+        async with self._lease() as item:
+            yield item.resource
+
+
+class PlaywrightPool(_Pool):
+    """
+    Pool of Playwright Chromium browsers. Every lease gets a page in a fresh
+    browser context, which is closed again when the lease ends.
+    """
+
+    name = "playwright"
+
+    def __init__(self, *args, headless: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.headless = headless
+        self._playwright = None
+
+    async def _launch(self) -> _Pooled:
+        from playwright.async_api import async_playwright
+
+        start = time.perf_counter()
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=None)
+        return _Pooled(browser, time.perf_counter() - start)
+
+    async def _reset(self, item: _Pooled) -> None:
+        if not item.resource.is_connected():
+            raise RuntimeError("browser disconnected")
+
+    async def _close(self, item: _Pooled) -> None:
+        await item.resource.close()
+
+    async def _memory_mb(self, item: _Pooled) -> Optional[float]:
+        try:
+            cdp = await item.resource.new_browser_cdp_session()
+            info = await cdp.send("SystemInfo.getProcessInfo")
+            await cdp.detach()
+        except Exception:
+            return None
+        return _rss_mb([process["id"] for process in info["processInfo"]])
+
+    @asynccontextmanager
+    async def lease(self):
+        async with self._lease() as item:
+            context = await item.resource.new_context()
+            try:
+                yield await context.new_page()
+            finally:
+                await context.close()
+
+    async def close(self) -> None:
+        await super().close()
+        if self._playwright is not None and self._created == 0:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _Pool]]" = weakref.WeakKeyDictionary()
+
+
+def _pool_config() -> Dict[str, Any]:
+    max_memory_mb = os.getenv("BROWSER_POOL_MAX_MEMORY_MB")
+    return {
+        "size": int(os.getenv("BROWSER_POOL_SIZE", POOL_SIZE)),
+        "max_uses": int(os.getenv("BROWSER_POOL_MAX_USES", MAX_USES)),
+        "max_memory_mb": float(max_memory_mb) if max_memory_mb else None,
+    }
+
+
+def _get_pool(name: str, factory) -> _Pool:
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    if name not in pools:
+        pools[name] = factory(**_pool_config())
+    return pools[name]
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Return the browser_use pool of the running event loop, configured from
+    BROWSER_POOL_SIZE, BROWSER_POOL_MAX_USES and BROWSER_POOL_MAX_MEMORY_MB.
+    """
+    return _get_pool("browser_use", BrowserPool)
+
+
+def get_playwright_pool() -> PlaywrightPool:
+    """
+    Return the Playwright pool of the running event loop, configured like
+    get_browser_pool().
+    """
+    return _get_pool("playwright", PlaywrightPool)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Stats of every pool of the running event loop, by pool name.
+    """
+    return {pool.name: pool.stats() for pool in _pools.get(asyncio.get_running_loop(), {}).values()}
+
+
+async def close_pools() -> None:
+    """
+    Report and close every pool of the running event loop.
+    """
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        print(f"{pool.name} pool: {pool.stats()}")
+        await pool.close()
+
+
+async def run_with_pools(coro):
+    """
+    Await `coro` and close the pools afterwards, for one-shot CLI runs.
+    """
+    try:
+        return await coro
+    finally:
+        await close_pools()
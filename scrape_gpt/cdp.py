@@ -0,0 +1,64 @@
+import asyncio
+
+from browser_use import BrowserSession
+
+from scrape_gpt.tracing import span, traced
+
+
+@traced("browser", "DOM.getOuterHTML")
+async def get_page_html(browser_session: BrowserSession) -> str:
+    """
+    Return the outer HTML of the current page document.
+    """
+    cdp_session = await browser_session.get_or_create_cdp_session()
+    try:
+        body_id = await cdp_session.cdp_client.send.DOM.getDocument(
+            session_id=cdp_session.session_id
+        )
+        page_html_result = await cdp_session.cdp_client.send.DOM.getOuterHTML(
+            params={"backendNodeId": body_id["root"]["backendNodeId"]},
+            session_id=cdp_session.session_id,
+        )
+        page_html = page_html_result["outerHTML"]
+        _ = await browser_session.get_current_page_url()
+    except Exception as e:
+        raise RuntimeError(f"Couldn't extract page content: {e}")
+    return page_html
+
+
+async def evaluate(browser_session: BrowserSession, expression: str):
+    """
+    Evaluate a JavaScript expression in the current page and return its value.
+    """
+    cdp_session = await browser_session.get_or_create_cdp_session()
+    with span("Runtime.evaluate", "browser", chars=len(expression)):
+        result = await cdp_session.cdp_client.send.Runtime.evaluate(
+            params={"expression": expression, "returnByValue": True, "awaitPromise": True},
+            session_id=cdp_session.session_id,
+        )
+    if "exceptionDetails" in result:
+        raise RuntimeError(f"Couldn't evaluate script: {result['exceptionDetails'].get('text')}")
+    return result["result"].get("value")
+
+
+@traced("browser", "navigate")
+async def navigate(browser_session: BrowserSession, url: str, timeout: float = 30):
+    """
+    Navigate the current page to `url` and wait until the document has loaded.
+    """
+    cdp_session = await browser_session.get_or_create_cdp_session()
+    # Flag the old document so it isn't mistaken for the loaded one
+    await evaluate(browser_session, "window.__scrapeGptStale = true")
+    await cdp_session.cdp_client.send.Page.navigate(
+        params={"url": url}, session_id=cdp_session.session_id
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        try:
+            if await evaluate(browser_session, 'document.readyState === "complete" && !window.__scrapeGptStale'):
+                return
+        except RuntimeError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"Timed out loading {url}")
@@ -3,82 +3,134 @@ import asyncio
 import glob
 import json
 import os
+from functools import lru_cache
+from pathlib import Path
 
-import nest_asyncio
-import pandas as pd
-from browser_use import Agent, ChatOpenAI
 from dotenv import load_dotenv
-from langchain.agents.agent_types import AgentType
-from langchain_core.utils.json import parse_json_markdown
-from langchain_experimental.agents.agent_toolkits import \
-    create_pandas_dataframe_agent
-from langchain_openai import ChatOpenAI as LangChainChatOpenAI
 
-from scrape_gpt.tools.create import create_tools
+# Everything heavier (pandas, browser_use, scrapegraphai, LangChain agents) is
+# imported by the code path that needs it, so --help and follow-up prompts
+# don't pay for the browse path and vice versa.
 
 load_dotenv()
-nest_asyncio.apply()
 
-with open("scrape_gpt/prompt/system.md", "r") as f:
-    system_prompt = f.read()
+SYSTEM_PROMPT_PATH = Path(__file__).resolve().parent / "prompt" / "system.md"
 
 
-async def main(session_id: str, prompt: str, link: str = None):
-    chat_history_path = f"./.session_data/{session_id}/chat_history.json"
-    if os.path.exists(chat_history_path):
-        with open(chat_history_path, "r") as f:
-            chat_history = json.load(f)
-    else:
-        chat_history = []
+@lru_cache(maxsize=None)
+def system_prompt() -> str:
+    return SYSTEM_PROMPT_PATH.read_text()
+
+
+async def main(session_id: str, prompt: str, link: str = None, mode: str = "plan"):
+    from scrape_gpt.tracing import start_trace
+
+    with start_trace(session_id, "chat.main", prompt=prompt, link=link or None, mode=mode):
+        return await _answer(session_id, prompt, link, mode)
+
+
+async def _answer(session_id: str, prompt: str, link: str = None, mode: str = "plan"):
+    from scrape_gpt.history import ChatHistory
+
+    chat_history = ChatHistory.open(session_id)
 
     if link: # TODO: create route to BrowseAgent or DataFrameAgent
+        import pandas as pd
+        from browser_use import Agent, ChatOpenAI
+
+        from scrape_gpt.browser_pool import get_browser_pool
+        from scrape_gpt.llm import get_model
+        from scrape_gpt.session_store import SessionStore
+        from scrape_gpt.tools.create import create_tools
+        from scrape_gpt.tools.runtime import print_tool_stats
+        from scrape_gpt.tracing import agent_step_hooks, trace_llm
+
         tools = create_tools()
-        agent = Agent(
-            task=f"""
+        store = SessionStore.open(session_id)
+        known_tables = set(store.tables())
+        async with get_browser_pool().lease() as browser:
+            agent = Agent(
+                task=f"""
             Go to {link} {prompt}
             
             If you have difficulty clicking a link, use extract_links_from_dom tool to get all links on the page and then pick the relevant one to use in go_to_url tool.
             Always save requested information using write_to_file or extract_current_page_info tool.
             Use export_dataframe once as last step to export previous extracted_content_[number].md to a pandas dataframe
             """,
-            llm=ChatOpenAI(model="gpt-4.1"),
-            save_conversation_path=f"./.session_data/{session_id}/conversation",
-            file_system_path=f"./.session_data/{session_id}/files",
-            override_system_message=system_prompt,
-            tools=tools,
-        )
-        history = await agent.run()
-
-        chat_history.append({"role": "user", "text": prompt, "link": link})
-        csv_path = list(agent.file_system.files)[-1]
-        results = pd.read_csv(agent.file_system.data_dir / csv_path).to_dict(orient='records')
-        chat_history.append({"role": "assistant", "text": history.final_result(), "results": results})
-        with open(chat_history_path, "w") as f:
-            json.dump(chat_history, f, indent=4)
+                llm=trace_llm(get_model("browse_llm", lambda: ChatOpenAI(model="gpt-4.1"))),
+                browser_session=browser,
+                save_conversation_path=f"./.session_data/{session_id}/conversation",
+                file_system_path=f"./.session_data/{session_id}/files",
+                override_system_message=system_prompt(),
+                tools=tools,
+            )
+            history = await agent.run(**agent_step_hooks())
+        print_tool_stats()
+
+        chat_history.append("user", prompt, link=link)
+        # export_dataframe already stored its rows as a session table; log a reference to it
+        exported = [t for t in store.tables() if t not in known_tables]
+        table = max(exported, key=lambda t: (len(t), t)) if exported else None
+        if table is not None:
+            results = json.loads(store.load(table).to_json(orient="records"))
+        else:
+            csv_path = list(agent.file_system.files)[-1]
+            results = pd.read_csv(agent.file_system.data_dir / csv_path).to_dict(orient='records')
+        chat_history.append("assistant", history.final_result(), results, table=table)
 
         return history.final_result(), results
     else:
-        dframe_paths = glob.glob(f"./.session_data/{session_id}/*.csv")
-        dframes = []
-        for path in dframe_paths:
-            dframes.append(pd.read_csv(path))
-        agent = create_pandas_dataframe_agent(
-            LangChainChatOpenAI(temperature=0, model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY")),
-            dframes,
-            verbose=True,
-            agent_type=AgentType.OPENAI_FUNCTIONS,
-            allow_dangerous_code=True,
-        )
-        agent_result = agent.invoke(prompt + "\nReturn in json format")
-        results = parse_json_markdown(agent_result["output"])
-
-        chat_history.append({"role": "user", "text": prompt})
-        chat_history.append({"role": "assistant", "text": agent_result["output"], "results": results})
-
-        with open(chat_history_path, "w") as f:
-            json.dump(chat_history, f, indent=4)
-        
-        return agent_result["output"], results
+        from scrape_gpt.query_plan import run_query_plan
+        from scrape_gpt.session_store import SessionStore
+        from scrape_gpt.tracing import span
+
+        output, results = None, None
+        if mode == "plan":
+            try:
+                with span("query_plan", "tool"):
+                    plan, result = await run_query_plan(SessionStore.open(session_id), prompt)
+                output = f"{len(result)} rows for {plan.model_dump_json(exclude_defaults=True)}"
+                results = json.loads(result.to_json(orient="records"))
+            except Exception as e:
+                print(f"Query plan failed, falling back to the dataframe agent: {e}")
+        if output is None:
+            output, results = await dataframe_agent_answer(session_id, prompt)
+
+        chat_history.append("user", prompt)
+        chat_history.append("assistant", output, results)
+
+        return output, results
+
+
+async def dataframe_agent_answer(session_id: str, prompt: str):
+    import pandas as pd
+    from langchain.agents.agent_types import AgentType
+    from langchain_core.utils.json import parse_json_markdown
+    from langchain_experimental.agents.agent_toolkits import \
+        create_pandas_dataframe_agent
+    from langchain_openai import ChatOpenAI as LangChainChatOpenAI
+
+    from scrape_gpt.llm import get_model
+    from scrape_gpt.session_store import SessionStore
+    from scrape_gpt.tools.runtime import run_blocking
+
+    dframes = list(SessionStore.open(session_id).load_all().values())
+    # Sessions exported before the session store only have CSV files
+    for path in glob.glob(f"./.session_data/{session_id}/*.csv"):
+        dframes.append(pd.read_csv(path))
+    llm = get_model(
+        "dataframe_llm",
+        lambda: LangChainChatOpenAI(temperature=0, model="gpt-4.1", api_key=os.getenv("OPENAI_API_KEY")),
+    )
+    agent = create_pandas_dataframe_agent(
+        llm,
+        dframes,
+        verbose=True,
+        agent_type=AgentType.OPENAI_FUNCTIONS,
+        allow_dangerous_code=True,
+    )
+    agent_result = await run_blocking("dataframe_agent", agent.invoke, prompt + "\nReturn in json format")
+    return agent_result["output"], parse_json_markdown(agent_result["output"])
 
 
 def example():
@@ -135,8 +187,17 @@ if __name__ == "__main__":
         required=True,
         help="Specify description to run",
     )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["plan", "agent"],
+        default="plan",
+        help="Answer follow-up prompts with a structured query plan or the pandas dataframe agent",
+    )
     args = parser.parse_args()
-    text, results = asyncio.run(main(args.session_id, args.prompt, args.link))
+    from scrape_gpt.browser_pool import run_with_pools
+
+    text, results = asyncio.run(run_with_pools(main(args.session_id, args.prompt, args.link, args.mode)))
     
     print("TEXT: ", text)
     print("RESULTS: ", results)
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel, Field, create_model
+
+from scrape_gpt.parse_rows import RowParseError, header_fields, try_parse_row
+from scrape_gpt.prune import prune_html
+
+BATCH_SIZE = 20
+CONCURRENCY = 4
+
+ROW_PROMPT = "extract the data from this html table row {extra_prompt} and convert to json:\n\n{row}"
+BATCH_PROMPT = """extract the data from each of these {count} html table rows {extra_prompt} and convert to json.
+Return exactly one item per row, in the same order as the rows are given.
+
+{rows}"""
+
+
+def batch_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    Wrap a row model in a model holding a list of rows, for one call per batch.
+    """
+    return create_model(
+        f"{model.__name__}Batch",
+        rows=(List[model], Field(description="One item per html table row, in input order")),
+    )
+
+
+async def iter_extract_rows(
+    llm,
+    rows: Iterable[str],
+    model: Type[BaseModel],
+    extra_prompt: str = "",
+    batch_size: int = BATCH_SIZE,
+    concurrency: int = CONCURRENCY,
+    parse: bool = True,
+    headers: Optional[List[str]] = None,
+) -> AsyncIterator[BaseModel]:
+    """
+    Convert html table rows to `model` objects, yielding each one in the order of
+    `rows` as soon as it is available. `rows` is consumed lazily: each row is
+    first parsed locally (see parse_rows), by the result table's `headers` when
+    given; only rows that fail go to the LLM,
+    packing `batch_size` rows into each structured call, with at most
+    `concurrency` batches in flight at once. A batch that comes back with the
+    wrong number of items is retried row by row.
+    """
+    row_llm = llm.with_structured_output(model)
+    batch_llm = llm.with_structured_output(batch_model(model)) if batch_size > 1 else None
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def extract_row(row: str) -> BaseModel:
+        async with semaphore:
+            return await row_llm.ainvoke(ROW_PROMPT.format(extra_prompt=extra_prompt, row=row))
+
+    async def extract_batch(batch: List[str]) -> List[BaseModel]:
+        if batch_llm is None or len(batch) == 1:
+            return [await extract_row(batch[0])]
+        rows_text = "\n\n".join(f"Row {i + 1}:\n{row}" for i, row in enumerate(batch))
+        async with semaphore:
+            response = await batch_llm.ainvoke(
+                BATCH_PROMPT.format(count=len(batch), extra_prompt=extra_prompt, rows=rows_text)
+            )
+        if len(response.rows) == len(batch):
+            return response.rows
+        return list(await asyncio.gather(*(extract_row(row) for row in batch)))
+
+    start = time.perf_counter()
+    size = max(1, batch_size)
+    window = max(1, concurrency)
+    # Rows in input order: [result, batch task, position in batch]
+    entries: Deque[list] = deque()
+    batch: List[str] = []
+    batch_entries: List[list] = []
+    remaining: Dict[asyncio.Task, int] = {}
+    count = via_llm = tokens_in = tokens_out = 0
+
+    def launch() -> None:
+        task = asyncio.create_task(extract_batch(list(batch)))
+        remaining[task] = len(batch)
+        for entry in batch_entries:
+            entry[1] = task
+        batch.clear()
+        batch_entries.clear()
+
+    async def pop() -> BaseModel:
+        result, task, position = entries.popleft()
+        if task is None:
+            return result
+        result = (await task)[position]
+        remaining[task] -= 1
+        if not remaining[task]:
+            del remaining[task]
+        return result
+
+    def ready() -> bool:
+        result, task, _ = entries[0]
+        return task is None and result is not None or task is not None and task.done()
+
+    fields = None
+    if parse and headers is not None:
+        try:
+            fields = header_fields(headers, model)
+        except RowParseError as e:
+            print(f"Result table doesn't match {model.__name__} ({e}), extracting every row via LLM")
+            parse = False
+
+    try:
+        for row in rows:
+            count += 1
+            result = try_parse_row(row, model, fields) if parse else None
+            if result is not None:
+                entries.append([result, None, 0])
+            else:
+                pruned = prune_html(row)
+                via_llm += 1
+                tokens_in += pruned.input_tokens
+                tokens_out += pruned.output_tokens
+                entry = [None, None, len(batch)]
+                batch.append(pruned.text)
+                batch_entries.append(entry)
+                entries.append(entry)
+                if len(batch) == size:
+                    # Keep at most `concurrency` batches in flight ahead of the caller
+                    while len(remaining) >= window:
+                        yield await pop()
+                    launch()
+            while entries and ready():
+                yield await pop()
+        if batch:
+            while len(remaining) >= window:
+                yield await pop()
+            launch()
+        while entries:
+            yield await pop()
+    finally:
+        for task in remaining:
+            task.cancel()
+
+    elapsed = time.perf_counter() - start
+    if count:
+        print(
+            f"Extracted {count} rows ({count - via_llm} parsed, {via_llm} via LLM) "
+            f"in {elapsed:.2f}s ({count / elapsed:.2f} rows/sec, batch_size={size}, concurrency={concurrency})"
+        )
+    if via_llm:
+        print(f"Pruned LLM rows: ~{tokens_in} -> ~{tokens_out} tokens")
+
+
+async def extract_rows(
+    llm,
+    rows: Iterable[str],
+    model: Type[BaseModel],
+    extra_prompt: str = "",
+    batch_size: int = BATCH_SIZE,
+    concurrency: int = CONCURRENCY,
+    parse: bool = True,
+    headers: Optional[List[str]] = None,
+) -> List[BaseModel]:
+    """
+    Like iter_extract_rows, but return all rows at once.
+    """
+    return [
+        row
+        async for row in iter_extract_rows(
+            llm, rows, model, extra_prompt, batch_size=batch_size, concurrency=concurrency, parse=parse, headers=headers
+        )
+    ]
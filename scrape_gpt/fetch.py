@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from scrape_gpt.http_client import get_http_client
+
+load_dotenv()
+
+HTTP_CACHE_DIR = Path("./.session_data/http_cache")
+PER_HOST_CONCURRENCY = 4
+POLITENESS_DELAY = 0.25
+
+
+class FetchedPage(BaseModel):
+    url: str
+    status: int = 0
+    text: str = ""
+    cached: bool = False
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class HttpCache:
+    """
+    Disk cache of response bodies keyed by URL, revalidated with the stored
+    ETag / Last-Modified validators instead of downloading the page again.
+    """
+
+    def __init__(self, path: Path = HTTP_CACHE_DIR):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, url: str) -> Path:
+        return self.path / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            return json.loads(self._file(url).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def validators(self, entry: Optional[dict]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url: str, response: httpx.Response) -> None:
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if not (etag or last_modified):
+            return
+        entry = {"url": url, "etag": etag, "last_modified": last_modified, "text": response.text}
+        tmp = self._file(url).with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry))
+        tmp.replace(self._file(url))
+
+    def clear(self) -> int:
+        files = list(self.path.glob("*.json"))
+        for file in files:
+            file.unlink()
+        return len(files)
+
+
+_http_cache: Optional[HttpCache] = None
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """
+    Return the shared HTTP cache, or None when disabled with HTTP_CACHE=0.
+    """
+    global _http_cache
+    if os.getenv("HTTP_CACHE", "1") == "0":
+        return None
+    if _http_cache is None:
+        _http_cache = HttpCache(Path(os.getenv("HTTP_CACHE_DIR") or HTTP_CACHE_DIR))
+    return _http_cache
+
+
+class _Host:
+    """
+    Concurrency limit and politeness delay between request starts for one host.
+    """
+
+    def __init__(self, concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait_turn(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def fetch_page(
+    url: str,
+    host: Optional[_Host] = None,
+    cache: Optional[HttpCache] = None,
+) -> FetchedPage:
+    """
+    GET `url` on the pooled HTTP client, honouring the host's limits and
+    revalidating a cached copy when there is one. Errors are returned on the
+    page instead of raised so one bad link doesn't stop the others.
+    """
+    start = time.perf_counter()
+    entry = cache.get(url) if cache else None
+    headers = cache.validators(entry) if cache else {}
+    try:
+        if host is None:
+            response = await get_http_client().get(url, headers=headers)
+        else:
+            async with host.semaphore:
+                await host.wait_turn()
+                response = await get_http_client().get(url, headers=headers)
+        if response.status_code == 304 and entry:
+            return FetchedPage(url=url, status=200, text=entry["text"], cached=True, seconds=time.perf_counter() - start)
+        response.raise_for_status()
+        if cache:
+            cache.put(url, response)
+        return FetchedPage(url=url, status=response.status_code, text=response.text, seconds=time.perf_counter() - start)
+    except httpx.HTTPError as e:
+        status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 0
+        return FetchedPage(url=url, status=status, error=str(e) or type(e).__name__, seconds=time.perf_counter() - start)
+
+
+async def iter_fetch(
+    urls: List[str],
+    per_host: Optional[int] = None,
+    delay: Optional[float] = None,
+    cache: Optional[HttpCache] = None,
+) -> AsyncIterator[FetchedPage]:
+    """
+    Fetch `urls` concurrently, at most `per_host` at a time per host with `delay`
+    seconds between request starts, and yield each page as soon as it arrives.
+    Duplicate URLs are fetched once. Uses the shared HTTP cache unless another
+    `cache` is given.
+    """
+    per_host = per_host or int(os.getenv("FETCH_PER_HOST") or PER_HOST_CONCURRENCY)
+    delay = float(os.getenv("FETCH_DELAY") or POLITENESS_DELAY) if delay is None else delay
+    cache = cache or get_http_cache()
+    hosts: Dict[str, _Host] = {}
+    tasks = []
+    for url in dict.fromkeys(urls):
+        host = hosts.setdefault(urlsplit(url).netloc.lower(), _Host(per_host, delay))
+        tasks.append(asyncio.create_task(fetch_page(url, host, cache)))
+
+    start = time.perf_counter()
+    pages = cached = failed = 0
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            page = await next_page
+            pages += 1
+            cached += page.cached
+            failed += page.error is not None
+            yield page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    print(
+        f"Fetched {pages} pages from {len(hosts)} hosts in {time.perf_counter() - start:.1f}s "
+        f"({cached} not modified, {failed} failed)"
+    )
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from scrape_gpt.session_store import SESSION_DIR, TABLES, SessionStore
+
+RESULTS = "results"
+SEGMENT_BYTES = 1 << 20
+TAIL_BLOCK = 1 << 16
+SCALARS = (str, int, float, bool)
+
+
+def _results_frame(results: Any) -> Optional[pd.DataFrame]:
+    """
+    A table for `results` when it is a non-empty list of flat rows sharing the
+    same keys, so it reads back unchanged; None for every other shape.
+    """
+    if not isinstance(results, list) or not results or not all(isinstance(row, dict) for row in results):
+        return None
+    keys = list(results[0])
+    if any(list(row) != keys for row in results):
+        return None
+    if any(value is not None and not isinstance(value, SCALARS) for row in results for value in row.values()):
+        return None
+    return pd.DataFrame(results, columns=keys)
+
+
+def _tail_lines(path: Path, count: int) -> List[str]:
+    """
+    Read the last `count` lines of a file, reading backwards block by block.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(TAIL_BLOCK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    return [line for line in data.decode().splitlines() if line.strip()][-count:]
+
+
+class ChatHistory:
+    """
+    Append-only chat log of a session in `chat_history.jsonl`. Result tables are
+    kept in the session store and referenced from the log, and the log is rolled
+    into numbered segments once it grows past `segment_bytes`, so a turn costs
+    the same however long the session is.
+    """
+
+    def __init__(self, session_dir: Path, segment_bytes: int = SEGMENT_BYTES):
+        self.dir = Path(session_dir)
+        self.path = self.dir / "chat_history.jsonl"
+        self.store = SessionStore(self.dir)
+        self.segment_bytes = segment_bytes
+        self._migrate()
+
+    @classmethod
+    def open(cls, session_id: str) -> "ChatHistory":
+        return cls(SESSION_DIR / session_id)
+
+    def append(
+        self, role: str, text: str, results: Any = None, table: Optional[str] = None, **fields
+    ) -> Dict[str, Any]:
+        """
+        Log one message. Tabular `results` (a list of rows with the same keys) are
+        appended to the session store and logged by reference; anything else is
+        logged inline. When `results` already are the session table `table`,
+        only the reference is logged.
+        """
+        record = {"role": role, "text": text, "time": time.time(), **fields}
+        frame = _results_frame(results) if table is None else None
+        if table is not None:
+            record["results_ref"] = {"table": table, "namespace": TABLES, "rows": len(results or [])}
+        elif frame is not None:
+            table = f"turn_{time.time_ns()}"
+            self.store.append(table, frame, namespace=RESULTS)
+            record["results_ref"] = {"table": table, "rows": len(frame)}
+        elif results is not None:
+            record["results"] = results
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+        if self.path.stat().st_size > self.segment_bytes:
+            self.rotate()
+        return record
+
+    def segments(self) -> List[Path]:
+        return sorted(self.dir.glob("chat_history.*.jsonl"))
+
+    def rotate(self) -> Optional[Path]:
+        """
+        Move the active log into the next numbered segment. Segments are kept
+        as they are; recent() only reads as far back as it needs.
+        """
+        if not self.path.exists() or not self.path.stat().st_size:
+            return None
+        segment = self.dir / f"chat_history.{len(self.segments()):05d}.jsonl"
+        os.replace(self.path, segment)
+        return segment
+
+    def recent(self, count: int = 20) -> List[Dict[str, Any]]:
+        """
+        The last `count` messages, read from the end of the log.
+        """
+        lines: List[str] = []
+        for path in [self.path, *reversed(self.segments())]:
+            if len(lines) >= count:
+                break
+            if path.exists():
+                lines = _tail_lines(path, count - len(lines)) + lines
+        return [json.loads(line) for line in lines]
+
+    def results(self, record: Dict[str, Any], columns: Optional[List[str]] = None) -> Any:
+        """
+        The results of a logged message, loaded from the store when referenced.
+        """
+        ref = record.get("results_ref")
+        if ref is None:
+            return record.get("results")
+        df = self.store.load(ref["table"], columns=columns, namespace=ref.get("namespace", RESULTS))
+        return json.loads(df.to_json(orient="records"))
+
+    def _migrate(self) -> None:
+        legacy = self.dir / "chat_history.json"
+        if not legacy.exists() or self.path.exists() or self.segments():
+            return
+        with open(legacy) as f:
+            messages = json.load(f)
+        for message in messages:
+            message = dict(message)
+            self.append(message.pop("role"), message.pop("text", ""), message.pop("results", None), **message)
+        os.replace(legacy, legacy.with_suffix(".json.migrated"))
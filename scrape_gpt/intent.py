@@ -0,0 +1,103 @@
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from scrape_gpt.llm import create_chat, load_model
+from scrape_gpt.models import Search
+
+CONFIDENCE_THRESHOLD = 0.75
+# Labelled prompts ({"prompt": ..., "label": "ranch" | "epd" | "animal" | "none"}) for tests and benchmarks
+CORPUS = Path(__file__).resolve().parent / "intent_corpus.jsonl"
+
+# (pattern, weight) per search; explicit "<kind> search" phrases outweigh field names
+INTENT_PATTERNS: Dict[str, List[Tuple[str, float]]] = {
+    "search_ranch": [
+        (r"\branch(es)?\s+search\b|\bsearch\s+(for\s+)?ranch(es)?\b", 4.0),
+        (r"\branch(es)?\b", 2.0),
+        (r"\bherd\s+prefix\b|\bprefix\b", 1.5),
+        (r"\bmember\s*(id|name|#)?\b", 1.0),
+        (r"\bdba\b|\bbreeders?\b|\bcity\b|\bstate\b|\bprovince\b", 0.5),
+    ],
+    "search_epd": [
+        (r"\bepds?\s+search\b|\bsearch\s+(for\s+)?epds?\b", 4.0),
+        (r"\bepds?\b|\bexpected progeny differences?\b", 2.0),
+        (r"\bce\s+direct\b|\bcalving\s+ease\b|\bce\s+maternal\b", 1.5),
+        (r"\b(birth|weaning|yearling)\s+weight\b|\bmilk\b|\bmarbling\b|\bribeye\b|\bfat\b|\bstayability\b", 1.0),
+        (r"\bmin\b|\bmax\b|\bsort\s+by\b", 0.5),
+    ],
+    "search_animal": [
+        (r"\banimals?\s+search\b|\bsearch\s+(for\s+)?animals?\b", 4.0),
+        (r"\btattoo\b", 2.0),
+        (r"\bregistration\s*(#|number|no\.?)?\b|\beid\b", 1.5),
+        (r"\banimals?\b", 1.0),
+        (r"\bbulls?\b|\bfemales?\b|\bcows?\b|\bheifers?\b|\bstart(s)?\s+with\b", 0.5),
+    ],
+}
+
+_COMPILED = {
+    intent: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns]
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+
+
+def label_of(search: Search) -> str:
+    """
+    The corpus label of a search: the kind it selects, or "none".
+    """
+    return next((name.removeprefix("search_") for name, value in search.model_dump().items() if value), "none")
+
+
+def load_corpus(path=CORPUS) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Intent(BaseModel):
+    search: Search
+    confidence: float
+    scores: Dict[str, float]
+
+
+def classify(task: str) -> Intent:
+    """
+    Score each search kind by weighted keyword matches and pick the best one.
+    Confidence is the winner's share of the total score, damped for prompts
+    with little evidence; a prompt without any domain keyword gets 0.
+    """
+    scores = {
+        intent: sum(weight for pattern, weight in patterns if pattern.search(task))
+        for intent, patterns in _COMPILED.items()
+    }
+    total = sum(scores.values())
+    if not total:
+        return Intent(search=Search(), confidence=0.0, scores=scores)
+    best = max(scores, key=scores.get)
+    evidence = min(1.0, scores[best] / 4.0)
+    return Intent(
+        search=Search(**{best: True}),
+        confidence=round(scores[best] / total * evidence, 3),
+        scores=scores,
+    )
+
+
+async def classify_search(task: str, threshold: float = CONFIDENCE_THRESHOLD, llm=None) -> Search:
+    """
+    Classify a task locally, asking the LLM only when the local confidence is
+    below `threshold`.
+    """
+    start = time.perf_counter()
+    intent = classify(task)
+    if intent.confidence >= threshold:
+        print(f"Intent {intent.search} ({intent.confidence:.2f}) in {(time.perf_counter() - start) * 1e6:.0f}µs")
+        return intent.search
+    llm = llm or await load_model("chat", create_chat)
+    search = await llm.with_structured_output(Search).ainvoke(task)
+    print(
+        f"Intent {search} from LLM (local confidence {intent.confidence:.2f}) "
+        f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+    return search
@@ -0,0 +1,63 @@
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+
+# Collect every anchor with its visible text and the absolute URL resolved by the browser
+LINKS_JS = """
+(() => [...document.querySelectorAll("a[href], area[href]")].map((a) => ({
+    url: a.href,
+    text: (a.innerText || a.getAttribute("aria-label") || a.title || "")
+        .replace(/\\s+/g, " ").trim().slice(0, 200),
+})))()
+"""
+
+WORDS = re.compile(r"[a-z0-9]+")
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Return the URL without fragment, with lowercase scheme/host and no default
+    port, or None for non-http(s) links (javascript:, mailto:, tel:...).
+    """
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if parts.port and not (parts.scheme == "http" and parts.port == 80 or parts.scheme == "https" and parts.port == 443):
+        netloc += f":{parts.port}"
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or "/", parts.query, ""))
+
+
+def dedupe_links(links: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Normalize and deduplicate links in page order, joining the distinct texts of
+    links that point to the same URL.
+    """
+    merged: Dict[str, Dict[str, str]] = {}
+    for link in links:
+        url = normalize_url(link.get("url") or "")
+        if url is None:
+            continue
+        text = link.get("text") or ""
+        if url not in merged:
+            merged[url] = {"text": text, "url": url}
+        elif text and text not in merged[url]["text"]:
+            merged[url]["text"] = f"{merged[url]['text']} | {text}" if merged[url]["text"] else text
+    return list(merged.values())
+
+
+def rank_links(links: List[Dict[str, str]], query: str) -> List[Dict[str, str]]:
+    """
+    Order links by word overlap between `query` and each link's text and URL,
+    keeping page order among equally relevant links.
+    """
+    terms = set(WORDS.findall(query.lower()))
+    if not terms:
+        return links
+
+    def score(link: Dict[str, str]) -> float:
+        words = set(WORDS.findall(f"{link['text']} {link['url']}".lower()))
+        return len(terms & words) / len(terms)
+
+    return sorted(links, key=score, reverse=True)
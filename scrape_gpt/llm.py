@@ -0,0 +1,73 @@
+import asyncio
+import os
+import weakref
+from typing import Any, Callable, Dict, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# The provider SDKs (and LangChain's cache, via langsmith) take seconds to
+# import, so they are imported on first use
+
+_models: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def create_chat():
+    from scrape_gpt.llm_cache import get_llm_cache
+
+    open_ai_key = os.getenv("OPENAI_API_KEY")
+    if open_ai_key:
+        from langchain_openai import ChatOpenAI as LangchainChatOpenAI
+
+        return LangchainChatOpenAI(model="gpt-4.1-mini", cache=get_llm_cache())
+    else:
+        from langchain_google_genai import ChatGoogleGenerativeAI as LangchainChatGoogle
+
+        return LangchainChatGoogle(model="gemini-2.5-flash", cache=get_llm_cache())
+
+
+def create_llm():
+    open_ai_key = os.getenv("OPENAI_API_KEY")
+    if open_ai_key:
+        from browser_use import ChatOpenAI
+
+        return ChatOpenAI(model="gpt-4.1-mini")
+    else:
+        from browser_use import ChatGoogle
+
+        return ChatGoogle(model="gemini-2.5-flash")
+
+
+def get_model(name: str, factory: Callable[[], T]) -> T:
+    """
+    Return the model client `name` shared by everything running on the current
+    event loop, building it with `factory` the first time, so a long-running
+    process keeps its clients (and their connection pools) warm.
+    """
+    models = _models.setdefault(asyncio.get_running_loop(), {})
+    if name not in models:
+        models[name] = factory()
+    return models[name]
+
+
+async def load_model(name: str, factory: Callable[[], T]) -> T:
+    """
+    Like get_model, but build the client on a worker thread so the first call
+    doesn't block the event loop.
+    """
+    models = _models.setdefault(asyncio.get_running_loop(), {})
+    if name not in models:
+        model = await asyncio.to_thread(factory)
+        models.setdefault(name, model)
+    return models[name]
+
+
+def get_chat():
+    return get_model("chat", create_chat)
+
+
+def get_llm():
+    return get_model("llm", create_llm)
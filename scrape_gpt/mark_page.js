@@ -1,4 +1,10 @@
-const customCSS = `
+(() => {
+  // Safe to evaluate on every step: installs the style and functions once per document
+  if (window.markPage && window.unmarkPage && window.markedSelector) {
+    return;
+  }
+
+  const customCSS = `
 ::-webkit-scrollbar {
     width: 10px;
 }
@@ -14,144 +20,319 @@ const customCSS = `
 }
 `;
 
-const styleTag = document.createElement("style");
-styleTag.textContent = customCSS;
-document.head.append(styleTag);
+  const styleTag = document.createElement("style");
+  styleTag.textContent = customCSS;
+  document.head.append(styleTag);
 
-let labels = [];
+  // Elements that can be interacted with, instead of every element on the page
+  const CANDIDATES = [
+    "a",
+    "button",
+    "input",
+    "textarea",
+    "select",
+    "iframe",
+    "video",
+    "summary",
+    "[onclick]",
+    "[role=button]",
+    "[role=link]",
+    "[role=checkbox]",
+    "[role=radio]",
+    "[role=tab]",
+    "[role=menuitem]",
+    "[role=option]",
+    "[contenteditable=true]",
+    "[contenteditable='']",
+  ];
+  // Inline or inherited pointer cursors and click handlers set as JS properties
+  // can't be queried by selector: they are checked on these elements, the
+  // children of found candidates and the elements under a grid of screen points
+  const CHECKED = ["[style*=cursor]", "[tabindex]"];
+  const GRID_STEP = 40;
+  const MAX_CHECKED = 3000;
+  const MAX_TEXT = 200;
+  const MAX_POINTER_SELECTORS = 300;
+  const MIN_AREA = 20;
 
-function unmarkPage() {
-// Unmark page logic
-for (const label of labels) {
-document.body.removeChild(label);
-}
-labels = [];
-}
+  let overlay = null;
+  // Element of each box returned by the last markPage(), by box index
+  let marked = [];
+  let pointerSelectors = null;
+  let sheetCount = -1;
 
-function markPage() {
-unmarkPage();
-
-var bodyRect = document.body.getBoundingClientRect();
-
-var items = Array.prototype.slice
-.call(document.querySelectorAll("*"))
-.map(function (element) {
-var vw = Math.max(
-    document.documentElement.clientWidth || 0,
-    window.innerWidth || 0
-);
-var vh = Math.max(
-    document.documentElement.clientHeight || 0,
-    window.innerHeight || 0
-);
-var textualContent = element.textContent.trim().replace(/\s{2,}/g, " ");
-var elementType = element.tagName.toLowerCase();
-var ariaLabel = element.getAttribute("aria-label") || "";
-
-var rects = [...element.getClientRects()]
-    .filter((bb) => {
-    var center_x = bb.left + bb.width / 2;
-    var center_y = bb.top + bb.height / 2;
-    var elAtCenter = document.elementFromPoint(center_x, center_y);
-
-    return elAtCenter === element || element.contains(elAtCenter);
-    })
-    .map((bb) => {
-    const rect = {
-        left: Math.max(0, bb.left),
-        top: Math.max(0, bb.top),
-        right: Math.min(vw, bb.right),
-        bottom: Math.min(vh, bb.bottom),
+  // Selectors of stylesheet rules that set `cursor: pointer`, so elements made
+  // clickable with CSS are found without computing the style of every element
+  function cursorPointerSelectors() {
+    const selectors = [];
+    const visit = (rules) => {
+      for (const rule of rules) {
+        if (selectors.length >= MAX_POINTER_SELECTORS) return;
+        if (rule.cssRules) {
+          visit(rule.cssRules);
+        } else if (rule.style && rule.style.cursor === "pointer" && rule.selectorText) {
+          for (const selector of rule.selectorText.split(",")) {
+            // Pseudo-classes like :hover only apply while interacting
+            const base = selector.replace(/::?[\w-]+(\([^)]*\))?/g, "").trim();
+            if (base) selectors.push(base);
+          }
+        }
+      }
     };
-    return {
-        ...rect,
-        width: rect.right - rect.left,
-        height: rect.bottom - rect.top,
+    for (const sheet of document.styleSheets) {
+      try {
+        visit(sheet.cssRules);
+      } catch (e) {
+        // Cross-origin stylesheets can't be read
+      }
+    }
+    return selectors.filter((selector) => {
+      try {
+        document.querySelector(selector);
+        return true;
+      } catch (e) {
+        return false;
+      }
+    });
+  }
+
+  function isClickable(element) {
+    return element.onclick != null || getComputedStyle(element).cursor === "pointer";
+  }
+
+  function candidates(vw, vh) {
+    // Stylesheets added since the last step (e.g. by client-side navigation) are picked up
+    if (pointerSelectors === null || sheetCount !== document.styleSheets.length) {
+      pointerSelectors = cursorPointerSelectors();
+      sheetCount = document.styleSheets.length;
+    }
+    const found = new Set(document.querySelectorAll(CANDIDATES.join(",")));
+    if (pointerSelectors.length) {
+      for (const element of document.querySelectorAll(pointerSelectors.join(","))) {
+        found.add(element);
+      }
+    }
+
+    const checked = new Set();
+    const check = (element) => {
+      if (checked.size >= MAX_CHECKED || checked.has(element) || found.has(element)) return;
+      checked.add(element);
+      if (isClickable(element)) found.add(element);
     };
+    for (const element of document.querySelectorAll(CHECKED.join(","))) {
+      check(element);
+    }
+    for (const container of [...found]) {
+      for (const child of container.children) check(child);
+    }
+    for (let y = GRID_STEP / 2; y < vh; y += GRID_STEP) {
+      for (let x = GRID_STEP / 2; x < vw; x += GRID_STEP) {
+        let element = document.elementFromPoint(x, y);
+        while (element && element !== document.body && !checked.has(element) && !found.has(element)) {
+          check(element);
+          element = element.parentElement;
+        }
+      }
+    }
+    return found;
+  }
+
+  // Visible text, collecting text nodes only until MAX_TEXT characters
+  function textOf(element) {
+    if (element.tagName === "INPUT" || element.tagName === "TEXTAREA") {
+      return (element.value || element.placeholder || "").slice(0, MAX_TEXT);
+    }
+    const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT);
+    let text = "";
+    while (text.length < MAX_TEXT * 2 && walker.nextNode()) {
+      text += walker.currentNode.nodeValue;
+    }
+    return text.trim().replace(/\s{2,}/g, " ").slice(0, MAX_TEXT);
+  }
+
+  const STABLE_ATTRIBUTES = ["data-testid", "name", "aria-label", "placeholder", "title"];
+
+  function isUnique(selector) {
+    try {
+      return document.querySelectorAll(selector).length === 1;
+    } catch (e) {
+      return false;
+    }
+  }
+
+  // Ids with long digit runs are usually generated per page load
+  function stableId(element) {
+    return element.id && !/\d{4,}|^\d/.test(element.id) ? element.id : null;
+  }
+
+  // A CSS selector that finds the element again on a later visit: a unique id or
+  // attribute when there is one, else a tag:nth-of-type path from the closest
+  // ancestor with a stable id
+  function selectorOf(element) {
+    const tag = element.tagName.toLowerCase();
+    if (stableId(element) && isUnique(`#${CSS.escape(element.id)}`)) {
+      return `#${CSS.escape(element.id)}`;
+    }
+    for (const name of STABLE_ATTRIBUTES) {
+      const value = element.getAttribute(name);
+      if (value && value.length <= 200) {
+        const selector = `${tag}[${name}="${CSS.escape(value)}"]`;
+        if (isUnique(selector)) return selector;
+      }
+    }
+    const parts = [];
+    for (let el = element; el && el !== document.documentElement; el = el.parentElement) {
+      if (el !== element && stableId(el)) {
+        parts.unshift(`#${CSS.escape(el.id)}`);
+        break;
+      }
+      let index = 1;
+      for (let sibling = el.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+        if (sibling.tagName === el.tagName) index++;
+      }
+      parts.unshift(`${el.tagName.toLowerCase()}:nth-of-type(${index})`);
+    }
+    return parts.join(" > ");
+  }
+
+  function getRandomColor() {
+    var letters = "0123456789ABCDEF";
+    var color = "#";
+    for (var i = 0; i < 6; i++) {
+      color += letters[Math.floor(Math.random() * 16)];
+    }
+    return color;
+  }
+
+  function unmarkPage() {
+    if (overlay) {
+      overlay.remove();
+      overlay = null;
+    }
+  }
+
+  function markPage() {
+    unmarkPage();
+
+    const vw = Math.max(document.documentElement.clientWidth || 0, window.innerWidth || 0);
+    const vh = Math.max(document.documentElement.clientHeight || 0, window.innerHeight || 0);
+
+    // Read phase: layout is computed once and no DOM writes happen until labels are drawn
+    const visible = [];
+    for (const element of candidates(vw, vh)) {
+      const box = element.getBoundingClientRect();
+      if (box.bottom <= 0 || box.right <= 0 || box.top >= vh || box.left >= vw) continue;
+      if (box.width * box.height < MIN_AREA) continue;
+      const rects = [];
+      for (const bb of element.getClientRects()) {
+        const rect = {
+          left: Math.max(0, bb.left),
+          top: Math.max(0, bb.top),
+          right: Math.min(vw, bb.right),
+          bottom: Math.min(vh, bb.bottom),
+        };
+        if (rect.right > rect.left && rect.bottom > rect.top) {
+          rects.push({ ...rect, width: rect.right - rect.left, height: rect.bottom - rect.top });
+        }
+      }
+      if (rects.length) visible.push({ element, rects });
+    }
+
+    // Batched hit-testing: one elementFromPoint per visible rect, all before any write
+    let items = [];
+    for (const item of visible) {
+      item.rects = item.rects.filter((rect) => {
+        const hit = document.elementFromPoint(rect.left + rect.width / 2, rect.top + rect.height / 2);
+        return hit === item.element || item.element.contains(hit);
+      });
+      const area = item.rects.reduce((acc, rect) => acc + rect.width * rect.height, 0);
+      if (area >= MIN_AREA) items.push(item);
+    }
+
+    // Only keep inner clickable items: mark every item that has another item inside it
+    const itemElements = new Set(items.map((item) => item.element));
+    const containers = new Set();
+    for (const item of items) {
+      for (let parent = item.element.parentElement; parent; parent = parent.parentElement) {
+        if (containers.has(parent)) break;
+        if (itemElements.has(parent)) containers.add(parent);
+      }
+    }
+    items = items.filter((item) => !containers.has(item.element));
+
+    for (const item of items) {
+      item.text = textOf(item.element);
+      item.type = item.element.tagName.toLowerCase();
+      item.ariaLabel = item.element.getAttribute("aria-label") || "";
+    }
+
+    // Write phase: a floating border on top of each element, appended in one go
+    overlay = document.createElement("div");
+    overlay.style.pointerEvents = "none";
+    const fragment = document.createDocumentFragment();
+    items.forEach(function (item, index) {
+      item.rects.forEach((bbox) => {
+        const newElement = document.createElement("div");
+        const borderColor = getRandomColor();
+        newElement.style.outline = `2px dashed ${borderColor}`;
+        newElement.style.position = "fixed";
+        newElement.style.left = bbox.left + "px";
+        newElement.style.top = bbox.top + "px";
+        newElement.style.width = bbox.width + "px";
+        newElement.style.height = bbox.height + "px";
+        newElement.style.pointerEvents = "none";
+        newElement.style.boxSizing = "border-box";
+        newElement.style.zIndex = 2147483647;
+
+        // Add floating label at the corner
+        const label = document.createElement("span");
+        label.textContent = index;
+        label.style.position = "absolute";
+        label.style.top = "-19px";
+        label.style.left = "0px";
+        label.style.background = borderColor;
+        label.style.color = "white";
+        label.style.padding = "2px 4px";
+        label.style.fontSize = "12px";
+        label.style.borderRadius = "2px";
+        newElement.appendChild(label);
+        fragment.appendChild(newElement);
+      });
     });
+    overlay.appendChild(fragment);
+    document.body.appendChild(overlay);
 
-var area = rects.reduce((acc, rect) => acc + rect.width * rect.height, 0);
-
-return {
-    element: element,
-    include:
-    element.tagName === "INPUT" ||
-    element.tagName === "TEXTAREA" ||
-    element.tagName === "SELECT" ||
-    element.tagName === "BUTTON" ||
-    element.tagName === "A" ||
-    element.onclick != null ||
-    window.getComputedStyle(element).cursor == "pointer" ||
-    element.tagName === "IFRAME" ||
-    element.tagName === "VIDEO",
-    area,
-    rects,
-    text: textualContent,
-    type: elementType,
-    ariaLabel: ariaLabel,
-};
-})
-.filter((item) => item.include && item.area >= 20);
-
-// Only keep inner clickable items
-items = items.filter(
-(x) => !items.some((y) => x.element.contains(y.element) && !(x == y))
-);
-
-// Function to generate random colors
-function getRandomColor() {
-var letters = "0123456789ABCDEF";
-var color = "#";
-for (var i = 0; i < 6; i++) {
-color += letters[Math.floor(Math.random() * 16)];
-}
-return color;
-}
+    marked = items.flatMap((item) => item.rects.map(() => item.element));
+    return items.flatMap((item) =>
+      item.rects.map(({ left, top, width, height }) => ({
+        x: (left + left + width) / 2,
+        y: (top + top + height) / 2,
+        type: item.type,
+        text: item.text,
+        ariaLabel: item.ariaLabel,
+      }))
+    );
+  }
+
+  // Selector of a box of the last markPage(), computed only for the element acted on
+  function markedSelector(index) {
+    const element = marked[index];
+    return element && element.isConnected ? selectorOf(element) : "";
+  }
+
+  // Index of the first box of the last markPage() whose element `selector` finds, or -1
+  function markedIndex(selector) {
+    let element = null;
+    try {
+      element = document.querySelector(selector);
+    } catch (e) {
+      return -1;
+    }
+    return element ? marked.indexOf(element) : -1;
+  }
 
-// Lets create a floating border on top of these elements that will always be visible
-items.forEach(function (item, index) {
-item.rects.forEach((bbox) => {
-newElement = document.createElement("div");
-var borderColor = getRandomColor();
-newElement.style.outline = `2px dashed ${borderColor}`;
-newElement.style.position = "fixed";
-newElement.style.left = bbox.left + "px";
-newElement.style.top = bbox.top + "px";
-newElement.style.width = bbox.width + "px";
-newElement.style.height = bbox.height + "px";
-newElement.style.pointerEvents = "none";
-newElement.style.boxSizing = "border-box";
-newElement.style.zIndex = 2147483647;
-// newElement.style.background = `${borderColor}80`;
-
-// Add floating label at the corner
-var label = document.createElement("span");
-label.textContent = index;
-label.style.position = "absolute";
-// These we can tweak if we want
-label.style.top = "-19px";
-label.style.left = "0px";
-label.style.background = borderColor;
-// label.style.background = "black";
-label.style.color = "white";
-label.style.padding = "2px 4px";
-label.style.fontSize = "12px";
-label.style.borderRadius = "2px";
-newElement.appendChild(label);
-
-document.body.appendChild(newElement);
-labels.push(newElement);
-// item.element.setAttribute("-ai-label", label.textContent);
-});
-});
-const coordinates = items.flatMap((item) =>
-item.rects.map(({ left, top, width, height }) => ({
-x: (left + left + width) / 2,
-y: (top + top + height) / 2,
-type: item.type,
-text: item.text,
-ariaLabel: item.ariaLabel,
-}))
-);
-return coordinates;
-}
\ No newline at end of file
+  window.markPage = markPage;
+  window.unmarkPage = unmarkPage;
+  window.markedSelector = markedSelector;
+  window.markedIndex = markedIndex;
+})();
@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+
+ANIMAL_SEARCH_REFERENCE = " Reference for Animal search: Radio button index 105 is bulls (index 100 is bulls for EPD search), index 106 is both (bulls & females), index 107 is females, index 108 is Registration #, index 109 is Tattoo, index 110 is Name, and index 111 is EID. Use search field box to enter search value"
+RANCH_EXTRA_PROMPT = "(from start to end: type, member, prefix, member_name, dba, city, state_or_province)"
+
+
+class Search(BaseModel):
+    search_ranch: bool = False
+    search_epd: bool = False
+    search_animal: bool = False
+
+
+class RanchProfile(BaseModel):
+    type: str
+    member: str
+    prefix: str
+    member_name: str
+    dba: str
+    city: str
+    state_or_province: str
+
+
+class Cell(BaseModel):
+    epd: float
+    change: float
+    acc: float
+    rank: str
+
+
+class EPDAnimal(BaseModel):
+    registration: str
+    tattoo: str
+    name: str
+    ce_direct: Cell
+    birth_weight: Cell
+    weaning_weight: Cell
+    yearling_weight: Cell
+    milk: Cell
+    tm: Cell
+    ce_maternal: Cell
+    stayability: Cell
+    yield_grade: Cell
+    carcass_weight: Cell
+    ribeye_area: Cell
+    fat_thickness: Cell
+    marbling: Cell
+    cez_dollar_index: Cell
+    bmi_dollar_index: Cell
+    cpi_dollar_index: Cell
+    f_dollar_index: Cell
+
+
+class Animal(BaseModel):
+    registration: str
+    prefix_or_tattoo: str
+    name: str
+    birth_date: str
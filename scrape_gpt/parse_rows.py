@@ -0,0 +1,235 @@
+import re
+from collections import deque
+from html.parser import HTMLParser
+from typing import Deque, Iterator, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+ROW_START = re.compile(r"<([a-zA-Z][\w-]*)\b[^>]*\bonmouseover\s*=", re.I)
+SPACES = re.compile(r"\s+")
+ROW_TAG = re.compile(r"<tr\b", re.I)
+TABLE_TAG = re.compile(r"<table\b", re.I)
+NOT_WORD = re.compile(r"[^a-z0-9]+")
+# Person names listed as "LAST, FIRST", which results report as "FIRST LAST"
+PERSON_NAME_FIELDS = {"member_name"}
+
+# Header abbreviations used on digitalbeef result tables -> model field names
+HEADER_ALIASES = {
+    "reg": "registration",
+    "reg_no": "registration",
+    "member_no": "member",
+    "member_id": "member",
+    "state_prov": "state_or_province",
+    "ced": "ce_direct",
+    "bw": "birth_weight",
+    "ww": "weaning_weight",
+    "yw": "yearling_weight",
+    "cem": "ce_maternal",
+    "stay": "stayability",
+    "yg": "yield_grade",
+    "cw": "carcass_weight",
+    "rea": "ribeye_area",
+    "fat": "fat_thickness",
+    "marb": "marbling",
+}
+
+
+class RowParseError(ValueError):
+    pass
+
+
+def iter_rows(page_html: str, skip: int = 0) -> Iterator[str]:
+    """
+    Yield the outer HTML of every result row, i.e. each element carrying an
+    onmouseover handler, skipping the first `skip` rows.
+    """
+    position = 0
+    index = 0
+    for match in ROW_START.finditer(page_html):
+        if match.start() < position:
+            continue
+        end = _element_end(page_html, match.group(1), match.end())
+        position = end
+        if index >= skip:
+            yield page_html[match.start():end]
+        index += 1
+
+
+def result_headers(page_html: str, skip: int = 0) -> Optional[List[str]]:
+    """
+    The cell texts of the table row right above the first result row (after
+    skipping `skip` rows), i.e. the header of the result table, or None when
+    the result table has no row above its first result.
+    """
+    first = next((m for i, m in enumerate(ROW_START.finditer(page_html)) if i == skip), None)
+    if first is None:
+        return None
+    table = max((m.start() for m in TABLE_TAG.finditer(page_html, 0, first.start())), default=0)
+    above = [m for m in ROW_TAG.finditer(page_html, table, first.start())]
+    for match in reversed(above):
+        cells = row_cells(page_html[match.start():_element_end(page_html, "tr", match.end())])
+        if any(cells):
+            return cells
+    return None
+
+
+def _element_end(page_html: str, tag: str, start: int) -> int:
+    tags = re.compile(rf"<(/?){tag}\b[^>]*>", re.I)
+    depth = 1
+    for match in tags.finditer(page_html, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return len(page_html)
+
+
+class _CellParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cells: List[str] = []
+        self._text: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("td", "th"):
+            self._close()
+            self._text = []
+        elif tag == "br" and self._text is not None:
+            self._text.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th"):
+            self._close()
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def _close(self):
+        if self._text is not None:
+            self.cells.append(SPACES.sub(" ", "".join(self._text)).strip())
+            self._text = None
+
+    def close(self):
+        super().close()
+        self._close()
+
+
+def row_cells(row_html: str) -> List[str]:
+    """
+    Return the whitespace-normalized text of each <td>/<th> in a row.
+    """
+    parser = _CellParser()
+    parser.feed(row_html)
+    parser.close()
+    return parser.cells
+
+
+def _fill(model: Type[BaseModel], cells: Deque[str]) -> dict:
+    values = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            size = len(annotation.model_fields)
+            if not cells:
+                raise RowParseError(f"missing cells for {name}")
+            tokens = cells[0].split(" ")
+            if len(tokens) == size:
+                cells.popleft()
+            elif len(cells) >= size:
+                tokens = [cells.popleft() for _ in range(size)]
+            else:
+                raise RowParseError(f"missing cells for {name}")
+            values[name] = dict(zip(annotation.model_fields, tokens))
+        else:
+            if not cells:
+                raise RowParseError(f"missing cell for {name}")
+            values[name] = cells.popleft()
+    return values
+
+
+def _header_key(text: str) -> str:
+    key = NOT_WORD.sub("_", text.lower().replace("#", " no ").replace("$", " dollar index ")).strip("_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def header_fields(headers: List[str], model: Type[BaseModel]) -> List[Optional[str]]:
+    """
+    The `model` field of each header cell: the field named like the header (see
+    HEADER_ALIASES), else the one field whose name starts or ends with it; None
+    for blank headers, whose cells are ignored. Raises RowParseError when a
+    header matches no single field or a field has no header.
+    """
+    fields = list(model.model_fields)
+    mapped: List[Optional[str]] = []
+    for text in headers:
+        key = _header_key(text)
+        if not key:
+            mapped.append(None)
+            continue
+        candidates = [key] if key in fields else [f for f in fields if f.startswith(f"{key}_") or f.endswith(f"_{key}")]
+        if len(candidates) != 1 or candidates[0] in mapped:
+            raise RowParseError(f"header {text!r} matches no single {model.__name__} field")
+        mapped.append(candidates[0])
+    missing = set(fields) - set(mapped)
+    if missing:
+        raise RowParseError(f"no header for {', '.join(sorted(missing))}")
+    return mapped
+
+
+def _fill_by_header(model: Type[BaseModel], cells: List[str], fields: List[Optional[str]]) -> dict:
+    if len(cells) != len(fields):
+        raise RowParseError(f"{len(cells)} cells for {len(fields)} headers")
+    values = {}
+    for name, cell in zip(fields, cells):
+        if name is None:
+            continue
+        annotation = model.model_fields[name].annotation
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            tokens = cell.split(" ")
+            if len(tokens) != len(annotation.model_fields):
+                raise RowParseError(f"{len(tokens)} values for {name}")
+            values[name] = dict(zip(annotation.model_fields, tokens))
+        else:
+            values[name] = cell
+    return values
+
+
+def _first_last(name: str) -> str:
+    last, comma, first = name.partition(",")
+    return f"{first.strip()} {last.strip()}" if comma and first.strip() else name
+
+
+def parse_row(row_html: str, model: Type[BaseModel], fields: Optional[List[Optional[str]]] = None) -> BaseModel:
+    """
+    Map the cells of a result row onto `model` fields: by the field of each
+    column when the table's header mapping is given (see header_fields), else
+    in field declaration order. Nested models (e.g. an EPD `Cell`) take either
+    one cell holding all their values or, without a mapping, one cell per value.
+    "LAST, FIRST" person names become "FIRST LAST". Raises RowParseError when
+    the row doesn't match the layout.
+    """
+    if fields is not None:
+        values = _fill_by_header(model, row_cells(row_html), fields)
+    else:
+        cells = deque(row_cells(row_html))
+        values = _fill(model, cells)
+        if cells:
+            raise RowParseError(f"{len(cells)} unexpected extra cell(s)")
+    first = next(iter(model.model_fields))
+    if not values[first]:
+        raise RowParseError(f"empty {first}")
+    for name in PERSON_NAME_FIELDS & values.keys():
+        values[name] = _first_last(values[name])
+    try:
+        return model.model_validate(values)
+    except ValidationError as e:
+        raise RowParseError(str(e)) from e
+
+
+def try_parse_row(
+    row_html: str, model: Type[BaseModel], fields: Optional[List[Optional[str]]] = None
+) -> Optional[BaseModel]:
+    try:
+        return parse_row(row_html, model, fields)
+    except RowParseError:
+        return None
@@ -0,0 +1,166 @@
+import asyncio
+import string
+import time
+from typing import AsyncIterator, Callable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from scrape_gpt.extract_rows import BATCH_SIZE, CONCURRENCY, iter_extract_rows
+from scrape_gpt.llm import get_chat, get_llm
+from scrape_gpt.parse_rows import iter_rows, result_headers
+from scrape_gpt.tracing import agent_step_hooks, span, trace_llm
+
+# browser_use and the modules built on it are imported by the functions that
+# drive a browser, so importing the partition settings stays cheap.
+
+SHORTHORN_URL = "https://shorthorn.digitalbeef.com/"
+
+# Options of the ranch search state dropdown, without the "All" entries
+RANCH_STATE_OPTIONS_JS = """
+(() => {
+    const prefix = document.querySelector("#ranch_search_prefix");
+    const scope = prefix && prefix.closest("form, li");
+    let select = scope && scope.querySelector("select");
+    if (!select) {
+        select = [...document.querySelectorAll("select")].find(
+            (s) => [...s.options].some((o) => /United States - All/.test(o.text))
+        );
+    }
+    if (!select) return [];
+    return [...select.options]
+        .map((o) => o.text.trim())
+        .filter((t) => t && !/ - All$/.test(t) && !/^(--|Select)/i.test(t));
+})()
+"""
+
+# Result table rows of every digitalbeef search carry an onmouseover handler
+RESULT_ROW_SELECTOR = "[onmouseover]"
+SETTLE_HINT = (
+    f" After submitting a search, use wait_for_page_settle with selector '{RESULT_ROW_SELECTOR}'"
+    " instead of waiting a fixed time."
+)
+
+# CE direct ranges covering every value: one per unit from -10 to 20 plus open
+# ends. The form's bounds are inclusive, so rows on a boundary show up in two
+# ranges and are dropped again by the crawl's dedup key.
+EPD_CE_DIRECT_BOUNDS = list(range(-10, 21))
+
+
+def epd_ce_direct_ranges(bounds: List[int] = EPD_CE_DIRECT_BOUNDS) -> List[str]:
+    """
+    CE direct search ranges as "min X max Y" strings, with an open-ended range
+    below the first bound and above the last one.
+    """
+    ranges = [f"max {bounds[0]}"]
+    ranges += [f"min {low} max {high}" for low, high in zip(bounds, bounds[1:])]
+    ranges.append(f"min {bounds[-1]}")
+    return ranges
+
+
+ANIMAL_SEARCH_PREFIXES = list(string.ascii_uppercase + string.digits)
+
+
+async def dropdown_options(url: str, expression: str) -> List[str]:
+    """
+    Open `url` in a pooled browser and return the partition values produced by
+    `expression`, e.g. the options of a form dropdown.
+    """
+    from scrape_gpt.browser_pool import get_browser_pool
+    from scrape_gpt.cdp import evaluate, navigate
+
+    async with get_browser_pool().lease() as browser:
+        await navigate(browser, url)
+        return await evaluate(browser, expression) or []
+
+
+async def iter_crawl_partitions(
+    values: List[str],
+    build_task: Callable[[str], str],
+    model: Type[BaseModel],
+    key: str,
+    extra_prompt: str = "",
+    skip: int = 0,
+    concurrency: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    extract_concurrency: int = CONCURRENCY,
+) -> AsyncIterator[BaseModel]:
+    """
+    Run one agent per partition value across pooled browsers, `concurrency` at a
+    time (defaults to the pool size), and yield each partition's rows as soon as
+    they are extracted, skipping rows whose `key` was already yielded. A failing
+    partition is reported and skipped instead of aborting the crawl.
+    """
+    from browser_use import Agent
+
+    from scrape_gpt.browser_pool import get_browser_pool
+    from scrape_gpt.cdp import get_page_html
+    from scrape_gpt.settle import settle_session
+    from scrape_gpt.tools.wait import create_search_tools
+
+    pool = get_browser_pool()
+    semaphore = asyncio.Semaphore(concurrency or pool.size)
+    queue: asyncio.Queue = asyncio.Queue()
+    failed = []
+    done = object()
+
+    async def run(value: str):
+        count = 0
+        try:
+            with span("partition", "step", value=value):
+                async with semaphore:
+                    async with pool.lease() as browser:
+                        agent = Agent(
+                            task=build_task(value),
+                            llm=trace_llm(get_llm()),
+                            browser_session=browser,
+                            tools=create_search_tools(),
+                        )
+                        await agent.run(**agent_step_hooks())
+                        await settle_session(browser, RESULT_ROW_SELECTOR, timeout=5)
+                        page_html = await get_page_html(browser)
+                rows = iter_rows(page_html, skip=skip)
+                async for row in iter_extract_rows(
+                    get_chat(), rows, model, extra_prompt, batch_size=batch_size, concurrency=extract_concurrency,
+                    headers=result_headers(page_html, skip),
+                ):
+                    count += 1
+                    await queue.put(row)
+            print(f"Partition {value!r}: {count} rows")
+        except Exception as e:
+            print(f"Partition {value!r} failed after {count} rows: {e}")
+            failed.append(value)
+        finally:
+            await queue.put(done)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(run(value)) for value in values]
+    seen = set()
+    total = 0
+    remaining = len(tasks)
+    try:
+        while remaining:
+            row = await queue.get()
+            if row is done:
+                remaining -= 1
+                continue
+            total += 1
+            row_key = getattr(row, key)
+            if row_key not in seen:
+                seen.add(row_key)
+                yield row
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    print(
+        f"Crawled {len(values)} partitions in {time.perf_counter() - start:.1f}s: "
+        f"{total} rows, {len(seen)} unique by {key}, "
+        f"{len(failed)} failed {failed if failed else ''}"
+    )
+
+
+async def crawl_partitions(*args, **kwargs) -> List[BaseModel]:
+    """
+    Like iter_crawl_partitions, but return the merged rows at once.
+    """
+    return [row async for row in iter_crawl_partitions(*args, **kwargs)]
@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Iterator, List, Tuple, TypeVar
+
+from scrape_gpt.tracing import span
+
+T = TypeVar("T")
+
+
+class PhaseTimer:
+    """
+    Records when each phase of a run starts and ends, relative to the timer's
+    creation, so concurrent phases show up as overlapping intervals.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: Dict[str, Tuple[float, float]] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter() - self.start
+        try:
+            with span(name, "phase"):
+                yield
+        finally:
+            self.phases[name] = (start, time.perf_counter() - self.start)
+
+    async def run(self, name: str, awaitable: Awaitable[T]) -> T:
+        with self.phase(name):
+            return await awaitable
+
+    def critical_path(self, slack: float = 0.01) -> List[str]:
+        """
+        The chain of phases that determined the total time: from the phase that
+        ended last, repeatedly step back to the phase that ended last before
+        the current one started (within `slack` seconds).
+        """
+        path = []
+        remaining = dict(self.phases)
+        current = max(remaining, key=lambda name: remaining[name][1], default=None)
+        while current is not None:
+            path.append(current)
+            start = remaining.pop(current)[0]
+            before = {name: span for name, span in remaining.items() if span[1] <= start + slack}
+            current = max(before, key=lambda name: before[name][1], default=None)
+        return path[::-1]
+
+    def report(self) -> str:
+        critical = set(self.critical_path())
+        lines = ["Phases (start-end, seconds; * on the critical path):"]
+        for name, (start, end) in sorted(self.phases.items(), key=lambda item: item[1]):
+            mark = "*" if name in critical else " "
+            lines.append(f" {mark} {name:<16} {start:7.2f} - {end:7.2f}  ({end - start:.2f}s)")
+        lines.append(f"   total            {time.perf_counter() - self.start:.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,120 @@
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Optional, Set
+
+from pydantic import BaseModel
+
+# Elements whose content never helps an extraction prompt
+DROP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "link", "meta",
+    "head", "object", "embed",
+}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+KEEP_ATTRS = {
+    "href", "src", "alt", "title", "name", "value", "type", "id", "aria-label",
+    "placeholder", "for", "role", "colspan", "rowspan", "datetime",
+}
+MAX_ATTR_LENGTH = 300
+SPACES = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token), good enough for accounting.
+    """
+    return (len(text) + 3) // 4
+
+
+class PrunedHtml(BaseModel):
+    text: str
+    input_tokens: int
+    output_tokens: int
+
+
+class _Pruner(HTMLParser):
+    def __init__(self, keep_attrs: Set[str]):
+        super().__init__(convert_charrefs=True)
+        self.keep_attrs = keep_attrs
+        self.parts: List[str] = []
+        self._dropped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._dropped:
+            if tag not in VOID_TAGS:
+                self._dropped += 1
+            return
+        if tag in DROP_TAGS:
+            if tag not in VOID_TAGS:
+                self._dropped = 1
+            return
+        kept = "".join(
+            f' {name}="{escape(value, quote=True)}"'
+            for name, value in attrs
+            if name in self.keep_attrs and value and len(value) <= MAX_ATTR_LENGTH
+        )
+        self.parts.append(f"<{tag}{kept}>")
+
+    def handle_startendtag(self, tag, attrs):
+        if self._dropped or tag in DROP_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.parts.append(f"</{tag}>")
+
+    def handle_endtag(self, tag):
+        if self._dropped:
+            if tag not in VOID_TAGS:
+                self._dropped -= 1
+            return
+        if tag not in VOID_TAGS and tag not in DROP_TAGS:
+            self.parts.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self._dropped:
+            self.parts.append(escape(SPACES.sub(" ", data), quote=False))
+
+
+# Empty elements without attributes, except table cells which keep columns aligned
+EMPTY_ELEMENT = re.compile(r"<(?!t[dh]>)(\w+)>\s*</\1>")
+
+
+def prune_html(
+    html: str,
+    markdown: bool = False,
+    keep_attrs: Optional[Set[str]] = None,
+    label: Optional[str] = None,
+) -> PrunedHtml:
+    """
+    Strip scripts, styles and other non-content nodes, drop attributes outside
+    `keep_attrs` (event handlers, classes, inline styles...), collapse whitespace
+    and remove empty elements. With `markdown` the result is converted to compact
+    markdown instead. When `label` is given the token estimates are printed.
+    """
+    pruner = _Pruner(KEEP_ATTRS if keep_attrs is None else keep_attrs)
+    pruner.feed(html)
+    pruner.close()
+    text = "".join(pruner.parts)
+    previous = None
+    while previous != text:
+        previous, text = text, EMPTY_ELEMENT.sub("", text)
+    text = re.sub(r">\s+<", "> <", text).strip()
+
+    if markdown:
+        import html2text
+
+        converter = html2text.HTML2Text()
+        converter.body_width = 0
+        converter.ignore_images = True
+        text = re.sub(r"\n{3,}", "\n\n", converter.handle(text)).strip()
+
+    result = PrunedHtml(text=text, input_tokens=estimate_tokens(html), output_tokens=estimate_tokens(text))
+    if label:
+        print(
+            f"Pruned {label}: ~{result.input_tokens} -> ~{result.output_tokens} tokens "
+            f"({100 - 100 * result.output_tokens // max(1, result.input_tokens)}% smaller)"
+        )
+    return result
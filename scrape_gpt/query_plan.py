@@ -0,0 +1,256 @@
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Tuple, Union
+
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from scrape_gpt.llm import get_chat
+from scrape_gpt.session_store import SessionStore
+
+NUMERIC_OPS = {">", ">=", "<", "<="}
+# Share of a text column's non-null values that must be amounts for it to sort as numbers
+NUMERIC_SHARE = 0.9
+# Characters dropped before parsing an amount like "$2,500" or "15 %"
+AMOUNT_NOISE = r"[\s$€£,%]"
+
+PLAN_PROMPT = """You answer questions about tabular data by writing a query plan, not code.
+Tables and their columns (name: type):
+{schema}
+
+Write the plan that answers: {prompt}
+
+Use only the columns listed above, with their exact names. Numeric comparisons work on
+text columns holding amounts like "$2,500" too. Leave columns empty to return every column."""
+
+
+class PlanError(ValueError):
+    """
+    Raised when a plan doesn't fit the session schema.
+    """
+
+
+class Filter(BaseModel):
+    column: str
+    op: Literal["==", "!=", ">", ">=", "<", "<=", "contains", "in", "not_null"]
+    value: Optional[Union[float, str, List[Union[float, str]]]] = Field(
+        default=None, description="Value to compare with; a list for `in`, nothing for `not_null`"
+    )
+
+
+class Sort(BaseModel):
+    column: str
+    descending: bool = False
+
+
+class Aggregate(BaseModel):
+    func: Literal["count", "sum", "mean", "min", "max", "nunique"]
+    column: Optional[str] = Field(default=None, description="Column to aggregate, not needed for count")
+    group_by: List[str] = Field(default_factory=list)
+
+
+class QueryPlan(BaseModel):
+    """
+    Declarative follow-up query: filter, aggregate, sort, project and limit one table.
+    """
+
+    table: Optional[str] = Field(default=None, description="Table to query")
+    filters: List[Filter] = Field(default_factory=list, description="Conditions that all have to hold")
+    aggregate: Optional[Aggregate] = None
+    sort: List[Sort] = Field(default_factory=list)
+    columns: List[str] = Field(default_factory=list, description="Columns to return, all when empty")
+    limit: Optional[int] = None
+
+    def aggregate_name(self) -> Optional[str]:
+        if self.aggregate is None:
+            return None
+        return "count" if self.aggregate.func == "count" else f"{self.aggregate.func}_{self.aggregate.column}"
+
+    def referenced_columns(self) -> List[str]:
+        """
+        Table columns the plan reads; sorting by the aggregate result doesn't count.
+        """
+        sort = [s.column for s in self.sort if s.column != self.aggregate_name()]
+        columns = [f.column for f in self.filters] + sort + self.columns
+        if self.aggregate:
+            columns += self.aggregate.group_by + ([self.aggregate.column] if self.aggregate.column else [])
+        return list(dict.fromkeys(columns))
+
+
+def session_schema(store: SessionStore) -> Dict[str, Dict[str, str]]:
+    return {table: {f.name: str(f.type) for f in store.schema(table)} for table in store.tables()}
+
+
+def schema_fingerprint(schema: Dict[str, Dict[str, str]]) -> str:
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def validate_plan(plan: QueryPlan, schema: Dict[str, Dict[str, str]]) -> QueryPlan:
+    """
+    Check the plan against the session schema and pick its table when the LLM
+    left it out. Raises PlanError when it can't run.
+    """
+    needed = plan.referenced_columns()
+    if plan.table is None:
+        candidates = [t for t, columns in schema.items() if all(c in columns for c in needed)]
+        if not candidates:
+            raise PlanError(f"No table has all of the columns {needed}")
+        plan.table = candidates[-1]
+    if plan.table not in schema:
+        raise PlanError(f"Unknown table {plan.table!r}, expected one of {list(schema)}")
+    missing = [c for c in needed if c not in schema[plan.table]]
+    if missing:
+        raise PlanError(f"Unknown columns {missing} in table {plan.table!r}")
+    for f in plan.filters:
+        if f.op != "not_null" and f.value is None:
+            raise PlanError(f"Filter on {f.column!r} with {f.op} needs a value")
+        if f.op in NUMERIC_OPS and _number(f.value) is None:
+            raise PlanError(f"Filter on {f.column!r} with {f.op} needs a number, got {f.value!r}")
+    if plan.aggregate and plan.aggregate.func != "count" and not plan.aggregate.column:
+        raise PlanError(f"Aggregate {plan.aggregate.func} needs a column")
+    if plan.limit is not None and plan.limit < 1:
+        raise PlanError("Limit has to be positive")
+    return plan
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(re.sub(AMOUNT_NOISE, "", str(value)))
+    except ValueError:
+        return None
+
+
+def _numeric(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series.astype(str).str.replace(AMOUNT_NOISE, "", regex=True), errors="coerce")
+
+
+def _sort_key(series: pd.Series) -> pd.Series:
+    """
+    Sort a text column by amount only when (almost) all of its values are
+    amounts, so IDs or addresses with digits in them keep their text order.
+    """
+    numeric = _numeric(series)
+    present = series.notna().sum()
+    if pd.api.types.is_numeric_dtype(series) or (present and numeric.notna().sum() >= NUMERIC_SHARE * present):
+        return numeric
+    return series
+
+
+def _mask(df: pd.DataFrame, f: Filter) -> pd.Series:
+    column = df[f.column]
+    if f.op == "not_null":
+        return column.notna()
+    if f.op in NUMERIC_OPS:
+        column, value = _numeric(column), _number(f.value)
+        return {">": column > value, ">=": column >= value, "<": column < value, "<=": column <= value}[f.op]
+    if f.op == "contains":
+        return column.astype(str).str.contains(str(f.value), case=False, regex=False, na=False)
+    values = f.value if isinstance(f.value, list) else [f.value]
+    if pd.api.types.is_numeric_dtype(column):
+        values = [_number(v) for v in values]
+    else:
+        column, values = column.astype(str).str.lower(), [str(v).lower() for v in values]
+    matched = column.isin(values)
+    return ~matched if f.op == "!=" else matched
+
+
+def execute_plan(df: pd.DataFrame, plan: QueryPlan) -> pd.DataFrame:
+    """
+    Run a validated plan with vectorized pandas operations.
+    """
+    if plan.filters:
+        mask = pd.Series(True, index=df.index)
+        for f in plan.filters:
+            mask &= _mask(df, f)
+        df = df[mask]
+    if plan.aggregate:
+        agg, name = plan.aggregate, plan.aggregate_name()
+        if agg.func == "count":
+            df = df.groupby(agg.group_by).size().reset_index(name=name) if agg.group_by else pd.DataFrame({name: [len(df)]})
+        else:
+            values = df.assign(**{agg.column: _numeric(df[agg.column])}) if agg.func in ("sum", "mean") else df
+            if agg.group_by:
+                df = values.groupby(agg.group_by)[agg.column].agg(agg.func).reset_index(name=name)
+            else:
+                df = pd.DataFrame({name: [values[agg.column].agg(agg.func)]})
+    sort = [s for s in plan.sort if s.column in df.columns]
+    if sort:
+        keys = {s.column: _sort_key(df[s.column]) for s in sort}
+        df = df.sort_values(
+            [s.column for s in sort],
+            ascending=[not s.descending for s in sort],
+            key=lambda column: keys[column.name],
+        )
+    if plan.columns and not plan.aggregate:
+        df = df[plan.columns]
+    if plan.limit:
+        df = df.head(plan.limit)
+    return df.reset_index(drop=True)
+
+
+class PlanCache:
+    """
+    Plans of one session keyed by prompt and schema fingerprint, in a small JSON file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._plans: Optional[Dict[str, dict]] = None
+
+    @property
+    def plans(self) -> Dict[str, dict]:
+        if self._plans is None:
+            self._plans = json.loads(self.path.read_text()) if self.path.exists() else {}
+        return self._plans
+
+    @staticmethod
+    def key(prompt: str, fingerprint: str) -> str:
+        normalized = " ".join(prompt.lower().split())
+        return hashlib.sha256(f"{fingerprint}\x00{normalized}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[QueryPlan]:
+        plan = self.plans.get(key)
+        return QueryPlan.model_validate(plan) if plan else None
+
+    def put(self, key: str, plan: QueryPlan) -> None:
+        self.plans[key] = plan.model_dump()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.plans, indent=2))
+
+
+async def run_query_plan(store: SessionStore, prompt: str, llm=None) -> Tuple[QueryPlan, pd.DataFrame]:
+    """
+    Answer a follow-up prompt with one structured LLM call (none when the plan
+    is cached) and a vectorized pandas query over only the columns it touches.
+    """
+    start = time.perf_counter()
+    schema = session_schema(store)
+    if not schema:
+        raise PlanError("The session has no stored tables")
+    cache = PlanCache(store.path / "plans.json")
+    key = PlanCache.key(prompt, schema_fingerprint(schema))
+    plan = cache.get(key)
+    cached = plan is not None
+    if plan is None:
+        schema_text = "\n".join(
+            f"- {table}: " + ", ".join(f"{c}: {t}" for c, t in columns.items()) for table, columns in schema.items()
+        )
+        chat = (llm or get_chat()).with_structured_output(QueryPlan)
+        plan = validate_plan(await chat.ainvoke(PLAN_PROMPT.format(schema=schema_text, prompt=prompt)), schema)
+        cache.put(key, plan)
+    planned = time.perf_counter()
+    df = store.load(plan.table, columns=plan.referenced_columns() if plan.columns or plan.aggregate else None)
+    result = execute_plan(df, plan)
+    print(
+        f"Query plan {'(cached) ' if cached else ''}{plan.model_dump_json(exclude_defaults=True)}: "
+        f"{len(result)} rows in {(time.perf_counter() - start) * 1000:.0f}ms "
+        f"(planning {(planned - start) * 1000:.0f}ms)"
+    )
+    return plan, result
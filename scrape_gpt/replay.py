@@ -0,0 +1,418 @@
+import argparse
+import asyncio
+import os
+import re
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import BaseModel, Field
+
+from scrape_gpt.extract_rows import BATCH_SIZE, CONCURRENCY, extract_rows
+from scrape_gpt.http_client import close_http_client, get_http_client
+from scrape_gpt.llm import create_chat
+from scrape_gpt.models import RANCH_EXTRA_PROMPT, Animal, EPDAnimal, RanchProfile
+from scrape_gpt.parse_rows import iter_rows, result_headers
+
+FORMS_DIR = Path("./.session_data/forms")
+SHORTHORN_URL = "https://shorthorn.digitalbeef.com/"
+REPLAYED_HEADERS = {"accept", "content-type", "origin", "referer", "x-requested-with"}
+# Seconds the hidden inputs (e.g. tokens) of a form page are reused before fetching it again
+HIDDEN_TTL = 600
+
+# Result model, rows to skip and extra extraction prompt of each known form
+FORM_RESULTS: Dict[str, Tuple[Type[BaseModel], int, str]] = {
+    "ranch": (RanchProfile, 0, RANCH_EXTRA_PROMPT),
+    "epd": (EPDAnimal, 1, ""),
+    "animal": (Animal, 0, ""),
+}
+
+
+class FormTemplate(BaseModel):
+    """
+    A recorded form submission that can be replayed with new parameter values.
+    """
+
+    name: str
+    page_url: str
+    method: str
+    url: str
+    headers: Dict[str, str] = Field(default_factory=dict)
+    fields: List[Tuple[str, str]] = Field(description="Submitted form fields, in order")
+    params: Dict[str, str] = Field(
+        default_factory=dict, description="Parameter name -> form field name"
+    )
+    choices: Dict[str, Dict[str, str]] = Field(
+        default_factory=dict, description="Parameter name -> {option text: option value} for dropdowns"
+    )
+
+    def build(self, values: Dict[str, str], hidden: Optional[Dict[str, str]] = None) -> List[Tuple[str, str]]:
+        """
+        Return the form fields with `values` applied. Keys are parameter names or
+        raw field names; mapped text parameters that are not given are cleared and
+        fresh hidden field values (e.g. tokens) replace the recorded ones.
+        """
+        overrides = {field: "" for param, field in self.params.items() if param not in self.choices}
+        for param, choice in self.choices.items():
+            default = next((v for text, v in choice.items() if text.endswith("All")), next(iter(choice.values()), ""))
+            overrides[self.params[param]] = default
+        overrides.update(hidden or {})
+        for key, value in values.items():
+            if value is None:
+                continue
+            if key in self.choices:
+                value = self._choose(key, value)
+            overrides[self.params.get(key, key)] = value
+        return [(field, overrides.get(field, value)) for field, value in self.fields]
+
+    def _choose(self, param: str, value: str) -> str:
+        """
+        The option value for `value`: an option value, else the option whose
+        text or last " - " part equals it, else the one option containing it as
+        a whole word or, failing that, as a substring. Ambiguous matches raise.
+        """
+        options = self.choices[param]
+        if value in options.values():
+            return value
+        wanted = value.strip().lower()
+        word = re.compile(rf"\b{re.escape(wanted)}\b")
+        rules = [
+            lambda text: text == wanted or text.rsplit(" - ", 1)[-1] == wanted,
+            lambda text: word.search(text) is not None,
+            lambda text: wanted in text,
+        ]
+        for rule in rules:
+            matches = {text: v for text, v in options.items() if rule(text.lower())}
+            if len(set(matches.values())) > 1:
+                raise ValueError(f"{value!r} matches several {param} options: {', '.join(matches)}")
+            if matches:
+                return next(iter(matches.values()))
+        raise ValueError(f"No {param} option matches {value!r}")
+
+
+def template_path(name: str) -> Path:
+    return FORMS_DIR / f"{name}.json"
+
+
+def load_template(name: str) -> FormTemplate:
+    path = template_path(name)
+    if not path.exists():
+        raise FileNotFoundError(f"Form {name!r} is not recorded yet, run: python -m scrape_gpt.replay record {name}")
+    return FormTemplate.model_validate_json(path.read_text())
+
+
+class _HiddenInputParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.values: Dict[str, str] = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "input" and (attrs.get("type") or "").lower() == "hidden" and attrs.get("name"):
+            self.values[attrs["name"]] = attrs.get("value") or ""
+
+
+def hidden_inputs(page_html: str) -> Dict[str, str]:
+    parser = _HiddenInputParser()
+    parser.feed(page_html)
+    return parser.values
+
+
+def _submitted_fields(method: str, url: str, post_data: Optional[str]) -> Tuple[str, List[Tuple[str, str]]]:
+    parts = urlsplit(url)
+    if method == "GET":
+        return urlunsplit(parts._replace(query="")), parse_qsl(parts.query, keep_blank_values=True)
+    return url, parse_qsl(post_data or "", keep_blank_values=True)
+
+
+async def fill_ranch_form(page) -> Tuple[Dict[str, str], Dict[str, Dict[str, str]]]:
+    """
+    Fill the ranch search form with sentinel values and submit it.
+    """
+    form = page.get_by_role("listitem").filter(has_text="Ranch Search Herd Prefix")
+    sentinels = {
+        "prefix": "__prefix__",
+        "member_id": "__member_id__",
+        "name": "__name__",
+        "city": "__city__",
+    }
+    await page.locator("#ranch_search_prefix").fill(sentinels["prefix"])
+    await page.locator("#ranch_search_id").fill(sentinels["member_id"])
+    await page.locator("#ranch_search_val").fill(sentinels["name"])
+    await page.locator("#ranch_search_city").fill(sentinels["city"])
+    select = form.get_by_role("combobox")
+    options = await select.evaluate("s => [...s.options].map(o => [o.text.trim(), o.value])")
+    sentinels["state"] = (await select.select_option("United States - Alabama"))[0]
+    await form.get_by_role("button").click()
+    return sentinels, {"state": dict(options)}
+
+
+# Controls of a search form with a parameter name for each: its label, else
+# "<row label> <column header>" in a form table (e.g. "CE Direct" + "Max"),
+# else its field name. Radio buttons of one group share a parameter.
+FORM_CONTROLS_JS = """
+(form) => {
+    const slug = (text) => (text || "").toLowerCase().replace(/[^a-z0-9]+/g, "_").replace(/^_+|_+$/g, "");
+    const text = (node) => (node ? node.innerText || node.textContent || "" : "").trim();
+    const labelOf = (el) => {
+        const label = text(el.labels && el.labels[0]) || el.getAttribute("aria-label") || el.placeholder;
+        if (label) return label;
+        const cell = el.closest("td, th");
+        const row = el.closest("tr");
+        if (cell && row && !row.cells[0].contains(el)) {
+            const header = row.closest("table").rows[0];
+            const column = header !== row && header.cells[cell.cellIndex] ? text(header.cells[cell.cellIndex]) : "";
+            return `${text(row.cells[0])} ${column}`;
+        }
+        return el.name;
+    };
+    const all = [...form.querySelectorAll("input, select")];
+    const controls = all.filter(
+        (el) => el.name && !el.disabled && !["hidden", "submit", "button", "reset", "image", "checkbox"].includes(el.type)
+    );
+    const seen = new Set();
+    const found = [];
+    controls.forEach((el) => {
+        const index = all.indexOf(el);
+        if (el.type === "radio") {
+            if (seen.has(el.name)) return;
+            seen.add(el.name);
+            const group = controls.filter((r) => r.type === "radio" && r.name === el.name);
+            const options = group.map((r) => [text(r.labels && r.labels[0]) || text(r.nextSibling) || r.value, r.value]);
+            found.push({ kind: "radio", param: slug(el.name), name: el.name, options });
+        } else if (el.tagName === "SELECT") {
+            const options = [...el.options].map((o) => [o.text.trim(), o.value]);
+            found.push({ kind: "select", param: slug(labelOf(el)) || slug(el.name), index, options });
+        } else {
+            found.push({ kind: "text", param: slug(labelOf(el)) || slug(el.name), index });
+        }
+    });
+    const counts = {};
+    for (const control of found) {
+        counts[control.param] = (counts[control.param] || 0) + 1;
+        if (counts[control.param] > 1) control.param += `_${counts[control.param]}`;
+    }
+    return found;
+}
+"""
+FORM_CONTROLS = "input, select"
+
+
+async def fill_search_form(page, title: str) -> Tuple[Dict[str, str], Dict[str, Dict[str, str]]]:
+    """
+    Fill the search form titled `title` with sentinel values and submit it:
+    text inputs get `__<param>__`, dropdowns and radio groups their last option.
+    """
+    form = (
+        page.get_by_role("listitem")
+        .filter(has_text=title)
+        .filter(has=page.locator("input:not([type=hidden])"))
+        .last
+    )
+    sentinels, choices = {}, {}
+    for control in await form.evaluate(FORM_CONTROLS_JS):
+        param = control["param"]
+        if control["kind"] == "text":
+            sentinels[param] = f"__{param}__"
+            await form.locator(FORM_CONTROLS).nth(control["index"]).fill(sentinels[param])
+        elif control["kind"] == "select":
+            choices[param] = dict(control["options"])
+            sentinels[param] = (await form.locator(FORM_CONTROLS).nth(control["index"]).select_option(
+                control["options"][-1][1]
+            ))[0]
+        else:
+            choices[param] = dict(control["options"])
+            await form.locator(f'input[type=radio][name="{control["name"]}"]').last.check()
+            sentinels[param] = control["options"][-1][1]
+    await form.get_by_role("button", name=re.compile("search", re.IGNORECASE)).first.click()
+    return sentinels, choices
+
+
+async def fill_epd_form(page) -> Tuple[Dict[str, str], Dict[str, Dict[str, str]]]:
+    return await fill_search_form(page, "EPD Search")
+
+
+async def fill_animal_form(page) -> Tuple[Dict[str, str], Dict[str, Dict[str, str]]]:
+    return await fill_search_form(page, "Animal Search")
+
+
+FORM_FILLERS: Dict[str, Callable[..., Awaitable]] = {
+    "ranch": fill_ranch_form,
+    "epd": fill_epd_form,
+    "animal": fill_animal_form,
+}
+
+
+def map_params(sentinels: Dict[str, str], fields: List[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    Parameter name -> field name, for the submitted field carrying each
+    parameter's sentinel. A field is mapped once, so parameters whose
+    sentinels collide (e.g. two dropdowns set to "0") don't share it.
+    """
+    params, used = {}, set()
+    for param, sentinel in sentinels.items():
+        field = next((f for f, value in fields if value == sentinel and f not in used), None)
+        if field is not None:
+            params[param] = field
+            used.add(field)
+    return params
+
+
+async def record_form(name: str, url: str = SHORTHORN_URL, headless: bool = True) -> FormTemplate:
+    """
+    Record the request a form submission sends. Known forms are filled
+    automatically with sentinel values so parameters can be mapped to field
+    names; for other forms a browser window opens and the first submission
+    made by hand is recorded with raw field names.
+    """
+    from playwright.async_api import async_playwright
+
+    fill = FORM_FILLERS.get(name)
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless and fill is not None)
+        page = await browser.new_page()
+        await page.goto(url)
+
+        def is_submission(request) -> bool:
+            if request.resource_type not in ("document", "xhr", "fetch"):
+                return False
+            return request.method == "POST" or bool(urlsplit(request.url).query)
+
+        async with page.expect_request(is_submission, timeout=0 if fill is None else 30000) as request_info:
+            if fill is not None:
+                sentinels, choices = await fill(page)
+            else:
+                print("Fill in and submit the form in the browser window...")
+                sentinels, choices = {}, {}
+        request = await request_info.value
+        headers = await request.all_headers()
+        await browser.close()
+
+    method = request.method
+    target, fields = _submitted_fields(method, request.url, request.post_data)
+    params = map_params(sentinels, fields)
+    template = FormTemplate(
+        name=name,
+        page_url=url,
+        method=method,
+        url=target,
+        headers={k: v for k, v in headers.items() if k.lower() in REPLAYED_HEADERS},
+        fields=fields,
+        params=params,
+        choices={param: options for param, options in choices.items() if param in params},
+    )
+    FORMS_DIR.mkdir(parents=True, exist_ok=True)
+    template_path(name).write_text(template.model_dump_json(indent=2))
+    return template
+
+
+_hidden_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+
+async def _page_hidden_inputs(page_url: str, refresh: bool = False) -> Dict[str, str]:
+    """
+    Hidden inputs of a form page, cached for REPLAY_HIDDEN_TTL seconds. Pages
+    without hidden inputs are not cached, in case the fetch got an error page.
+    """
+    ttl = float(os.getenv("REPLAY_HIDDEN_TTL") or HIDDEN_TTL)
+    cached = _hidden_cache.get(page_url)
+    if cached and not refresh and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    response = await get_http_client().get(page_url)
+    response.raise_for_status()
+    values = hidden_inputs(response.text)
+    if values:
+        _hidden_cache[page_url] = (time.monotonic(), values)
+    else:
+        _hidden_cache.pop(page_url, None)
+    return values
+
+
+async def submit_form(template: FormTemplate, values: Dict[str, str]) -> str:
+    """
+    Replay a recorded form over the pooled HTTP client and return the response
+    body. A rejected submission is retried once with freshly fetched hidden inputs.
+    """
+    client = get_http_client()
+    recorded = {field for field, _ in template.fields}
+    for refresh in (False, True):
+        page_hidden = await _page_hidden_inputs(template.page_url, refresh)
+        fields = template.build(values, {k: v for k, v in page_hidden.items() if k in recorded})
+        if template.method == "GET":
+            response = await client.get(template.url, params=fields, headers=template.headers)
+        else:
+            headers = {"content-type": "application/x-www-form-urlencoded", **template.headers}
+            response = await client.request(template.method, template.url, content=urlencode(fields), headers=headers)
+        if response.is_success:
+            break
+    response.raise_for_status()
+    return response.text
+
+
+async def replay_query(
+    name: str,
+    batch_size: int = BATCH_SIZE,
+    concurrency: int = CONCURRENCY,
+    **values: str,
+) -> List[BaseModel]:
+    """
+    Run a recorded search with new parameters and return the result rows,
+    e.g. replay_query("ranch", state="Alabama").
+    """
+    start = time.perf_counter()
+    template = load_template(name)
+    page_html = await submit_form(template, values)
+    fetched = time.perf_counter()
+    model, skip, extra_prompt = FORM_RESULTS[name]
+    rows = iter_rows(page_html, skip=skip)
+    results = await extract_rows(
+        create_chat(), rows, model, extra_prompt, batch_size=batch_size, concurrency=concurrency,
+        headers=result_headers(page_html, skip),
+    )
+    print(
+        f"Replayed {name} search in {(time.perf_counter() - start) * 1000:.0f}ms "
+        f"(request {(fetched - start) * 1000:.0f}ms), {len(results)} rows"
+    )
+    return results
+
+
+async def search_ranch(
+    state: Optional[str] = None,
+    prefix: Optional[str] = None,
+    member_id: Optional[str] = None,
+    name: Optional[str] = None,
+    city: Optional[str] = None,
+) -> List[RanchProfile]:
+    return await replay_query(
+        "ranch", state=state, prefix=prefix, member_id=member_id, name=name, city=city
+    )
+
+
+async def _cli(args):
+    try:
+        if args.command == "record":
+            template = await record_form(args.form, args.url, headless=not args.headful)
+            print(f"Recorded {template.method} {template.url} -> {template_path(args.form)}")
+            print(f"Parameters: {template.params or [field for field, _ in template.fields]}")
+        else:
+            values = dict(value.split("=", 1) for value in args.values)
+            results = await replay_query(args.form, **values)
+            for result in results:
+                print(result.model_dump_json())
+    finally:
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record and replay digitalbeef search forms without a browser agent.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record = subparsers.add_parser("record", help="Record a form submission once")
+    record.add_argument("form", choices=list(FORM_RESULTS))
+    record.add_argument("--url", type=str, default=SHORTHORN_URL)
+    record.add_argument("--headful", action="store_true", help="Show the browser while recording")
+    query = subparsers.add_parser("query", help="Replay a recorded form, e.g. query ranch state=alabama")
+    query.add_argument("form", choices=list(FORM_RESULTS))
+    query.add_argument("values", nargs="*", help="parameter=value pairs")
+    asyncio.run(_cli(parser.parse_args()))
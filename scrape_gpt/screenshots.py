@@ -0,0 +1,128 @@
+import base64
+import math
+import os
+from io import BytesIO
+from typing import Literal, Optional
+
+from dotenv import load_dotenv
+from langchain_core.prompt_values import ChatPromptValue
+from PIL import Image
+from pydantic import BaseModel
+
+load_dotenv()
+
+class ScreenshotConfig(BaseModel):
+    max_width: int = 1024
+    format: Literal["jpeg", "png"] = "jpeg"
+    quality: int = 70
+    # Largest dHash distance (out of 256 bits) still treated as the same page
+    hash_threshold: int = 4
+
+    @classmethod
+    def from_env(cls) -> "ScreenshotConfig":
+        values = {
+            "max_width": os.getenv("SCREENSHOT_MAX_WIDTH"),
+            "format": os.getenv("SCREENSHOT_FORMAT"),
+            "quality": os.getenv("SCREENSHOT_QUALITY"),
+            "hash_threshold": os.getenv("SCREENSHOT_HASH_THRESHOLD"),
+        }
+        return cls(**{k: v for k, v in values.items() if v})
+
+
+class Screenshot(BaseModel):
+    data: str
+    mime: str
+    width: int
+    height: int
+    size: int
+    hash: int
+    changed: bool
+
+
+def dhash(image: Image.Image, size: int = 16) -> int:
+    """
+    Difference hash: one bit per horizontally adjacent pixel pair of a tiny
+    grayscale copy, so small rendering noise doesn't change it.
+    """
+    pixels = image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR).tobytes()
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def vision_tokens(width: int, height: int) -> int:
+    """
+    Estimated image input tokens for a high-detail OpenAI vision request: fit in
+    2048x2048, shortest side down to 768, then 170 per 512px tile plus 85.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def encode_screenshot(
+    png: bytes,
+    config: Optional[ScreenshotConfig] = None,
+    previous_hash: Optional[int] = None,
+) -> Screenshot:
+    """
+    Downscale a PNG screenshot to `max_width`, re-encode it and tell whether it
+    differs from the screenshot with `previous_hash`.
+    """
+    config = config or ScreenshotConfig()
+    image = Image.open(BytesIO(png))
+    if image.width > config.max_width:
+        height = round(image.height * config.max_width / image.width)
+        image = image.resize((config.max_width, height), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    if config.format == "jpeg":
+        image.convert("RGB").save(buffer, "JPEG", quality=config.quality, optimize=True)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    image_hash = dhash(image)
+    return Screenshot(
+        data=base64.b64encode(buffer.getvalue()).decode(),
+        mime=f"image/{config.format}",
+        width=image.width,
+        height=image.height,
+        size=buffer.tell(),
+        hash=image_hash,
+        changed=previous_hash is None or hamming(image_hash, previous_hash) > config.hash_threshold,
+    )
+
+
+def _rewrite_image(part):
+    if not isinstance(part, dict) or part.get("type") != "image_url":
+        return part
+    image_url = part["image_url"]
+    url = image_url if isinstance(image_url, str) else image_url.get("url", "")
+    prefix, _, data = url.partition(";base64,")
+    if not prefix.startswith("data:image/"):
+        return part
+    # Prompt templates hardcode image/png; fix it up from the data itself
+    mime = "image/jpeg" if data.startswith("/9j/") else "image/png"
+    url = f"data:{mime};base64,{data}"
+    return {**part, "image_url": url if isinstance(image_url, str) else {**image_url, "url": url}}
+
+
+def rewrite_screenshot_messages(prompt_value: ChatPromptValue) -> ChatPromptValue:
+    """
+    Post-process a formatted prompt: set the real image mime type of the
+    screenshot, which the template hardcodes as PNG.
+    """
+    messages = []
+    for message in prompt_value.to_messages():
+        if isinstance(message.content, list):
+            message = message.model_copy(update={"content": [_rewrite_image(p) for p in message.content]})
+        messages.append(message)
+    return ChatPromptValue(messages=messages)
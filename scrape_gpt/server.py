@@ -0,0 +1,224 @@
+"""
+Long-running scrape server. Serves chat.main and app.main over a small JSON
+HTTP API on a TCP port or a Unix socket, so LLM clients, pooled browsers and
+loaded session tables stay warm across requests.
+
+    python -m scrape_gpt.server --port 8765
+    python -m scrape_gpt.server --socket ./.session_data/scrape_gpt.sock
+
+    curl -d '{"session_id": "medrecruit", "prompt": "..."}' http://127.0.0.1:8765/chat
+    curl --unix-socket ./.session_data/scrape_gpt.sock -d '{"prompt": "..."}' http://localhost/app
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import time
+from collections import defaultdict
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv()
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BODY_BYTES = 1 << 20
+# Imported before serving so the first request doesn't wait for them
+WARM_MODULES = ["scrape_gpt.app", "scrape_gpt.chat", "scrape_gpt.query_plan", "scrape_gpt.tools.create"]
+
+
+class RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+async def _chat_main(session_id: str, prompt: str, link: Optional[str] = None, mode: str = "plan"):
+    from scrape_gpt.chat import main
+
+    return await main(session_id, prompt, link, mode)
+
+
+async def _app_main(prompt: str):
+    from scrape_gpt.app import main
+
+    return await main(prompt)
+
+
+async def warm_up() -> None:
+    """
+    Import the agent code paths, build the shared LLM clients and pre-launch
+    the browser pool, so the first request doesn't pay for them.
+    """
+    start = time.perf_counter()
+    for module in WARM_MODULES:
+        importlib.import_module(module)
+    from scrape_gpt.browser_pool import get_browser_pool
+    from scrape_gpt.llm import create_chat, create_llm, load_model
+
+    await asyncio.gather(load_model("chat", create_chat), load_model("llm", create_llm))
+    try:
+        await get_browser_pool().start()
+    except Exception as e:
+        print(f"Browser pool not pre-launched, browsers start on first use: {e}")
+    print(f"Warm-up took {time.perf_counter() - start:.1f}s")
+
+
+class ScrapeServer:
+    """
+    Routes JSON requests to chat.main and app.main. Requests for the same
+    session run one at a time (they share its history and files); different
+    sessions and app.main requests run concurrently, bounded by the browser pool.
+    """
+
+    def __init__(
+        self,
+        chat_main: Callable[..., Awaitable[Tuple[Any, Any]]] = _chat_main,
+        app_main: Callable[[str], Awaitable[Any]] = _app_main,
+    ):
+        self.chat_main = chat_main
+        self.app_main = app_main
+        self._session_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.requests = 0
+        self.failures = 0
+        self.active = 0
+
+    async def chat(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        session_id, prompt = body.get("session_id"), body.get("prompt")
+        if not session_id or not prompt:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "session_id and prompt are required")
+        if os.path.basename(session_id) != session_id or session_id in (".", ".."):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid session_id {session_id!r}")
+        async with self._session_locks[session_id]:
+            text, results = await self.chat_main(session_id, prompt, body.get("link") or None, body.get("mode", "plan"))
+        return {"text": text, "results": _jsonable(results)}
+
+    async def app(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if not body.get("prompt"):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "prompt is required")
+        return {"result": _jsonable(await self.app_main(body["prompt"]))}
+
+    def health(self) -> Dict[str, Any]:
+        from scrape_gpt.browser_pool import pool_stats
+        from scrape_gpt.tools.runtime import tool_stats
+
+        return {
+            "status": "ok",
+            "requests": self.requests,
+            "failures": self.failures,
+            "active": self.active,
+            "sessions": sorted(self._session_locks),
+            "pools": pool_stats(),
+            "tools": tool_stats(),
+        }
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, self.health()
+        routes = {"/chat": self.chat, "/app": self.app}
+        if path not in routes:
+            return HTTPStatus.NOT_FOUND, {"error": f"No route {path}"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{path} only accepts POST"}
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON body: {e}"}
+        self.requests += 1
+        self.active += 1
+        start = time.perf_counter()
+        try:
+            result = await routes[path](payload)
+            return HTTPStatus.OK, {**result, "seconds": round(time.perf_counter() - start, 3)}
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            self.failures += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.active -= 1
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve one HTTP/1.1 request per connection.
+        """
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            headers = {}
+            while (line := (await reader.readline()).decode("latin-1").strip()):
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            try:
+                method, target, _ = request_line.split(" ", 2)
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                status, response = HTTPStatus.BAD_REQUEST, {"error": f"Malformed request {request_line!r}"}
+            else:
+                if length > MAX_BODY_BYTES:
+                    status, response = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large"}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = await self.dispatch(method, target.split("?", 1)[0], body)
+            data = json.dumps(response, default=str).encode()
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = HOST, port: int = PORT, socket_path: Optional[str] = None) -> asyncio.AbstractServer:
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            return await asyncio.start_unix_server(self.handle, path=socket_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(host: str = HOST, port: int = PORT, socket_path: Optional[str] = None, warm: bool = True) -> None:
+    from scrape_gpt.browser_pool import close_pools
+    from scrape_gpt.http_client import close_http_client
+
+    if warm:
+        await warm_up()
+    server = await ScrapeServer().start(host, port, socket_path)
+    print(f"Serving on {socket_path or f'http://{host}:{port}'}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await close_pools()
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve chat and app requests from a warm process.")
+    parser.add_argument("--host", type=str, default=os.getenv("SERVER_HOST") or HOST)
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT") or PORT))
+    parser.add_argument("--socket", type=str, default=os.getenv("SERVER_SOCKET") or None, help="Listen on a Unix socket instead")
+    parser.add_argument("--no-warm", action="store_true", help="Don't pre-load clients and browsers")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, not args.no_warm))
+    except KeyboardInterrupt:
+        pass
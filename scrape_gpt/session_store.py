@@ -0,0 +1,165 @@
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import psutil
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SESSION_DIR = Path("./.session_data")
+TABLES = "tables"
+# Loaded tables kept in memory across loads (per process, least recently used dropped first)
+FRAME_CACHE_SIZE = 32
+
+_frames: "OrderedDict[Tuple, Tuple[Tuple, pd.DataFrame]]" = OrderedDict()
+
+
+def _rss_mb() -> float:
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing numbers and text (e.g. "$1,000" next to 1000) are kept as text
+        mixed = {c: df[c].map(lambda v: None if pd.isna(v) else str(v)) for c in df.select_dtypes("object")}
+        return pa.Table.from_pandas(df.assign(**mixed), preserve_index=False)
+
+
+def _unify(schemas: List[pa.Schema]) -> pa.Schema:
+    try:
+        return pa.unify_schemas(schemas, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # A column typed differently across parts (a number in one, text in another) is kept as text
+        types: Dict[str, set] = {}
+        for schema in schemas:
+            for field in schema:
+                if field.type != pa.null():
+                    types.setdefault(field.name, set()).add(field.type)
+        mixed = {name for name, found in types.items() if len(found) > 1}
+        return pa.unify_schemas(
+            [pa.schema([f.with_type(pa.string()) if f.name in mixed else f for f in s]) for s in schemas],
+            promote_options="permissive",
+        )
+
+
+class SessionStore:
+    """
+    Typed, append-only Parquet tables of a chat session, stored as
+    `.session_data/{session_id}/store/{namespace}/{table}/part-*.parquet`.
+    Tables are read memory-mapped and only for the requested columns.
+    """
+
+    def __init__(self, session_dir: Path):
+        self.path = Path(session_dir) / "store"
+
+    @classmethod
+    def open(cls, session_id: str) -> "SessionStore":
+        return cls(SESSION_DIR / session_id)
+
+    def _parts(self, table: str, namespace: str = TABLES) -> List[Path]:
+        return sorted((self.path / namespace / table).glob("part-*.parquet"))
+
+    def tables(self, namespace: str = TABLES) -> List[str]:
+        directory = self.path / namespace
+        if not directory.exists():
+            return []
+        return sorted(p.name for p in directory.iterdir() if p.is_dir() and any(p.glob("part-*.parquet")))
+
+    def next_table(self, prefix: str, namespace: str = TABLES) -> str:
+        """
+        Reserve the next `{prefix}_{n}` table by creating its directory, so
+        concurrent callers never get the same name.
+        """
+        directory = self.path / namespace
+        directory.mkdir(parents=True, exist_ok=True)
+        n = len([p for p in directory.iterdir() if p.name.startswith(f"{prefix}_")])
+        while True:
+            try:
+                (directory / f"{prefix}_{n}").mkdir()
+                return f"{prefix}_{n}"
+            except FileExistsError:
+                n += 1
+
+    def append(self, table: str, df: pd.DataFrame, namespace: str = TABLES) -> Path:
+        """
+        Add `df` to `table` as a new part file; existing parts are never rewritten.
+        Part names sort in append order and are unique, so concurrent appends
+        don't overwrite each other.
+        """
+        directory = self.path / namespace / table
+        directory.mkdir(parents=True, exist_ok=True)
+        part = directory / f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = part.with_suffix(".tmp")
+        pq.write_table(_to_arrow(df), tmp)
+        os.replace(tmp, part)
+        return part
+
+    def schema(self, table: str, namespace: str = TABLES) -> pa.Schema:
+        """
+        Unified schema of all parts, read from the Parquet footers only.
+        """
+        return _unify([pq.read_schema(part) for part in self._parts(table, namespace)])
+
+    def load(self, table: str, columns: Optional[List[str]] = None, namespace: str = TABLES) -> pd.DataFrame:
+        """
+        Read `table` memory-mapped, only the given `columns` (all by default).
+
+        Loaded tables stay cached (FRAME_CACHE_SIZE, 0 disables) until a part is
+        added or replaced, so a long-running process doesn't re-read them for
+        every prompt. Callers get their own copy.
+        """
+        parts = self._parts(table, namespace)
+        key = (str(self.path.resolve()), namespace, table, tuple(columns) if columns is not None else None)
+        signature = tuple((part.name, stat.st_mtime_ns, stat.st_size) for part in parts for stat in [part.stat()])
+        cached = _frames.get(key)
+        if cached is not None and cached[0] == signature:
+            _frames.move_to_end(key)
+            return cached[1].copy()
+        df = self._read(parts, table, columns, namespace)
+        cache_size = int(os.getenv("FRAME_CACHE_SIZE") or FRAME_CACHE_SIZE)
+        if cache_size > 0:
+            _frames[key] = (signature, df)
+            _frames.move_to_end(key)
+            while len(_frames) > cache_size:
+                _frames.popitem(last=False)
+            df = df.copy()
+        return df
+
+    def _read(
+        self, parts: List[Path], table: str, columns: Optional[List[str]], namespace: str
+    ) -> pd.DataFrame:
+        tables = []
+        for part in parts:
+            names = pq.read_schema(part).names
+            wanted = names if columns is None else [c for c in columns if c in names]
+            tables.append(pq.read_table(part, columns=wanted, memory_map=True))
+        if not tables:
+            raise FileNotFoundError(f"Table {namespace}/{table} not found in {self.path}")
+        schema = _unify([t.schema for t in tables])
+        tables = [t.cast(pa.schema([schema.field(name) for name in t.schema.names])) for t in tables]
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+    def iter_parts(self, table: str, namespace: str = TABLES) -> Iterator[pd.DataFrame]:
+        """
+        Read `table` one part at a time, in the order the parts were appended.
+        """
+        for part in self._parts(table, namespace):
+            yield pq.read_table(part, memory_map=True).to_pandas()
+
+    def load_all(self, columns: Optional[List[str]] = None, namespace: str = TABLES) -> Dict[str, pd.DataFrame]:
+        """
+        Load every table of the namespace and report the time and resident memory it took.
+        """
+        start, rss = time.perf_counter(), _rss_mb()
+        frames = {table: self.load(table, columns, namespace) for table in self.tables(namespace)}
+        print(
+            f"Loaded {len(frames)} tables ({sum(len(df) for df in frames.values())} rows) from {self.path} "
+            f"in {(time.perf_counter() - start) * 1000:.0f}ms, RSS +{_rss_mb() - rss:.1f}MB"
+        )
+        return frames
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from scrape_gpt.cdp import evaluate
+from scrape_gpt.tracing import span
+
+load_dotenv()
+
+QUIET_MS = 500
+SETTLE_TIMEOUT = 15.0
+
+# Resolves once the document is loaded, no fetch/XHR is in flight, neither the
+# network nor the DOM changed for `quietMs` and `selector` (if any) matches,
+# or with settled=false after `timeoutMs`. Network counters are installed on
+# the first call in each document.
+SETTLE_JS = """
+(async (selector, quietMs, timeoutMs) => {
+  const start = performance.now();
+  if (!window.__scrapeGptNet) {
+    const net = (window.__scrapeGptNet = { inflight: 0, last: performance.now() });
+    const done = () => { net.inflight = Math.max(0, net.inflight - 1); net.last = performance.now(); };
+    const fetch = window.fetch;
+    window.fetch = function () {
+      net.inflight++;
+      return fetch.apply(this, arguments).finally(done);
+    };
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+      net.inflight++;
+      this.addEventListener("loadend", done, { once: true });
+      return send.apply(this, arguments);
+    };
+    try {
+      new PerformanceObserver(() => { net.last = performance.now(); }).observe({ type: "resource" });
+    } catch (e) {}
+  }
+  const net = window.__scrapeGptNet;
+  let lastMutation = start;
+  const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+  observer.observe(document.documentElement, { subtree: true, childList: true, attributes: true, characterData: true });
+  try {
+    for (;;) {
+      const now = performance.now();
+      const found = !selector || !!document.querySelector(selector);
+      const quiet = now - lastMutation >= quietMs && now - net.last >= quietMs && net.inflight === 0;
+      if (document.readyState === "complete" && found && quiet) {
+        return { settled: true, ms: Math.round(now - start) };
+      }
+      if (now - start >= timeoutMs) {
+        return { settled: false, ms: Math.round(now - start), found, pending: net.inflight };
+      }
+      await new Promise((resolve) => setTimeout(resolve, 50));
+    }
+  } finally {
+    observer.disconnect();
+  }
+})
+"""
+
+
+class SettleResult(BaseModel):
+    settled: bool
+    seconds: float
+    found: bool = True
+    pending: int = 0
+
+    def describe(self) -> str:
+        if self.settled:
+            return f"Page settled after {self.seconds:.1f}s."
+        reason = "selector not found" if not self.found else f"{self.pending} requests pending"
+        return f"Page still busy after {self.seconds:.1f}s ({reason})."
+
+
+async def wait_for_settle(
+    evaluate_js: Callable[[str], Awaitable[Any]],
+    selector: Optional[str] = None,
+    quiet_ms: int = QUIET_MS,
+    timeout: Optional[float] = None,
+) -> SettleResult:
+    """
+    Wait until the page is idle (network and DOM quiet for `quiet_ms`) and
+    `selector` is present, at most `timeout` seconds (SETTLE_TIMEOUT). A
+    navigation during the wait just restarts it in the new document.
+    """
+    timeout = float(os.getenv("SETTLE_TIMEOUT") or SETTLE_TIMEOUT) if timeout is None else timeout
+    start = time.perf_counter()
+    result = None
+    with span("settle", "browser", selector=selector) as current:
+        while (remaining := timeout - (time.perf_counter() - start)) > 0:
+            expression = f"{SETTLE_JS}({json.dumps(selector or '')}, {quiet_ms}, {int(remaining * 1000)})"
+            try:
+                result = await evaluate_js(expression)
+                break
+            except Exception:
+                # The document was replaced while waiting
+                await asyncio.sleep(0.1)
+        if current is not None:
+            current.attrs["settled"] = bool(result and result.get("settled"))
+    return SettleResult(
+        settled=bool(result and result.get("settled")),
+        seconds=time.perf_counter() - start,
+        found=(result or {}).get("found", not selector),
+        pending=(result or {}).get("pending", 0),
+    )
+
+
+async def settle_page(
+    page, selector: Optional[str] = None, quiet_ms: int = QUIET_MS, timeout: Optional[float] = None
+) -> SettleResult:
+    """
+    wait_for_settle for a Playwright page.
+    """
+    return await wait_for_settle(page.evaluate, selector, quiet_ms, timeout)
+
+
+async def settle_session(
+    browser_session, selector: Optional[str] = None, quiet_ms: int = QUIET_MS, timeout: Optional[float] = None
+) -> SettleResult:
+    """
+    wait_for_settle for a browser_use session, over CDP.
+    """
+    return await wait_for_settle(lambda expression: evaluate(browser_session, expression), selector, quiet_ms, timeout)
@@ -0,0 +1,52 @@
+import csv
+from typing import Any, Dict, Optional, TextIO
+
+from pydantic import BaseModel
+
+
+def flatten(row: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten nested dictionaries into `parent_child` columns, e.g. an EPD `Cell`
+    becomes ce_direct_epd, ce_direct_change, ce_direct_acc and ce_direct_rank.
+    """
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}_"))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+class RowWriter:
+    """
+    Write validated rows to an NDJSON or CSV file as they arrive, flushing after
+    every row so consumers can tail the file.
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None):
+        self.path = path
+        self.format = format or ("csv" if path.endswith(".csv") else "ndjson")
+        self.count = 0
+        self._file: Optional[TextIO] = None
+        self._csv: Optional[csv.DictWriter] = None
+
+    def __enter__(self) -> "RowWriter":
+        self._file = open(self.path, "w", newline="")
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+    def write(self, row: BaseModel):
+        if self.format == "csv":
+            data = flatten(row.model_dump())
+            if self._csv is None:
+                self._csv = csv.DictWriter(self._file, fieldnames=list(data))
+                self._csv.writeheader()
+            self._csv.writerow(data)
+        else:
+            self._file.write(row.model_dump_json() + "\n")
+        self._file.flush()
+        self.count += 1
+
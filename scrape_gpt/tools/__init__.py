@@ -1 +1,7 @@
-from scrape_gpt.tools.create import create_tools
+def __getattr__(name):
+    # Importing the tools pulls in browser_use and scrapegraphai; only do that when they're used
+    if name == "create_tools":
+        from scrape_gpt.tools.create import create_tools
+
+        return create_tools
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
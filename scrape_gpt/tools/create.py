@@ -5,39 +5,33 @@ from browser_use import ActionResult, BrowserSession
 from browser_use.filesystem.file_system import FileSystem
 from scrapegraphai.graphs import SmartScraperGraph
 
+from scrape_gpt.cdp import evaluate, get_page_html
+from scrape_gpt.links import LINKS_JS, dedupe_links, rank_links
+from scrape_gpt.llm_cache import get_llm_cache
+from scrape_gpt.prune import prune_html
 from scrape_gpt.tools.export_dataframe import export_dataframe
 from scrape_gpt.tools.extract_subpages import extract_info_from_subpages
+from scrape_gpt.tools.runtime import run_blocking
+from scrape_gpt.tools.wait import WAIT_DESCRIPTION, wait_for_page_settle
+from scrape_gpt.tracing import traced
 
 
-async def extract_links_from_dom(browser_session: BrowserSession):
+MAX_LINKS = 300
+
+
+async def extract_links_from_dom(browser_session: BrowserSession, query: str = ""):
     """
     Custom action that extract links from a webpage DOM.
     """
     try:
-        cdp_session = await browser_session.get_or_create_cdp_session()
-        body_id = await cdp_session.cdp_client.send.DOM.getDocument(
-            session_id=cdp_session.session_id
-        )
-        page_html_result = await cdp_session.cdp_client.send.DOM.getOuterHTML(
-            params={"backendNodeId": body_id["root"]["backendNodeId"]},
-            session_id=cdp_session.session_id,
-        )
-        page_html = page_html_result["outerHTML"]
-        current_url = await browser_session.get_current_page_url()
-
-        scraper = SmartScraperGraph(
-            prompt=f"Extract all links. Use full URL not only relative path. Current url is "
-            + current_url,
-            source=page_html,
-            config={
-                "llm": {
-                    "api_key": os.getenv("OPENAI_API_KEY"),
-                    "model": "gpt-4.1-mini",
-                },
-            },
-        )
-        result = scraper.run()
-        success_msg = f'✅ Extracted links {json.dumps(result["content"])}'
+        links = dedupe_links(await evaluate(browser_session, LINKS_JS) or [])
+        if query:
+            links = rank_links(links, query)
+        shown = links[:MAX_LINKS]
+        success_msg = f"✅ Extracted {len(links)} links"
+        if len(shown) < len(links):
+            success_msg += f" (showing {'most relevant' if query else 'first'} {len(shown)})"
+        success_msg += f" {json.dumps(shown, ensure_ascii=False)}"
 
         return ActionResult(
             extracted_content=success_msg,
@@ -58,27 +52,21 @@ async def extract_current_page_info(
     """
     try:
 
-        cdp_session = await browser_session.get_or_create_cdp_session()
-        body_id = await cdp_session.cdp_client.send.DOM.getDocument(
-            session_id=cdp_session.session_id
-        )
-        page_html_result = await cdp_session.cdp_client.send.DOM.getOuterHTML(
-            params={"backendNodeId": body_id["root"]["backendNodeId"]},
-            session_id=cdp_session.session_id,
-        )
-        page_html = page_html_result["outerHTML"]
+        page_html = await get_page_html(browser_session)
+        pruned = prune_html(page_html, label="extract_current_page_info")
 
         scraper = SmartScraperGraph(
             prompt=f"Extract {information_to_find}.",
-            source=page_html,
+            source=pruned.text,
             config={
                 "llm": {
                     "api_key": os.getenv("OPENAI_API_KEY"),
                     "model": "gpt-4.1-mini",
+                    "cache": get_llm_cache(),
                 },
             },
         )
-        result = scraper.run()
+        result = await run_blocking("extract_current_page_info", scraper.run)
         extracted_content = json.dumps(result)
 
         save_result = await file_system.save_extracted_content(extracted_content)
@@ -100,16 +88,17 @@ def create_tools():
 
     tools = Tools(exclude_actions=["extract_structured_data"])
     _ = tools.registry.action(
-        "Extract links from a webpage DOM using a specialized agent"
-    )(extract_links_from_dom)
+        "Extract all links (text and absolute URL) from the current page DOM, optionally ranked by relevance to a query e.g. extract_links_from_dom with param {query: 'job details'}"
+    )(traced("tool")(extract_links_from_dom))
     _ = tools.registry.action(
         "Extract information from several subpage links using a specialized agent e.g. extract_info_from_subpages with param {information_to_find: 'job details', subpage_links_to_extract: ['link1', 'link2']}"
-    )(extract_info_from_subpages)
+    )(traced("tool")(extract_info_from_subpages))
     _ = tools.registry.action(
         "Extract information from current page using a specialized agent"
-    )(extract_current_page_info)
+    )(traced("tool")(extract_current_page_info))
     _ = tools.registry.action(
         "Export previous extracted_content_ to a pandas dataframe"
-    )(export_dataframe)
+    )(traced("tool")(export_dataframe))
+    _ = tools.registry.action(WAIT_DESCRIPTION)(traced("tool")(wait_for_page_settle))
 
     return tools
@@ -1,5 +1,6 @@
-
+import asyncio
 import os
+import re
 from typing import Any, Dict, List
 
 import pandas as pd
@@ -11,8 +12,16 @@ from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
+from scrape_gpt.llm_cache import get_llm_cache
+from scrape_gpt.prune import estimate_tokens
+from scrape_gpt.session_store import SessionStore
+from scrape_gpt.sinks import flatten
+
 load_dotenv()
 
+MAX_CHUNK_TOKENS = 6000
+CONCURRENCY = 4
+
 desc = "Export previous extracted information to a pandas dataframe."
 
 
@@ -22,17 +31,50 @@ class CsvData(BaseModel):
     )
 
 
+def chunk_text(text: str, max_tokens: int = MAX_CHUNK_TOKENS) -> List[str]:
+    """
+    Split extracted content into chunks of about `max_tokens`, on blank lines
+    where possible and on single lines for oversized paragraphs.
+    """
+    chunks, current, size = [], [], 0
+    for block in re.split(r"\n\s*\n", text):
+        pieces = [block] if estimate_tokens(block) <= max_tokens else block.splitlines()
+        for piece in pieces:
+            tokens = estimate_tokens(piece) + 1
+            if current and size + tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def column_key(name: str) -> str:
+    """
+    Key under which spellings of the same column from different chunks are
+    unified, e.g. "Job Title" and "job_title".
+    """
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+
+
+def response_rows(response: Any) -> List[Dict[str, Any]]:
+    if isinstance(response, dict):
+        response = response.get("data", [response])
+    return [flatten(row) for row in response or [] if isinstance(row, dict)]
+
+
 async def export_dataframe(file_to_export: List[str], file_system: FileSystem):
     """
     Custom action that export previous extracted information to a pandas dataframe.
     """
     try:
-        file_content = ""
+        chunks = []
         for file in file_to_export:
             if file not in file_system.files:
                 return ActionResult(error=f'❌ File "{file}" not found in the file system.')
-            file_content += await file_system.read_file(file)
-            file_content += "\n"
+            chunks.extend(chunk_text(await file_system.read_file(file)))
 
         example = """
         [
@@ -51,36 +93,75 @@ async def export_dataframe(file_to_export: List[str], file_system: FileSystem):
         use rate_type column to determine if rate is per hour or per year and convert accordingly.
         Break down complex attributes into simpler ones if needed.
         e.g. location attribute should be broken down to city, state and country if possible.
+        The content is one part of a larger extraction; reuse these column names where they fit: {columns}
         Don't include any text other than the JSON dictionary in your response.
 
         {extracted_content}
         """
         llm = ChatOpenAI(
             api_key=os.getenv("OPENAI_API_KEY"),
-            model_name="gpt-4.1", temperature=0)
+            model_name="gpt-4.1", temperature=0, cache=get_llm_cache())
         parser = JsonOutputParser()
         prompt = PromptTemplate(
             template=template,
-            input_variables=["example", "extracted_content"],
+            input_variables=["example", "columns", "extracted_content"],
         )
         chain = prompt | llm | parser
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        columns: Dict[str, str] = {}
 
-        response = await chain.ainvoke({"example": example, "extracted_content": file_content})
-        df = pd.DataFrame(response)
+        async def convert(chunk: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                response = await chain.ainvoke({
+                    "example": example,
+                    "columns": ", ".join(columns.values()) or "none yet",
+                    "extracted_content": chunk,
+                })
+            return response_rows(response)
 
         initial_filename = f'extracted_csv_{file_system.extracted_content_count}'
         extracted_filename = f'{initial_filename}.csv'
-        content_example = df.head().to_string()
+        output_path = file_system.data_dir / extracted_filename
+        store = SessionStore(file_system.base_dir.parent)
+        table = store.next_table("extracted_csv")
+        tasks = [asyncio.create_task(convert(chunk)) for chunk in chunks[:1]]
+        head: List[Dict[str, Any]] = []
+        count = 0
+        try:
+            # Convert the first chunk alone, so every other chunk is prompted with its columns
+            if tasks:
+                for row in await tasks[0]:
+                    for k in row:
+                        columns.setdefault(column_key(k), k)
+            tasks += [asyncio.create_task(convert(chunk)) for chunk in chunks[1:]]
+            # Each converted chunk becomes its own part of the session table as it arrives
+            for task in tasks:
+                rows = [{columns.setdefault(column_key(k), k): v for k, v in row.items()} for row in await task]
+                if rows:
+                    store.append(table, pd.DataFrame(rows))
+                head.extend(rows[:5 - len(head)])
+                count += len(rows)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if not count:
+            return ActionResult(error="❌ Extract dataframe(s) failed: no rows found in the extracted content.")
+
+        # The CSV is written once, part by part, with the final header
+        fieldnames = list(columns.values())
+        with open(output_path, "w", newline="") as f:
+            for i, part in enumerate(store.iter_parts(table)):
+                part.reindex(columns=fieldnames).to_csv(f, header=i == 0, index=False)
+
+        content_example = pd.DataFrame(head, columns=fieldnames).to_string()
         file_obj = CsvFile(name=initial_filename, content=content_example)
-        df.to_csv(file_system.data_dir / extracted_filename, index=False)
-        df.to_csv(file_system.base_dir.parent / extracted_filename, index=False)
         file_system.files[extracted_filename] = file_obj
         file_system.extracted_content_count += 1
 
-        success_msg = f'✅ Extracted dataframe saved to {extracted_filename} successfully.'
+        success_msg = f'✅ Extracted dataframe saved to {extracted_filename} successfully ({count} rows from {len(chunks)} chunks).'
 
         return ActionResult(extracted_content=success_msg + content_example, include_in_memory=True, long_term_memory=success_msg)
 
     except Exception as e:
         error_msg = f'❌ Extract dataframe(s) failed: {str(e)}'
-        return ActionResult(error=error_msg)
\ No newline at end of file
+        return ActionResult(error=error_msg)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 from typing import List
@@ -5,7 +6,12 @@ from typing import List
 from browser_use import ActionResult
 from browser_use.filesystem.file_system import FileSystem
 from pydantic import BaseModel, Field
-from scrapegraphai.graphs import SmartScraperMultiLiteGraph
+from scrapegraphai.graphs import SmartScraperGraph
+
+from scrape_gpt.fetch import FetchedPage, iter_fetch
+from scrape_gpt.llm_cache import get_llm_cache
+from scrape_gpt.prune import prune_html
+from scrape_gpt.tools.runtime import run_blocking
 
 
 class ExtractInfoInput(BaseModel):
@@ -17,24 +23,41 @@ class ExtractInfoInput(BaseModel):
     )
 
 
+async def extract_page_info(page: FetchedPage, information_to_find: str) -> dict:
+    """
+    Extract the requested information from one fetched subpage.
+    """
+    if page.error:
+        return {"url": page.url, "error": page.error}
+    scraper = SmartScraperGraph(
+        prompt=f"Extract {information_to_find}",
+        source=prune_html(page.text).text,
+        config={
+            "llm": {
+                "api_key": os.getenv("OPENAI_API_KEY"),
+                "model": "gpt-4.1-mini",
+                "cache": get_llm_cache(),
+            },
+        },
+    )
+    try:
+        return {"url": page.url, "result": await run_blocking("extract_info_from_subpages", scraper.run)}
+    except Exception as e:
+        return {"url": page.url, "error": str(e)}
+
+
 async def extract_info_from_subpages(params: ExtractInfoInput, file_system: FileSystem, available_file_paths: List[str]):
     """
     Custom action that extract information from subpage links.
     """
     try:
+        links = params["subpage_links_to_extract"]
+        tasks = []
+        async for page in iter_fetch(links):
+            tasks.append(asyncio.create_task(extract_page_info(page, params["information_to_find"])))
+        results = {result["url"]: result for result in await asyncio.gather(*tasks)}
+        result = [results[url] for url in dict.fromkeys(links)]
 
-        scraper = SmartScraperMultiLiteGraph(
-            prompt=f"Extract {params['information_to_find']}",
-            source=params["subpage_links_to_extract"],
-            config={
-                "llm": {
-                    "api_key": os.getenv("OPENAI_API_KEY"),
-                    "model": "gpt-4.1-mini",
-                },
-            },
-        )
-        result = scraper.run()
-        
         extracted_content = json.dumps(result)
 
         save_result = await file_system.save_extracted_content(extracted_content)
@@ -0,0 +1,124 @@
+import asyncio
+import contextvars
+import os
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from scrape_gpt.tracing import span
+
+load_dotenv()
+
+TOOL_WORKERS = 4
+TOOL_TIMEOUT = 300.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class _ToolStats:
+    def __init__(self):
+        self.queue_seconds: List[float] = []
+        self.run_seconds: List[float] = []
+        self.failures = 0
+        self.timeouts = 0
+        self.cancelled = 0
+
+
+_stats: Dict[str, _ToolStats] = defaultdict(_ToolStats)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the bounded thread pool blocking tool work runs on (TOOL_WORKERS threads).
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("TOOL_WORKERS") or TOOL_WORKERS), thread_name_prefix="tool"
+        )
+    return _executor
+
+
+async def run_blocking(tool: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    Run the blocking call `fn(*args, **kwargs)` on the tool thread pool so the
+    event loop (CDP keep-alives, other tabs and sessions) keeps running, and
+    record how long it queued and ran under `tool`.
+
+    Raises TimeoutError after `timeout` seconds (TOOL_TIMEOUT by default). On
+    timeout or cancellation a call that hasn't started yet is dropped from the
+    queue; one that already started can't be interrupted and finishes in the
+    background, its result discarded.
+    """
+    timeout = float(os.getenv("TOOL_TIMEOUT") or TOOL_TIMEOUT) if timeout is None else timeout
+    stats = _stats[tool]
+    with span(tool, "tool") as current:
+        submitted = time.perf_counter()
+        started: List[float] = []
+        # Copied inside the tool's span, so spans opened by `fn` (e.g. LLM calls) nest under it
+        context = contextvars.copy_context()
+
+        def call():
+            started.append(time.perf_counter())
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                stats.run_seconds.append(time.perf_counter() - started[0])
+
+        future = asyncio.get_running_loop().run_in_executor(get_executor(), call)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise TimeoutError(f"{tool} timed out after {timeout:.0f}s") from None
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            queued = (started[0] if started else time.perf_counter()) - submitted
+            stats.queue_seconds.append(queued)
+            if current is not None:
+                current.attrs["queue_seconds"] = round(queued, 6)
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "max": 0.0}
+    return {
+        "mean": round(statistics.fmean(values), 3),
+        "p50": round(statistics.median(values), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def tool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Per-tool call counts and queue/run time summaries (seconds).
+    """
+    return {
+        tool: {
+            "calls": len(stats.queue_seconds),
+            "failures": stats.failures,
+            "timeouts": stats.timeouts,
+            "cancelled": stats.cancelled,
+            "queue_seconds": _summary(stats.queue_seconds),
+            "run_seconds": _summary(stats.run_seconds),
+        }
+        for tool, stats in _stats.items()
+    }
+
+
+def print_tool_stats() -> None:
+    for tool, stats in tool_stats().items():
+        print(
+            f"Tool {tool}: {stats['calls']} calls, {stats['failures']} failed, {stats['timeouts']} timed out, "
+            f"queued p50 {stats['queue_seconds']['p50']}s / max {stats['queue_seconds']['max']}s, "
+            f"ran p50 {stats['run_seconds']['p50']}s / max {stats['run_seconds']['max']}s"
+        )
@@ -0,0 +1,30 @@
+from browser_use import ActionResult, BrowserSession
+
+from scrape_gpt.settle import settle_session
+from scrape_gpt.tracing import traced
+
+WAIT_DESCRIPTION = (
+    "Wait until the page finished loading and updating (network and DOM idle), optionally until an element "
+    "matching a CSS selector appears, e.g. wait_for_page_settle with param {selector: 'table', timeout: 15}. "
+    "Use this instead of waiting a fixed number of seconds"
+)
+
+
+async def wait_for_page_settle(browser_session: BrowserSession, selector: str = "", timeout: float = 15):
+    """
+    Custom action that waits for the page to settle instead of sleeping.
+    """
+    result = await settle_session(browser_session, selector or None, timeout=timeout)
+    memory = result.describe()
+    return ActionResult(extracted_content=memory, include_in_memory=True, long_term_memory=memory)
+
+
+def create_search_tools():
+    """
+    Default browser actions plus wait_for_page_settle, for the search agents.
+    """
+    from browser_use import Tools
+
+    tools = Tools()
+    _ = tools.registry.action(WAIT_DESCRIPTION)(traced("tool")(wait_for_page_settle))
+    return tools
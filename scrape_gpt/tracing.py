@@ -0,0 +1,376 @@
+"""
+Lightweight run tracing: nested, timed spans for agent steps, LLM calls,
+browser actions and tools, written as JSON per session to
+`.session_data/{session_id}/traces/`. Outside a trace every span is a no-op.
+
+    python -m scrape_gpt.tracing summary medrecruit
+    python -m scrape_gpt.tracing summary .session_data/app/traces/20251018-101500-1234.json --top 20
+"""
+import argparse
+import functools
+import inspect
+import json
+import os
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID, uuid4
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SESSION_DIR = Path("./.session_data")
+# Spans kept per trace; later ones are counted but dropped, so a runaway loop can't exhaust memory
+MAX_SPANS = 50_000
+
+_trace: ContextVar[Optional["Trace"]] = ContextVar("scrape_gpt_trace", default=None)
+_parent: ContextVar[Optional["Span"]] = ContextVar("scrape_gpt_span", default=None)
+_llm_handler: ContextVar[Optional[Any]] = ContextVar("scrape_gpt_llm_tracer", default=None)
+_hook_registered = False
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "kind", "start", "end", "attrs", "error", "_trace")
+
+    def __init__(self, trace: "Trace", name: str, kind: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self._trace = trace
+        self.id = trace.next_id()
+        self.parent = parent.id if parent is not None else None
+        self.name = name
+        self.kind = kind
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.end is None:
+            self.end = time.perf_counter()
+            if error is not None:
+                self.error = f"{type(error).__name__}: {error}"
+            self._trace.add(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start - self._trace.start, 6),
+            "seconds": round((self.end or time.perf_counter()) - self.start, 6),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class Trace:
+    def __init__(self, session_id: str, max_spans: int = MAX_SPANS):
+        self.session_id = session_id
+        self.started_at = time.strftime("%Y%m%d-%H%M%S")
+        self.trace_id = uuid4().hex
+        self.start = time.perf_counter()
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._ids = 0
+
+    def next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    @property
+    def path(self) -> Path:
+        return SESSION_DIR / self.session_id / "traces" / f"{self.started_at}-{self.trace_id}.json"
+
+    def save(self) -> Path:
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "session_id": self.session_id,
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "seconds": round(time.perf_counter() - self.start, 6),
+            "dropped": self.dropped,
+            "spans": [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start)],
+        }
+        tmp = path.with_name(f".{path.stem}-{uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(data, default=str))
+        os.replace(tmp, path)
+        return path
+
+
+def tracing_enabled() -> bool:
+    return os.getenv("TRACE", "1") != "0"
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def begin_span(name: str, kind: str = "step", **attrs) -> Optional[Span]:
+    """
+    Open a span that is finished explicitly, for work that starts and ends in
+    different callbacks. Returns None outside a trace.
+    """
+    trace = _trace.get()
+    if trace is None:
+        return None
+    return Span(trace, name, kind, _parent.get(), attrs)
+
+
+@contextmanager
+def span(name: str, kind: str = "step", **attrs) -> Iterator[Optional[Span]]:
+    """
+    Time the block as a child of the current span. Yields the span (None
+    outside a trace) so the block can add attributes.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    current = Span(trace, name, kind, _parent.get(), attrs)
+    token = _parent.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    finally:
+        _reset(_parent, token)
+        current.finish()
+
+
+def _reset(var: ContextVar, token) -> None:
+    try:
+        var.reset(token)
+    except ValueError:
+        # Exited in another context, e.g. an async generator closed after being abandoned
+        pass
+
+
+def traced(kind: str = "step", name: Optional[str] = None):
+    """
+    Decorator running each call of a sync or async function in a span.
+    """
+
+    def decorate(fn):
+        span_name = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _llm_callback_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMSpanHandler(BaseCallbackHandler):
+        """
+        Records a span per LangChain chat model call with its model and token usage.
+        """
+
+        run_inline = True
+
+        def __init__(self):
+            self._spans: Dict[UUID, Span] = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(run_id, kwargs)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(run_id, kwargs)
+
+        def _start(self, run_id: UUID, kwargs: Dict[str, Any]) -> None:
+            params = kwargs.get("invocation_params") or {}
+            model = (
+                params.get("model") or params.get("model_name")
+                or (kwargs.get("metadata") or {}).get("ls_model_name") or "unknown"
+            )
+            current = begin_span("llm", "llm", model=model)
+            if current is not None:
+                self._spans[run_id] = current
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            current = self._spans.pop(run_id, None)
+            if current is None:
+                return
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+            if prompt_tokens is None:
+                for generations in response.generations:
+                    for generation in generations:
+                        metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                        prompt_tokens = (prompt_tokens or 0) + metadata.get("input_tokens", 0)
+                        completion_tokens = (completion_tokens or 0) + metadata.get("output_tokens", 0)
+            current.attrs.update(prompt_tokens=prompt_tokens or 0, completion_tokens=completion_tokens or 0)
+            current.finish()
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            current = self._spans.pop(run_id, None)
+            if current is not None:
+                current.finish(error)
+
+    return LLMSpanHandler()
+
+
+@contextmanager
+def start_trace(session_id: str, name: str = "run", **attrs) -> Iterator[Optional[Trace]]:
+    """
+    Trace everything run inside the block (including LangChain model calls and
+    blocking tool work) and write it to the session's traces directory. Inside
+    an active trace this is just a nested span. TRACE=0 disables tracing.
+    """
+    global _hook_registered
+    if _trace.get() is not None or not tracing_enabled():
+        with span(name, "run", **attrs):
+            yield _trace.get()
+        return
+    if not _hook_registered:
+        from langchain_core.tracers.context import register_configure_hook
+
+        register_configure_hook(_llm_handler, inheritable=True)
+        _hook_registered = True
+    trace = Trace(session_id)
+    tokens = [_trace.set(trace), _llm_handler.set(_llm_callback_handler())]
+    try:
+        with span(name, "run", session_id=session_id, **attrs):
+            yield trace
+    finally:
+        _reset(_llm_handler, tokens[1])
+        _reset(_trace, tokens[0])
+        path = trace.save()
+        print(f"Trace: {len(trace.spans)} spans written to {path}")
+
+
+def trace_llm(llm):
+    """
+    Record a span per call of a browser_use chat model, with its token usage.
+    Wraps the instance's `ainvoke` the way browser_use's own token counter does.
+    """
+    if getattr(llm, "_scrape_gpt_traced", False):
+        return llm
+    original = llm.ainvoke
+
+    async def ainvoke(messages, output_format=None):
+        with span("llm", "llm", model=getattr(llm, "model", "unknown")) as current:
+            result = await original(messages, output_format)
+            if current is not None and result.usage is not None:
+                current.attrs.update(
+                    prompt_tokens=result.usage.prompt_tokens, completion_tokens=result.usage.completion_tokens
+                )
+            return result
+
+    llm.ainvoke = ainvoke
+    llm._scrape_gpt_traced = True
+    return llm
+
+
+def agent_step_hooks():
+    """
+    on_step_start/on_step_end callbacks for browser_use's Agent.run that record
+    a span per agent step with the actions it took.
+    """
+    steps: List[Span] = []
+
+    async def on_step_start(agent):
+        current = begin_span("agent_step", "step", step=agent.state.n_steps)
+        if current is not None:
+            steps.append(current)
+
+    async def on_step_end(agent):
+        if not steps:
+            return
+        current = steps.pop()
+        try:
+            output = agent.history.history[-1].model_output if agent.history.history else None
+            if output is not None:
+                current.attrs["actions"] = [
+                    name for action in output.action for name in action.model_dump(exclude_unset=True)
+                ]
+            current.attrs["url"] = agent.history.history[-1].state.url
+        except (AttributeError, IndexError):
+            pass
+        current.finish()
+
+    return {"on_step_start": on_step_start, "on_step_end": on_step_end}
+
+
+def load_trace(target: str) -> Dict[str, Any]:
+    """
+    Read a trace file, or the latest trace of a session id.
+    """
+    path = Path(target)
+    if not path.is_file():
+        traces = sorted((SESSION_DIR / target / "traces").glob("*.json"), key=lambda p: p.stat().st_mtime)
+        if not traces:
+            raise FileNotFoundError(f"No traces for {target!r}")
+        path = traces[-1]
+    return json.loads(path.read_text())
+
+
+def summarize(trace: Dict[str, Any], top: int = 10) -> str:
+    """
+    Time, calls and tokens per (kind, name), slowest first, then the slowest single spans.
+    """
+    spans = [span for span in trace["spans"] if span["kind"] != "run"]
+    groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for span in spans:
+        name = f"{span['name']} [{span['attrs']['model']}]" if span["kind"] == "llm" else span["name"]
+        groups[(span["kind"], name)].append(span)
+    lines = [
+        f"Trace of {trace['session_id']} at {trace['started_at']}: {trace['seconds']:.1f}s, {len(spans)} spans"
+        + (f" ({trace['dropped']} dropped)" if trace.get("dropped") else ""),
+        f"{'kind':<8} {'name':<44} {'calls':>6} {'total s':>9} {'p50 s':>8} {'max s':>8} {'tokens in/out':>16}",
+    ]
+    rows = sorted(groups.items(), key=lambda item: -sum(s["seconds"] for s in item[1]))
+    for (kind, name), group in rows[:top]:
+        seconds = [s["seconds"] for s in group]
+        tokens = ""
+        if kind == "llm":
+            tokens = (
+                f"{sum(s['attrs'].get('prompt_tokens', 0) for s in group)}/"
+                f"{sum(s['attrs'].get('completion_tokens', 0) for s in group)}"
+            )
+        errors = sum(1 for s in group if s["error"])
+        lines.append(
+            f"{kind:<8} {name[:44]:<44} {len(group):>6} {sum(seconds):>9.2f} {statistics.median(seconds):>8.3f} "
+            f"{max(seconds):>8.2f} {tokens:>16}" + (f"  {errors} failed" if errors else "")
+        )
+    lines.append("Slowest spans:")
+    for span in sorted(spans, key=lambda s: -s["seconds"])[:top]:
+        lines.append(f"  {span['seconds']:8.2f}s  {span['kind']}/{span['name']} at {span['start']:.1f}s {span['attrs'] or ''}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize run traces.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary = subparsers.add_parser("summary", help="Show the top costs of a trace")
+    summary.add_argument("target", type=str, help="Session id (latest trace) or trace file")
+    summary.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    print(summarize(load_trace(args.target), args.top))
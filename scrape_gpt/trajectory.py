@@ -0,0 +1,140 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, Field
+
+TRAJECTORY_DIR = Path("./.session_data/trajectories")
+RECORDED_ACTIONS = {"Click", "Type", "Scroll", "Wait", "GoBack", "Google"}
+
+
+class Step(BaseModel):
+    action: str
+    url: str = Field(description="Page (scheme, host and path) the step was taken on")
+    selector: Optional[str] = Field(default=None, description="Target element, for element actions")
+    text: str = Field(default="", description="Target element text, with parameters as {name}")
+    args: List[str] = Field(default_factory=list, description="Other arguments, with parameters as {name}")
+
+
+class Trajectory(BaseModel):
+    template: str
+    steps: List[Step]
+
+
+def trajectory_path(template: str) -> Path:
+    return TRAJECTORY_DIR / f"{hashlib.sha256(template.encode()).hexdigest()[:16]}.json"
+
+
+def page_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def parameterize(text: str, params: Dict[str, str]) -> str:
+    """
+    Turn a concrete value into a template, e.g. "Kansas" -> "{state}".
+    """
+    text = text.replace("{", "{{").replace("}", "}}")
+    for name, value in sorted(params.items(), key=lambda item: -len(str(item[1]))):
+        value = str(value).replace("{", "{{").replace("}", "}}")
+        if value:
+            text = text.replace(value, f"{{{name}}}")
+    return text
+
+
+def _bbox_text(bbox: dict) -> str:
+    return (bbox.get("ariaLabel") or "").strip() or bbox.get("text") or ""
+
+
+def _targets_element(action: str, args: List[str]) -> bool:
+    return action in ("Click", "Type") or (action == "Scroll" and bool(args) and args[0].upper() != "WINDOW")
+
+
+class TrajectoryRun:
+    """
+    Records the actions of one agent run with stable element selectors, and
+    replays a trajectory recorded earlier for the same task template. Replay
+    stops at the first step whose page or target element doesn't match, and
+    the LLM takes over from there.
+    """
+
+    def __init__(self, template: str, params: Dict[str, str], recorded: Optional[Trajectory] = None):
+        self.template = template
+        self.params = params
+        self.recorded = recorded
+        self.steps: List[Step] = []
+        self.replayed = 0
+
+    @classmethod
+    def load(cls, template: str, params: Dict[str, str]) -> "TrajectoryRun":
+        path = trajectory_path(template)
+        recorded = Trajectory.model_validate_json(path.read_text()) if path.exists() else None
+        return cls(template, params, recorded)
+
+    @property
+    def replaying(self) -> bool:
+        return self.recorded is not None and self.replayed < len(self.recorded.steps)
+
+    def _diverge(self, reason: str) -> None:
+        print(f"Trajectory diverged at step {self.replayed + 1}: {reason}, asking the LLM")
+        self.recorded = None
+
+    async def next_prediction(self, page, bboxes: List[dict]) -> Optional[dict]:
+        """
+        The recorded action for the current page, or None when the LLM has to decide.
+        Recorded selectors are looked up among the elements marked on `page`.
+        """
+        if not self.replaying:
+            return None
+        step = self.recorded.steps[self.replayed]
+        if page_key(page.url) != step.url:
+            self._diverge(f"on {page_key(page.url)} instead of {step.url}")
+            return None
+        args = [arg.format(**self.params) for arg in step.args]
+        if step.selector is not None:
+            text = step.text.format(**self.params)
+            index = await page.evaluate("selector => markedIndex(selector)", step.selector) if step.selector else -1
+            if index < 0 or index >= len(bboxes) or (text and _bbox_text(bboxes[index]) != text):
+                self._diverge(f"no element {step.selector!r} with text {text!r}")
+                return None
+            args = [str(index), *args]
+        self.replayed += 1
+        return {"action": step.action, "args": args or None}
+
+    async def record(self, page, bboxes: List[dict], prediction: dict) -> None:
+        """
+        Record a predicted action, computing the selector of its target element only.
+        """
+        action = prediction["action"].strip().rstrip(";")
+        args = prediction.get("args") or []
+        if action not in RECORDED_ACTIONS:
+            return
+        selector, text = None, ""
+        if _targets_element(action, args):
+            try:
+                index = int(args[0])
+                bbox = bboxes[index]
+            except (ValueError, IndexError):
+                return
+            # An empty selector never matches, so replay hands this step to the LLM
+            selector = await page.evaluate("index => markedSelector(index)", index) or ""
+            text, args = _bbox_text(bbox), args[1:]
+        self.steps.append(
+            Step(
+                action=action,
+                url=page_key(page.url),
+                selector=selector,
+                text=parameterize(text, self.params),
+                args=[parameterize(arg, self.params) for arg in args],
+            )
+        )
+
+    def save(self) -> Path:
+        """
+        Store the actions of a successful run for the next run of the template.
+        """
+        path = trajectory_path(self.template)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(Trajectory(template=self.template, steps=self.steps).model_dump_json(indent=2))
+        return path
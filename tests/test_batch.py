@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+
+from scrape_gpt.batch import job_domain, run_batch
+from scrape_gpt.server import ScrapeServer
+
+
+def write_jobs(path, jobs):
+    path.write_text("".join(json.dumps(job) + "\n" for job in jobs))
+
+
+@pytest.mark.asyncio
+class TestBatch:
+    async def test_domain_and_worker_limits(self, tmp_path):
+        active, peak = {}, {}
+        total_peak = 0
+
+        async def app_main(prompt):
+            nonlocal total_peak
+            domain = job_domain({"prompt": prompt})
+            active[domain] = active.get(domain, 0) + 1
+            peak[domain] = max(peak.get(domain, 0), active[domain])
+            total_peak = max(total_peak, sum(active.values()))
+            await asyncio.sleep(0.02)
+            active[domain] -= 1
+            if "fail" in prompt:
+                raise RuntimeError("agent failed")
+            return [{"prompt": prompt}]
+
+        jobs = [{"prompt": f"navigate https://a.example/ job {i}"} for i in range(6)]
+        jobs += [{"prompt": f"navigate https://b.example/ job {i}"} for i in range(3)]
+        jobs += [{"id": "bad", "prompt": "navigate https://c.example/ fail"}]
+        write_jobs(tmp_path / "jobs.jsonl", jobs)
+        output = tmp_path / "results.jsonl"
+
+        summary = await run_batch(
+            str(tmp_path / "jobs.jsonl"), str(output), workers=3, per_domain=2, server=ScrapeServer(app_main=app_main)
+        )
+        assert peak["a.example"] == 2
+        assert total_peak <= 3
+        assert summary["ok"] == 9 and summary["failed"] == 1
+        assert summary["domains"] == {"a.example": 6, "b.example": 3, "c.example": 1}
+        records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+        assert records["bad"]["status"] == "failed" and "agent failed" in records["bad"]["error"]
+        assert records["1"]["result"] == [{"prompt": "navigate https://a.example/ job 0"}]
+
+    async def test_resume_skips_finished_jobs(self, tmp_path):
+        calls = []
+
+        async def chat_main(session_id, prompt, link, mode):
+            calls.append(prompt)
+            return "done", []
+
+        write_jobs(tmp_path / "jobs.jsonl", [{"id": "1", "session_id": "s", "prompt": "one"}, {"id": "2", "session_id": "s", "prompt": "two"}])
+        output = tmp_path / "results.jsonl"
+        output.write_text(json.dumps({"id": "1", "status": "ok"}) + "\n")
+
+        summary = await run_batch(str(tmp_path / "jobs.jsonl"), str(output), server=ScrapeServer(chat_main=chat_main))
+        assert calls == ["two"]
+        assert summary["jobs"] == 1
+        assert len(output.read_text().splitlines()) == 2
+
+    async def test_session_order_across_domains(self, tmp_path):
+        calls = []
+
+        async def chat_main(session_id, prompt, link, mode):
+            calls.append(prompt)
+            await asyncio.sleep(0.05 if session_id == "busy" else 0.01)
+            return "done", []
+
+        jobs = [{"session_id": "busy", "link": "https://a.example/", "prompt": f"busy {i}"} for i in range(2)]
+        jobs += [
+            {"session_id": "s", "link": "https://a.example/", "prompt": "first"},
+            {"session_id": "s", "link": "https://b.example/", "prompt": "second"},
+        ]
+        write_jobs(tmp_path / "jobs.jsonl", jobs)
+
+        summary = await run_batch(
+            str(tmp_path / "jobs.jsonl"), str(tmp_path / "results.jsonl"), workers=4, per_domain=1,
+            server=ScrapeServer(chat_main=chat_main),
+        )
+        assert summary["ok"] == 4
+        assert calls.index("first") < calls.index("second")
+
+    async def test_jobs_without_url_share_no_domain_limit(self, tmp_path):
+        active = peak = 0
+
+        async def chat_main(session_id, prompt, link, mode):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return "done", []
+
+        jobs = [{"session_id": f"s{i}", "prompt": "filter pay over 2000"} for i in range(4)]
+        write_jobs(tmp_path / "jobs.jsonl", jobs)
+
+        summary = await run_batch(
+            str(tmp_path / "jobs.jsonl"), str(tmp_path / "results.jsonl"), workers=4, per_domain=1,
+            server=ScrapeServer(chat_main=chat_main),
+        )
+        assert summary["ok"] == 4
+        assert peak == 4
@@ -0,0 +1,70 @@
+import pytest
+
+from scrape_gpt.browser_pool import BrowserPool, _Pooled
+
+PAGES = [
+    {"targetId": "A", "type": "page", "url": "https://www.amgr.org/frm_directorySearch.cfm"},
+    {"targetId": "B", "type": "page", "url": "https://www.shorthorn.org/modules.php?name=_epd"},
+    {"targetId": "W", "type": "service_worker", "url": "https://www.shorthorn.org/sw.js"},
+]
+
+
+class FakeCDP:
+    """
+    Records CDP calls as (method, params, session_id) and answers the few the
+    pool reads.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, domain):
+        return FakeDomain(self, domain)
+
+
+class FakeDomain:
+    def __init__(self, cdp, domain):
+        self.cdp, self.domain = cdp, domain
+
+    def __getattr__(self, method):
+        async def call(params=None, session_id=None):
+            name = f"{self.domain}.{method}"
+            self.cdp.calls.append((name, params, session_id))
+            if name == "Target.getTargets":
+                return {"targetInfos": PAGES}
+            if name == "Page.getNavigationHistory":
+                return {"entries": [{"url": "https://www.amgr.org/"}, {"url": "https://login.amgr.org/"}]}
+            return {}
+
+        return call
+
+
+class FakeSession:
+    def __init__(self, target_id, cdp):
+        self.target_id = target_id
+        self.session_id = f"session-{target_id}"
+        self.cdp_client = type("Client", (), {"send": cdp})()
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.cdp = FakeCDP()
+        self.cdp_client = type("Client", (), {"send": self.cdp})()
+        self.agent_focus = FakeSession("B", self.cdp)
+
+    async def get_or_create_cdp_session(self, target_id=None):
+        return FakeSession(target_id, self.cdp)
+
+
+@pytest.mark.asyncio
+class TestBrowserPool:
+    async def test_reset_wipes_tabs_and_storage(self):
+        browser = FakeBrowser()
+        await BrowserPool()._reset(_Pooled(browser, 0.0))
+        calls = [(name, params) for name, params, _ in browser.cdp.calls]
+        assert ("Target.closeTarget", {"targetId": "A"}) in calls
+        assert not any(name == "Target.closeTarget" and params["targetId"] != "A" for name, params in calls)
+        cleared = {params["origin"] for name, params in calls if name == "Storage.clearDataForOrigin"}
+        assert cleared == {"https://www.amgr.org", "https://www.shorthorn.org", "https://login.amgr.org"}
+        assert ("Page.navigate", {"url": "about:blank"}) in calls
+        assert ("Network.clearBrowserCookies", None) in calls
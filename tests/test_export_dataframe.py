@@ -0,0 +1,65 @@
+import asyncio
+import csv
+import json
+
+import pytest
+from browser_use.filesystem.file_system import FileSystem
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from scrape_gpt.prune import estimate_tokens
+from scrape_gpt.session_store import SessionStore
+from scrape_gpt.tools import export_dataframe as export_module
+from scrape_gpt.tools.export_dataframe import chunk_text, column_key, export_dataframe, response_rows
+
+
+class TestExportDataframe:
+    def test_chunk_text(self):
+        text = "\n\n".join(f"job {i}: " + "x" * 200 for i in range(20))
+        chunks = chunk_text(text, max_tokens=200)
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+        assert "\n\n".join(chunks) == text
+
+    def test_chunk_long_paragraph_by_lines(self):
+        text = "\n".join("y" * 100 for _ in range(10))
+        assert len(chunk_text(text, max_tokens=60)) == 5
+
+    def test_column_key(self):
+        assert column_key("Job Title") == column_key("job_title") == "job_title"
+
+    def test_response_rows(self):
+        assert response_rows({"data": [{"a": 1, "b": {"c": 2}}]}) == [{"a": 1, "b_c": 2}]
+        assert response_rows([{"a": 1}, "junk"]) == [{"a": 1}]
+
+
+@pytest.mark.asyncio
+class TestExportDataframeAction:
+    async def test_first_chunk_sets_columns(self, tmp_path, monkeypatch):
+        prompts = []
+
+        async def respond(prompt):
+            prompts.append(prompt.to_string())
+            n = len(prompts)
+            await asyncio.sleep(0.01)
+            title = "Job Title" if n == 1 else "job_title"
+            return AIMessage(content=json.dumps([{title: f"job {n}", "pay": 100}]))
+
+        monkeypatch.setattr(export_module, "ChatOpenAI", lambda **kwargs: RunnableLambda(respond))
+        file_system = FileSystem(tmp_path / "files")
+        await file_system.write_file("jobs.md", "\n\n".join(f"job {i}: " + "x" * 60 for i in range(3)))
+        monkeypatch.setattr(export_module, "chunk_text", lambda text: chunk_text(text, max_tokens=20))
+
+        result = await export_dataframe(["jobs.md"], file_system)
+        assert result.error is None, result.error
+        assert len(prompts) > 2
+        assert "none yet" in prompts[0]
+        assert all("Job Title, pay" in prompt for prompt in prompts[1:])
+        with open(file_system.data_dir / "extracted_csv_0.csv", newline="") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+        assert reader.fieldnames == ["Job Title", "pay"]
+        assert sorted(row["Job Title"] for row in rows) == [f"job {i}" for i in range(1, len(prompts) + 1)]
+        store = SessionStore(file_system.base_dir.parent)
+        assert len(list(store.iter_parts("extracted_csv_0"))) == len(prompts)
+        assert sorted(store.load("extracted_csv_0")["Job Title"]) == sorted(row["Job Title"] for row in rows)
@@ -0,0 +1,69 @@
+import asyncio
+import re
+
+import pytest
+from pydantic import BaseModel
+
+from scrape_gpt.extract_rows import iter_extract_rows
+
+
+class Cell(BaseModel):
+    value: str
+
+
+class FakeLLM:
+    """
+    Structured-output stand-in that echoes each row's text back and counts the
+    calls in flight.
+    """
+
+    def __init__(self):
+        self.active = self.peak = 0
+
+    def with_structured_output(self, model):
+        return FakeStructured(self, model)
+
+
+class FakeStructured:
+    def __init__(self, llm, model):
+        self.llm, self.model = llm, model
+
+    async def ainvoke(self, prompt):
+        self.llm.active += 1
+        self.llm.peak = max(self.llm.peak, self.llm.active)
+        await asyncio.sleep(0.01)
+        self.llm.active -= 1
+        values = re.findall(r"cell \d+", prompt)
+        if "rows" in self.model.model_fields:
+            return self.model(rows=[Cell(value=value) for value in values])
+        return Cell(value=values[0])
+
+
+@pytest.mark.asyncio
+class TestExtractRows:
+    async def test_lazy_and_bounded(self):
+        consumed = []
+
+        def rows():
+            for i in range(40):
+                consumed.append(i)
+                yield f"<tr><td>cell {i}</td></tr>"
+
+        llm = FakeLLM()
+        results = iter_extract_rows(llm, rows(), Cell, batch_size=2, concurrency=3, parse=False)
+        first = await anext(results)
+        assert first.value == "cell 0"
+        assert len(consumed) < 40
+        rest = [row.value async for row in results]
+        assert rest == [f"cell {i}" for i in range(1, 40)]
+        assert llm.peak <= 3
+
+    async def test_header_mapping(self):
+        rows = [f"<tr><td>cell {i}</td></tr>" for i in range(4)]
+        llm = FakeLLM()
+        results = [row.value async for row in iter_extract_rows(llm, rows, Cell, headers=["Value"])]
+        assert results == [f"cell {i}" for i in range(4)]
+        assert llm.peak == 0
+        results = [row.value async for row in iter_extract_rows(llm, rows, Cell, headers=["Photo"])]
+        assert results == [f"cell {i}" for i in range(4)]
+        assert llm.peak > 0
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scrape_gpt import http_client
+from scrape_gpt.fetch import HttpCache, iter_fetch
+
+
+def serve(requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/missing":
+            return httpx.Response(404, request=request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, request=request)
+        return httpx.Response(200, text=f"page {request.url.path}", headers={"ETag": '"v1"'}, request=request)
+
+    http_client._clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def fetch_all(urls, cache):
+    return {page.url: page async for page in iter_fetch(urls, per_host=2, delay=0, cache=cache)}
+
+
+@pytest.mark.asyncio
+class TestFetch:
+    async def test_fetch_pages(self, tmp_path):
+        requests = []
+        serve(requests)
+        pages = await fetch_all(
+            ["https://a.test/1", "https://a.test/2", "https://b.test/1", "https://a.test/1", "https://a.test/missing"],
+            HttpCache(tmp_path),
+        )
+        assert len(requests) == 4
+        assert pages["https://a.test/2"].text == "page /2"
+        assert pages["https://a.test/missing"].status == 404
+        assert pages["https://a.test/missing"].error
+
+    async def test_revalidate_cached_page(self, tmp_path):
+        requests = []
+        serve(requests)
+        cache = HttpCache(tmp_path)
+        await fetch_all(["https://a.test/1"], cache)
+        page = (await fetch_all(["https://a.test/1"], cache))["https://a.test/1"]
+        assert requests[-1].headers["if-none-match"] == '"v1"'
+        assert page.cached
+        assert page.text == "page /1"
+
+    async def test_politeness_delay(self, tmp_path):
+        serve([])
+        start = asyncio.get_running_loop().time()
+        async for _ in iter_fetch([f"https://a.test/{i}" for i in range(3)], per_host=3, delay=0.1, cache=HttpCache(tmp_path)):
+            pass
+        assert asyncio.get_running_loop().time() - start >= 0.2
@@ -0,0 +1,59 @@
+import json
+
+import pandas as pd
+
+from scrape_gpt.history import RESULTS, ChatHistory
+
+
+class TestChatHistory:
+    def test_results_by_reference(self, tmp_path):
+        history = ChatHistory(tmp_path)
+        history.append("user", "find jobs", link="https://example.com")
+        record = history.append("assistant", "2 jobs", [{"title": "GP", "pay": 2000}, {"title": "Nurse", "pay": 900}])
+        assert record["results_ref"]["rows"] == 2
+        line = (tmp_path / "chat_history.jsonl").read_text().splitlines()[-1]
+        assert "Nurse" not in line
+        assert history.results(history.recent(1)[0]) == [{"title": "GP", "pay": 2000}, {"title": "Nurse", "pay": 900}]
+        assert history.recent(2)[0]["link"] == "https://example.com"
+
+    def test_existing_table_by_reference(self, tmp_path):
+        history = ChatHistory(tmp_path)
+        rows = [{"title": "GP", "pay": 2000}]
+        history.store.append("extracted_csv_0", pd.DataFrame(rows))
+        record = history.append("assistant", "1 job", rows, table="extracted_csv_0")
+        assert record["results_ref"]["table"] == "extracted_csv_0"
+        assert history.store.tables(RESULTS) == []
+        assert history.results(history.recent(1)[0]) == rows
+
+    def test_recent_across_segments(self, tmp_path):
+        history = ChatHistory(tmp_path, segment_bytes=500)
+        for i in range(50):
+            history.append("user", f"prompt {i}")
+        assert len(history.segments()) > 1
+        assert [m["text"] for m in history.recent(30)] == [f"prompt {i}" for i in range(20, 50)]
+
+    def test_migrate_legacy_json(self, tmp_path):
+        legacy = [
+            {"role": "user", "text": "filter", "link": "https://example.com"},
+            {"role": "assistant", "text": "done", "results": [{"a": 1}]},
+        ]
+        (tmp_path / "chat_history.json").write_text(json.dumps(legacy))
+        history = ChatHistory(tmp_path)
+        assert not (tmp_path / "chat_history.json").exists()
+        messages = history.recent()
+        assert [m["text"] for m in messages] == ["filter", "done"]
+        assert history.results(messages[1]) == [{"a": 1}]
+
+    def test_other_results_inline(self, tmp_path):
+        history = ChatHistory(tmp_path)
+        shapes = [
+            {"title": "GP", "pay": 2000},
+            {"titles": ["GP", "Nurse"], "total": 2},
+            [{"title": "GP"}, {"title": "Nurse", "pay": 900}],
+            [{"title": "GP", "tags": ["locum"]}],
+            "no results",
+        ]
+        for results in shapes:
+            record = history.append("assistant", "done", results)
+            assert "results_ref" not in record
+        assert [history.results(m) for m in history.recent(len(shapes))] == shapes
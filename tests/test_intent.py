@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from scrape_gpt import intent as intent_module
+from scrape_gpt.intent import CONFIDENCE_THRESHOLD, classify, classify_search, label_of, load_corpus
+from scrape_gpt.models import Search
+
+
+class TestClassify:
+    def test_corpus(self):
+        for item in load_corpus():
+            assert label_of(classify(item["prompt"]).search) == item["label"], item["prompt"]
+
+    def test_test_prompts_are_confident(self):
+        for prompt in [
+            "navigate https://shorthorn.digitalbeef.com/ do Ranch search with state of alabama",
+            "navigate https://shorthorn.digitalbeef.com/ do EPD search with CE direct min,max 0,0",
+            "navigate https://shorthorn.digitalbeef.com/ do Animal Search, search for bulls with search field 'A' on Tattoo",
+        ]:
+            assert classify(prompt).confidence >= CONFIDENCE_THRESHOLD
+
+    def test_mixed_evidence_is_unsure(self):
+        intent = classify("find the ranch that bred the animal with tattoo FSF23")
+        assert intent.confidence < CONFIDENCE_THRESHOLD
+
+    def test_no_evidence(self):
+        intent = classify("summarize the home page")
+        assert intent.search == Search()
+        assert intent.confidence == 0
+
+
+@pytest.mark.asyncio
+class TestClassifySearch:
+    async def test_confident_needs_no_llm(self):
+        search = await classify_search("do EPD search with birth weight max 2", llm=object())
+        assert search.search_epd and not search.search_ranch
+
+    async def test_unsure_loads_chat_off_loop(self, monkeypatch):
+        class FakeChat:
+            def with_structured_output(self, model):
+                return self
+
+            async def ainvoke(self, task):
+                return Search(search_ranch=True)
+
+        threads = []
+
+        def create_chat():
+            threads.append(threading.current_thread())
+            return FakeChat()
+
+        monkeypatch.setattr(intent_module, "create_chat", create_chat)
+        search = await classify_search("find something about cattle", threshold=1.1)
+        assert search.search_ranch
+        assert threads and threads[0] is not threading.main_thread()
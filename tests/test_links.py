@@ -0,0 +1,29 @@
+from scrape_gpt.links import dedupe_links, normalize_url, rank_links
+
+
+class TestLinks:
+    def test_normalize_url(self):
+        assert normalize_url("HTTPS://Example.com:443/jobs?page=2#top") == "https://example.com/jobs?page=2"
+        assert normalize_url("http://example.com") == "http://example.com/"
+        assert normalize_url("http://example.com:8080/a") == "http://example.com:8080/a"
+        assert normalize_url("javascript:void(0)") is None
+        assert normalize_url("mailto:jobs@example.com") is None
+
+    def test_dedupe_links(self):
+        links = [
+            {"text": "Job 1", "url": "https://example.com/jobs/1"},
+            {"text": "", "url": "https://example.com/jobs/1#apply"},
+            {"text": "Apply", "url": "https://example.com/jobs/1"},
+            {"text": "Home", "url": "javascript:home()"},
+        ]
+        assert dedupe_links(links) == [{"text": "Job 1 | Apply", "url": "https://example.com/jobs/1"}]
+
+    def test_rank_links(self):
+        links = [
+            {"text": "About us", "url": "https://example.com/about"},
+            {"text": "Emergency doctor", "url": "https://example.com/jobs/1"},
+            {"text": "Next page", "url": "https://example.com/jobs?page=2"},
+        ]
+        ranked = rank_links(links, "job details doctor")
+        assert ranked[0]["text"] == "Emergency doctor"
+        assert rank_links(links, "") == links
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pytest
+
+from scrape_gpt.models import Animal, EPDAnimal, RanchProfile
+from scrape_gpt.parse_rows import RowParseError, header_fields, iter_rows, parse_row, result_headers, try_parse_row
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+RANCH_PAGE = """
+<table>
+<tr><th>Type</th><th>Member</th></tr>
+<tr onmouseover="this.className='hover'" onmouseout="this.className=''">
+<td>AA</td><td>01-00927</td><td>PRNL</td><td><a href="#">JAMES PARNELL</a></td><td></td><td>STANTON</td><td>AL</td>
+</tr>
+<tr onmouseover="this.className='hover'"><td>AA</td><td>01-00928</td><td>ABC</td><td>JOHN&nbsp;DOE</td><td>DOE FARMS</td><td>MOBILE</td><td>AL</td></tr>
+</table>
+"""
+
+
+class TestParseRows:
+    def test_iter_rows(self):
+        rows = list(iter_rows(RANCH_PAGE))
+        assert len(rows) == 2
+        assert rows[0].startswith("<tr onmouseover")
+        assert rows[0].endswith("</tr>")
+        assert list(iter_rows(RANCH_PAGE, skip=1)) == rows[1:]
+
+    def test_ranch(self):
+        rows = list(iter_rows(RANCH_PAGE))
+        assert parse_row(rows[0], RanchProfile) == RanchProfile(
+            member="01-00927",
+            member_name="JAMES PARNELL",
+            city="STANTON",
+            state_or_province="AL",
+            prefix="PRNL",
+            dba="",
+            type="AA",
+        )
+        assert parse_row(rows[1], RanchProfile).member_name == "JOHN DOE"
+
+    def test_epd(self):
+        traits = "".join(f"<td>{i}.5<br>+0.1<br>.{i}<br>{i}%</td>" for i in range(17))
+        row = f'<tr onmouseover="x"><td>4230422</td><td>T1</td><td>SOME BULL</td>{traits}</tr>'
+        animal = parse_row(row, EPDAnimal)
+        assert animal.registration == "4230422"
+        assert animal.birth_weight.epd == 1.5
+        assert animal.f_dollar_index.rank == "16%"
+        headers = "Reg #|Tattoo|Name|CED|BW|WW|YW|Milk|TM|CEM|Stay|YG|CW|REA|Fat|Marb|CEZ$|BMI$|CPI$|F$".split("|")
+        assert parse_row(row, EPDAnimal, header_fields(headers, EPDAnimal)) == animal
+
+    def test_layout_mismatch(self):
+        row = '<tr onmouseover="x"><td>CM23361</td><td>A</td><td>NAME</td></tr>'
+        with pytest.raises(RowParseError):
+            parse_row(row, Animal)
+        assert try_parse_row('<tr onmouseover="x"><td>header</td></tr>', EPDAnimal) is None
+
+    def test_result_page_by_header(self):
+        page = (FIXTURES / "ranch_results.html").read_text()
+        headers = result_headers(page)
+        assert headers == ["Type", "Member #", "Prefix", "Member Name", "DBA", "City", "State/Prov"]
+        fields = header_fields(headers, RanchProfile)
+        ranches = [parse_row(row, RanchProfile, fields) for row in iter_rows(page)]
+        assert [r.member for r in ranches] == ["01-00927", "01-01544", "01-02210", "01-03018"]
+        assert ranches[0] == RanchProfile(
+            type="AA",
+            member="01-00927",
+            prefix="PRNL",
+            member_name="JAMES PARNELL",
+            dba="",
+            city="STANTON",
+            state_or_province="AL",
+        )
+        assert ranches[1].dba == "CEDAR KNOLL SHORTHORNS"
+        assert ranches[3].member_name == "BUTLER FAMILY FARMS"
+
+    def test_reordered_columns(self):
+        page = (FIXTURES / "ranch_results.html").read_text()
+        row = next(iter_rows(page)).replace("<td>STANTON</td>", "").replace("<td>AA</td>", "<td>AA</td><td>STANTON</td>")
+        headers = ["Type", "City", "Member #", "Prefix", "Member Name", "DBA", "State/Prov"]
+        ranch = parse_row(row, RanchProfile, header_fields(headers, RanchProfile))
+        assert (ranch.city, ranch.member, ranch.state_or_province) == ("STANTON", "01-00927", "AL")
+
+    def test_unknown_header(self):
+        with pytest.raises(RowParseError):
+            header_fields(["Type", "Member #", "Photo", "Prefix", "Member Name", "DBA", "City", "State/Prov"], RanchProfile)
+        with pytest.raises(RowParseError):
+            header_fields(["Type", "Member #", "Prefix", "Member Name", "City", "State/Prov"], RanchProfile)
+        page = (FIXTURES / "ranch_results.html").read_text()
+        assert try_parse_row(next(iter_rows(page)), RanchProfile, ["type", "member", None]) is None
+        assert header_fields(["Reg #", "Tattoo", "Name", "Birth Date"], Animal) == [
+            "registration", "prefix_or_tattoo", "name", "birth_date"
+        ]
@@ -0,0 +1,15 @@
+import re
+
+from scrape_gpt.partitions import epd_ce_direct_ranges
+
+
+class TestPartitions:
+    def test_epd_ranges_cover_every_value(self):
+        ranges = []
+        for text in epd_ce_direct_ranges([-1, 0, 1]):
+            low = re.search(r"min (-?\d+)", text)
+            high = re.search(r"max (-?\d+)", text)
+            ranges.append((float(low[1]) if low else float("-inf"), float(high[1]) if high else float("inf")))
+        assert ranges == [(float("-inf"), -1), (-1, 0), (0, 1), (1, float("inf"))]
+        for value in (-37.5, -1.0, -0.4, 0.0, 0.7, 1.0, 12.3):
+            assert any(low <= value <= high for low, high in ranges)
@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from scrape_gpt.phases import PhaseTimer
+
+
+@pytest.mark.asyncio
+class TestPhaseTimer:
+    async def test_concurrent_phases_overlap(self):
+        timer = PhaseTimer()
+        await asyncio.gather(
+            timer.run("classify", asyncio.sleep(0.05)),
+            timer.run("browser", asyncio.sleep(0.2)),
+            timer.run("llm", asyncio.sleep(0.01)),
+        )
+        with timer.phase("agent"):
+            await asyncio.sleep(0.1)
+        classify, browser = timer.phases["classify"], timer.phases["browser"]
+        assert classify[0] < browser[1] and browser[0] < classify[1]
+        assert timer.critical_path() == ["browser", "agent"]
+        assert "* browser" in timer.report()
+        assert "  classify" in timer.report()
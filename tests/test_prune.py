@@ -0,0 +1,29 @@
+from scrape_gpt.prune import prune_html
+
+PAGE = """
+<html><head><title>Results</title><script>var x = 1;</script><style>td { color: red }</style></head>
+<body onload="init()">
+  <div class="wrapper"><div>   </div>
+    <table class="grid">
+      <tr onmouseover="this.className='hover'" style="cursor: pointer">
+        <td>AA</td><td>01-00927</td><td></td><td><a href="/ranch?id=927" onclick="go()">JAMES   PARNELL</a></td>
+      </tr>
+    </table>
+    <svg><path d="M0 0"/></svg><img src="logo.png"/><br/>
+  </div>
+</body></html>
+"""
+
+
+class TestPrune:
+    def test_prune_html(self):
+        pruned = prune_html(PAGE)
+        assert pruned.text == (
+            '<html> <body> <div> <table> <tr> <td>AA</td><td>01-00927</td><td></td>'
+            '<td><a href="/ranch?id=927">JAMES PARNELL</a></td> </tr> </table> <img src="logo.png"><br> </div> </body></html>'
+        )
+        assert pruned.output_tokens < pruned.input_tokens
+
+    def test_markdown(self):
+        pruned = prune_html('<h1>Jobs</h1><p>Pay: <b>$2,500</b> per day</p><script>x()</script>', markdown=True)
+        assert pruned.text == "# Jobs\n\nPay: **$2,500** per day"
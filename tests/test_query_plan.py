@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from scrape_gpt.query_plan import (Aggregate, Filter, PlanCache, PlanError, QueryPlan, Sort, execute_plan,
+                                   run_query_plan, schema_fingerprint, session_schema, validate_plan)
+from scrape_gpt.session_store import SessionStore
+
+JOBS = pd.DataFrame({
+    "title": ["GP", "Surgeon", "Nurse", "Anaesthetist"],
+    "pay": ["$2,000", "$3,100", "$900", "$2,600"],
+    "state": ["NSW", "NSW", "VIC", "VIC"],
+})
+SCHEMA = {"jobs": {"title": "string", "pay": "string", "state": "string"}}
+
+
+class TestQueryPlan:
+    def test_filter_text_amounts(self):
+        plan = QueryPlan(filters=[Filter(column="pay", op=">", value="$2,500")], sort=[Sort(column="pay", descending=True)])
+        assert list(execute_plan(JOBS, plan)["title"]) == ["Surgeon", "Anaesthetist"]
+
+    def test_sort_mixed_text_and_numbers(self):
+        df = pd.DataFrame({"address": ["12 Main St", "Suite 5", "7", "Apt 100"]})
+        plan = QueryPlan(sort=[Sort(column="address")])
+        assert list(execute_plan(df, plan)["address"]) == ["12 Main St", "7", "Apt 100", "Suite 5"]
+        df = pd.DataFrame({"pay": [f"${i},000" for i in range(1, 11)] + ["n/a"]})
+        assert list(execute_plan(df, QueryPlan(sort=[Sort(column="pay")]))["pay"])[:3] == ["$1,000", "$2,000", "$3,000"]
+
+    def test_project_and_limit(self):
+        plan = QueryPlan(filters=[Filter(column="state", op="==", value="nsw")], columns=["title"], limit=1)
+        assert execute_plan(JOBS, plan).to_dict(orient="records") == [{"title": "GP"}]
+
+    def test_aggregate(self):
+        plan = QueryPlan(
+            aggregate=Aggregate(func="mean", column="pay", group_by=["state"]),
+            sort=[Sort(column="mean_pay", descending=True)],
+        )
+        assert execute_plan(JOBS, plan).to_dict(orient="records") == [
+            {"state": "NSW", "mean_pay": 2550.0},
+            {"state": "VIC", "mean_pay": 1750.0},
+        ]
+        assert plan.referenced_columns() == ["state", "pay"]
+
+    def test_validate(self):
+        assert validate_plan(QueryPlan(columns=["title"]), SCHEMA).table == "jobs"
+        with pytest.raises(PlanError):
+            validate_plan(QueryPlan(columns=["salary"]), SCHEMA)
+        with pytest.raises(PlanError):
+            validate_plan(QueryPlan(filters=[Filter(column="pay", op=">", value="high")]), SCHEMA)
+
+    @pytest.mark.asyncio
+    async def test_cached_plan_needs_no_llm(self, tmp_path):
+        store = SessionStore(tmp_path)
+        store.append("jobs", JOBS)
+        prompt = "Filter data that have pay higher than $2,500 per day only."
+        plan = QueryPlan(table="jobs", filters=[Filter(column="pay", op=">", value=2500)])
+        key = PlanCache.key(prompt, schema_fingerprint(session_schema(store)))
+        PlanCache(store.path / "plans.json").put(key, plan)
+        _, result = await run_query_plan(store, prompt, llm=object())
+        assert list(result["title"]) == ["Surgeon", "Anaesthetist"]
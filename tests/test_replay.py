@@ -0,0 +1,89 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from scrape_gpt import http_client, replay
+from scrape_gpt.replay import FORM_FILLERS, FORM_RESULTS, FormTemplate, hidden_inputs, map_params, submit_form
+
+TEMPLATE = FormTemplate(
+    name="ranch",
+    page_url="https://shorthorn.digitalbeef.com/",
+    method="POST",
+    url="https://shorthorn.digitalbeef.com/modules.php",
+    fields=[
+        ("op", "ranch_search"),
+        ("token", "old"),
+        ("ranch_search_prefix", "__prefix__"),
+        ("ranch_search_val", "__name__"),
+        ("ranch_search_state", "AL"),
+    ],
+    params={"prefix": "ranch_search_prefix", "name": "ranch_search_val", "state": "ranch_search_state"},
+    choices={"state": {"United States - All": "US", "United States - Alabama": "AL", "United States - Texas": "TX",
+                       "United States - Arkansas": "AR", "United States - Kansas": "KS"}},
+)
+
+
+class TestReplay:
+    def test_build_defaults(self):
+        assert TEMPLATE.build({}) == [
+            ("op", "ranch_search"),
+            ("token", "old"),
+            ("ranch_search_prefix", ""),
+            ("ranch_search_val", ""),
+            ("ranch_search_state", "US"),
+        ]
+
+    def test_build_values(self):
+        fields = dict(TEMPLATE.build({"prefix": "PRNL", "state": "texas"}, hidden={"token": "new"}))
+        assert fields["ranch_search_prefix"] == "PRNL"
+        assert fields["ranch_search_state"] == "TX"
+        assert fields["token"] == "new"
+
+    def test_hidden_inputs(self):
+        html = '<form><input type="hidden" name="token" value="abc"><input name="q" value="x"></form>'
+        assert hidden_inputs(html) == {"token": "abc"}
+
+    def test_choose_exact_state(self):
+        assert dict(TEMPLATE.build({"state": "Kansas"}))["ranch_search_state"] == "KS"
+        assert dict(TEMPLATE.build({"state": "arkansas"}))["ranch_search_state"] == "AR"
+
+    def test_choose_ambiguous(self):
+        with pytest.raises(ValueError, match="several"):
+            TEMPLATE.build({"state": "ansas"})
+        with pytest.raises(ValueError, match="No state option"):
+            TEMPLATE.build({"state": "Ohio"})
+
+    def test_map_params(self):
+        fields = [("op", "epd_search"), ("ced_min", "__ce_direct_min__"), ("ced_max", "__ce_direct_max__"),
+                  ("gender", "0"), ("sort", "0")]
+        sentinels = {"ce_direct_min": "__ce_direct_min__", "ce_direct_max": "__ce_direct_max__",
+                     "gender": "0", "sort_by": "0"}
+        assert map_params(sentinels, fields) == {
+            "ce_direct_min": "ced_min", "ce_direct_max": "ced_max", "gender": "gender", "sort_by": "sort",
+        }
+
+    def test_every_form_has_filler(self):
+        assert set(FORM_FILLERS) == set(FORM_RESULTS)
+
+
+@pytest.mark.asyncio
+class TestSubmitForm:
+    async def test_refresh_rejected_token(self):
+        tokens = iter(["stale", "fresh"])
+        submitted = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "GET":
+                return httpx.Response(200, text=f'<input type="hidden" name="token" value="{next(tokens)}">')
+            token = parse_qs((await request.aread()).decode())["token"][0]
+            submitted.append(token)
+            return httpx.Response(200 if token == "fresh" else 403, text=f"results for {token}")
+
+        http_client._clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        replay._hidden_cache.clear()
+        assert await submit_form(TEMPLATE, {"state": "Texas"}) == "results for fresh"
+        assert submitted == ["stale", "fresh"]
+        assert await submit_form(TEMPLATE, {"state": "Texas"}) == "results for fresh"
+        assert submitted == ["stale", "fresh", "fresh"]
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scrape_gpt.tools.runtime import run_blocking, tool_stats
+
+
+@pytest.mark.asyncio
+class TestRuntime:
+    async def test_runs_off_event_loop(self):
+        loop_thread = threading.get_ident()
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        thread = await run_blocking("test_runs", lambda: time.sleep(0.2) or threading.get_ident())
+        ticker.cancel()
+        assert thread != loop_thread
+        assert ticks > 5
+        assert tool_stats()["test_runs"]["calls"] == 1
+        assert tool_stats()["test_runs"]["run_seconds"]["max"] >= 0.2
+
+    async def test_timeout(self):
+        with pytest.raises(TimeoutError):
+            await run_blocking("test_timeout", time.sleep, 0.5, timeout=0.05)
+        assert tool_stats()["test_timeout"]["timeouts"] == 1
+
+    async def test_failure(self):
+        with pytest.raises(ZeroDivisionError):
+            await run_blocking("test_failure", lambda: 1 / 0)
+        assert tool_stats()["test_failure"]["failures"] == 1
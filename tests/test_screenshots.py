@@ -0,0 +1,52 @@
+from io import BytesIO
+
+from langchain_core.messages import HumanMessage
+from langchain_core.prompt_values import ChatPromptValue
+from PIL import Image, ImageDraw
+
+from scrape_gpt.screenshots import (ScreenshotConfig, encode_screenshot,
+                                    rewrite_screenshot_messages, vision_tokens)
+
+
+def page_png(text_rows: int, width: int = 2560, height: int = 1600) -> bytes:
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for row in range(text_rows):
+        draw.rectangle((100, 100 + row * 120, 1800, 160 + row * 120), fill="black")
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class TestScreenshots:
+    def test_downscale_and_jpeg(self):
+        png = page_png(5)
+        shot = encode_screenshot(png, ScreenshotConfig(max_width=1024))
+        assert (shot.width, shot.height) == (1024, 640)
+        assert shot.mime == "image/jpeg"
+        assert shot.data.startswith("/9j/")
+        assert shot.size < len(png)
+        assert shot.changed
+
+    def test_change_detection(self):
+        first = encode_screenshot(page_png(5))
+        assert not encode_screenshot(page_png(5), previous_hash=first.hash).changed
+        assert encode_screenshot(page_png(10), previous_hash=first.hash).changed
+
+    def test_vision_tokens(self):
+        assert vision_tokens(1024, 640) == 765
+        assert vision_tokens(2560, 1600) == 1105
+        assert vision_tokens(512, 512) == 255
+
+    def test_rewrite_messages(self):
+        def prompt(data):
+            return ChatPromptValue(messages=[HumanMessage(content=[
+                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{data}"}},
+                {"type": "text", "text": "boxes"},
+            ])])
+
+        content = rewrite_screenshot_messages(prompt("/9j/abc")).messages[0].content
+        assert content[0]["image_url"]["url"] == "data:image/jpeg;base64,/9j/abc"
+        content = rewrite_screenshot_messages(prompt("iVBORw0KGgo")).messages[0].content
+        assert content[0]["image_url"]["url"] == "data:image/png;base64,iVBORw0KGgo"
+        assert content[1] == {"type": "text", "text": "boxes"}
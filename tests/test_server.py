@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import pytest
+
+from scrape_gpt.server import ScrapeServer
+
+
+async def request(socket_path, method, path, body=None):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+@pytest.mark.asyncio
+class TestScrapeServer:
+    async def test_sessions_are_isolated(self, tmp_path):
+        running = {}
+        overlaps = []
+
+        async def chat_main(session_id, prompt, link, mode):
+            if running.get(session_id):
+                overlaps.append(session_id)
+            running[session_id] = True
+            await asyncio.sleep(0.05)
+            running[session_id] = False
+            return f"{session_id}: {prompt}", [{"n": 1}]
+
+        socket_path = str(tmp_path / "server.sock")
+        server = await ScrapeServer(chat_main=chat_main).start(socket_path=socket_path)
+        async with server:
+            responses = await asyncio.gather(
+                request(socket_path, "POST", "/chat", {"session_id": "a", "prompt": "1"}),
+                request(socket_path, "POST", "/chat", {"session_id": "a", "prompt": "2"}),
+                request(socket_path, "POST", "/chat", {"session_id": "b", "prompt": "3"}),
+            )
+        assert overlaps == []
+        assert [status for status, _ in responses] == [200, 200, 200]
+        assert responses[2][1]["text"] == "b: 3"
+        assert responses[2][1]["results"] == [{"n": 1}]
+
+    async def test_errors(self, tmp_path):
+        async def app_main(prompt):
+            raise RuntimeError("browser crashed")
+
+        socket_path = str(tmp_path / "server.sock")
+        server = await ScrapeServer(app_main=app_main).start(socket_path=socket_path)
+        async with server:
+            assert (await request(socket_path, "POST", "/chat", {"prompt": "x"}))[0] == 400
+            assert (await request(socket_path, "POST", "/chat", {"session_id": "../x", "prompt": "x"}))[0] == 400
+            assert (await request(socket_path, "GET", "/nope"))[0] == 404
+            status, body = await request(socket_path, "POST", "/app", {"prompt": "x"})
+            assert status == 500 and "browser crashed" in body["error"]
+            status, body = await request(socket_path, "GET", "/health")
+            assert status == 200 and body["failures"] == 1
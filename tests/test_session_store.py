@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from scrape_gpt.session_store import SessionStore
+
+
+class TestSessionStore:
+    def test_append_and_load(self, tmp_path):
+        store = SessionStore(tmp_path)
+        store.append("jobs", pd.DataFrame({"title": ["a", "b"], "pay": [100, 200]}))
+        store.append("jobs", pd.DataFrame({"title": ["c"], "pay": [300], "city": ["Sydney"]}))
+        assert store.tables() == ["jobs"]
+        df = store.load("jobs")
+        assert list(df["pay"]) == [100, 200, 300]
+        assert df["city"].isna().sum() == 2
+        assert store.schema("jobs").names == ["title", "pay", "city"]
+
+    def test_projected_load(self, tmp_path):
+        store = SessionStore(tmp_path)
+        store.append("jobs", pd.DataFrame({"title": ["a"], "pay": [100], "description": ["long text"]}))
+        assert list(store.load("jobs", columns=["pay"]).columns) == ["pay"]
+
+    def test_mixed_types_kept_as_text(self, tmp_path):
+        store = SessionStore(tmp_path)
+        store.append("jobs", pd.DataFrame({"pay": [100, "$200"]}))
+        assert list(store.load("jobs")["pay"]) == ["100", "$200"]
+
+    def test_parts_with_mixed_types(self, tmp_path):
+        store = SessionStore(tmp_path)
+        store.append("jobs", pd.DataFrame({"pay": [100]}))
+        store.append("jobs", pd.DataFrame({"pay": ["$200"], "city": ["Sydney"]}))
+        assert str(store.schema("jobs").field("pay").type) == "string"
+        assert list(store.load("jobs")["pay"]) == ["100", "$200"]
+        assert [list(part.columns) for part in store.iter_parts("jobs")] == [["pay"], ["pay", "city"]]
+
+    def test_next_table_and_load_all(self, tmp_path):
+        store = SessionStore(tmp_path)
+        assert store.next_table("extracted_csv") == "extracted_csv_0"
+        store.append("extracted_csv_0", pd.DataFrame({"a": [1]}))
+        assert store.next_table("extracted_csv") == "extracted_csv_1"
+        assert list(store.load_all()) == ["extracted_csv_0"]
+
+    def test_concurrent_appends_and_tables(self, tmp_path):
+        store = SessionStore(tmp_path)
+        with ThreadPoolExecutor(8) as pool:
+            tables = list(pool.map(lambda _: store.next_table("extracted_csv"), range(8)))
+            list(pool.map(lambda i: store.append("jobs", pd.DataFrame({"n": [i]})), range(20)))
+        assert len(set(tables)) == 8
+        assert sorted(store.load("jobs")["n"]) == list(range(20))
@@ -0,0 +1,39 @@
+import pytest
+
+from scrape_gpt.settle import SETTLE_JS, wait_for_settle
+
+
+@pytest.mark.asyncio
+class TestSettle:
+    async def test_settled(self):
+        expressions = []
+
+        async def evaluate(expression):
+            expressions.append(expression)
+            return {"settled": True, "ms": 600}
+
+        result = await wait_for_settle(evaluate, "table tr", quiet_ms=300, timeout=2)
+        assert result.settled
+        assert expressions[0].startswith(SETTLE_JS)
+        assert '("table tr", 300, ' in expressions[0]
+
+    async def test_retries_after_navigation(self):
+        calls = 0
+
+        async def evaluate(expression):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("Execution context was destroyed")
+            return {"settled": True, "ms": 500}
+
+        assert (await wait_for_settle(evaluate, timeout=2)).settled
+        assert calls == 2
+
+    async def test_timeout(self):
+        async def evaluate(expression):
+            return {"settled": False, "ms": 1000, "found": False, "pending": 0}
+
+        result = await wait_for_settle(evaluate, "#results", timeout=1)
+        assert not result.settled
+        assert "selector not found" in result.describe()
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from scrape_gpt import tracing
+from scrape_gpt.tools.runtime import run_blocking
+from scrape_gpt.tracing import load_trace, span, start_trace, summarize, traced
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "SESSION_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+class TestTracing:
+    async def test_nested_spans_across_tasks(self, session_dir):
+        @traced("browser")
+        async def click():
+            await asyncio.sleep(0.01)
+
+        with start_trace("s1", "run") as trace:
+            with span("step", "step", n=1):
+                await asyncio.gather(click(), click())
+            with pytest.raises(ValueError):
+                with span("broken", "tool"):
+                    raise ValueError("nope")
+
+        data = json.loads(trace.path.read_text())
+        spans = {s["id"]: s for s in data["spans"]}
+        clicks = [s for s in spans.values() if s["name"] == "click"]
+        assert len(clicks) == 2
+        assert all(spans[s["parent"]]["name"] == "step" for s in clicks)
+        assert spans[clicks[0]["parent"]]["attrs"] == {"n": 1}
+        assert next(s for s in spans.values() if s["name"] == "broken")["error"] == "ValueError: nope"
+        assert trace.path.parent == session_dir / "s1" / "traces"
+
+    async def test_llm_and_tool_spans(self):
+        chat = FakeListChatModel(responses=["a", "b"])
+        with start_trace("s2") as trace:
+            await chat.ainvoke("hello")
+            await run_blocking("test_tool", chat.invoke, "again")
+
+        data = load_trace("s2")
+        spans = {s["id"]: s for s in data["spans"]}
+        llms = [s for s in spans.values() if s["kind"] == "llm"]
+        assert len(llms) == 2
+        tool_llm = next(s for s in llms if spans[s["parent"]]["name"] == "test_tool")
+        assert "prompt_tokens" in tool_llm["attrs"]
+        report = summarize(data)
+        assert "test_tool" in report and "llm" in report
+        assert len(trace.spans) == 4
+
+    async def test_no_op_outside_trace(self):
+        with span("anything") as current:
+            assert current is None
+        assert tracing.current_trace() is None
+
+    async def test_disabled(self, monkeypatch, session_dir):
+        monkeypatch.setenv("TRACE", "0")
+        with start_trace("s3") as trace:
+            with span("step"):
+                pass
+        assert trace is None
+        assert not (session_dir / "s3").exists()
+
+    async def test_concurrent_traces_keep_own_files(self, session_dir):
+        async def run(n):
+            with start_trace("s4") as trace:
+                with span("step", n=n):
+                    await asyncio.sleep(0.01)
+            return trace
+
+        traces = await asyncio.gather(*(run(n) for n in range(5)))
+        assert len({trace.path for trace in traces}) == 5
+        files = sorted((session_dir / "s4" / "traces").iterdir())
+        assert sorted(trace.path for trace in traces) == files
+        for n, trace in enumerate(traces):
+            data = json.loads(trace.path.read_text())
+            assert data["trace_id"] == trace.trace_id
+            assert [s["attrs"] for s in data["spans"] if s["name"] == "step"] == [{"n": n}]
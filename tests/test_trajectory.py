@@ -0,0 +1,89 @@
+import pytest
+
+from scrape_gpt import trajectory as trajectory_module
+from scrape_gpt.trajectory import TrajectoryRun, parameterize
+
+TEMPLATE = "Find breeder with this information: State: {state}, Member: {member}"
+SEARCH_URL = "https://www.amgr.org/frm_directorySearch.cfm"
+SEARCH_PAGE = [
+    {"text": "", "ariaLabel": "", "type": "input"},
+    {"text": "Search", "ariaLabel": "", "type": "button"},
+]
+SEARCH_SELECTORS = ['input[name="member"]', "#search"]
+
+
+class FakePage:
+    """
+    Stands in for a marked page: the selector of the element behind each box.
+    """
+
+    def __init__(self, url, selectors):
+        self.url = url
+        self.selectors = selectors
+        self.computed = []
+
+    async def evaluate(self, expression, arg):
+        if expression.startswith("index"):
+            self.computed.append(arg)
+            return self.selectors[arg]
+        return self.selectors.index(arg) if arg in self.selectors else -1
+
+
+async def record_run(params):
+    run = TrajectoryRun(TEMPLATE, params)
+    page = FakePage(SEARCH_URL, SEARCH_SELECTORS)
+    await run.record(page, SEARCH_PAGE, {"action": "Type", "args": ["0", params["member"]]})
+    await run.record(page, SEARCH_PAGE, {"action": "Click", "args": ["1"]})
+    await run.record(FakePage(SEARCH_URL + "?page=2", []), [], {"action": "ANSWER", "args": ["done"]})
+    return run
+
+
+@pytest.mark.asyncio
+class TestTrajectory:
+    async def test_parameterize(self):
+        assert parameterize("Dwight Elmore {x}", {"member": "Dwight Elmore"}) == "{member} {{x}}"
+        assert parameterize("Dwight Elmore", {"member": "Dwight Elmore"}).format(member="Jo") == "Jo"
+
+    async def test_record_uses_selectors(self):
+        run = await record_run({"state": "Kansas", "member": "Dwight Elmore"})
+        assert [(s.action, s.selector, s.args) for s in run.steps] == [
+            ("Type", 'input[name="member"]', ["{member}"]),
+            ("Click", "#search", []),
+        ]
+
+    async def test_selector_only_for_target(self):
+        run = TrajectoryRun(TEMPLATE, {"state": "Kansas", "member": "Dwight Elmore"})
+        page = FakePage(SEARCH_URL, ["#help", *SEARCH_SELECTORS])
+        await run.record(page, [{"text": "Help"}, *SEARCH_PAGE], {"action": "Click", "args": ["2"]})
+        assert page.computed == [2]
+
+    async def test_replay_with_new_params(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(trajectory_module, "TRAJECTORY_DIR", tmp_path)
+        (await record_run({"state": "Kansas", "member": "Dwight Elmore"})).save()
+
+        run = TrajectoryRun.load(TEMPLATE, {"state": "Texas", "member": "Jo Smith"})
+        # Elements are found by selector even when their index moved
+        page = FakePage(SEARCH_URL, ["#help", *SEARCH_SELECTORS])
+        boxes = [{"text": "Help", "ariaLabel": "", "type": "a"}, *SEARCH_PAGE]
+        assert await run.next_prediction(page, boxes) == {"action": "Type", "args": ["1", "Jo Smith"]}
+        assert await run.next_prediction(page, boxes) == {"action": "Click", "args": ["2"]}
+        assert await run.next_prediction(FakePage(SEARCH_URL + "?page=2", []), []) is None
+        assert run.replayed == 2
+
+    async def test_diverge(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(trajectory_module, "TRAJECTORY_DIR", tmp_path)
+        (await record_run({"state": "Kansas", "member": "Dwight Elmore"})).save()
+
+        run = TrajectoryRun.load(TEMPLATE, {"state": "Texas", "member": "Jo Smith"})
+        maintenance = FakePage("https://www.amgr.org/maintenance.cfm", SEARCH_SELECTORS)
+        assert await run.next_prediction(maintenance, SEARCH_PAGE) is None
+        assert await run.next_prediction(FakePage(SEARCH_URL, SEARCH_SELECTORS), SEARCH_PAGE) is None
+        assert run.replayed == 0
+
+    async def test_missing_element_diverges(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(trajectory_module, "TRAJECTORY_DIR", tmp_path)
+        (await record_run({"state": "Kansas", "member": "Dwight Elmore"})).save()
+
+        run = TrajectoryRun.load(TEMPLATE, {"state": "Texas", "member": "Jo Smith"})
+        assert await run.next_prediction(FakePage(SEARCH_URL, ["#other", "#search"]), SEARCH_PAGE) is None
+        assert run.replayed == 0